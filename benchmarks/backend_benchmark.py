@@ -0,0 +1,120 @@
+"""
+Benchmark of the git backends, on local repositories.
+
+A generated origin is deployed to a bare destination with every backend - clone, copy, commit and push,
+then every deployed file is read back from the commit, as the sync does.
+
+Usage: python3 benchmarks/backend_benchmark.py [--files 2000] [--rounds 3]
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from git import Repo
+
+from homework_deployer.backend import BatchBackend, GitBackend, GitPythonBackend
+from homework_deployer.executor import copy_files
+
+
+def create_repos(root: Path, files: int) -> tuple[Path, Path]:
+    """
+    Create an origin with generated files, and an empty bare destination.
+
+    :param root: Directory to create the repositories in.
+    :param files: Number of files in the origin.
+    :return: The paths of the origin and the destination.
+    """
+    origin_path = root / "origin"
+    origin = Repo.init(origin_path, initial_branch="main")
+    for index in range(files):
+        path = origin_path / "hw" / f"task_{index % 50}" / f"file_{index}.py"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# File {index}\n" + "print('hello')\n" * 20, encoding="utf-8")
+    GitPythonBackend().commit(origin, "Initial commit")
+
+    destination_path = root / "destination.git"
+    Repo.init(destination_path, bare=True, initial_branch="main")
+    seed = Repo.clone_from(str(destination_path), str(root / "seed"))
+    (root / "seed" / "README.md").write_text("readme", encoding="utf-8")
+    GitPythonBackend().commit(seed, "Initial commit")
+    seed.remote("origin").push("main")
+
+    return origin_path, destination_path
+
+
+def run_round(backend: GitBackend, origin_path: Path, destination_path: Path, work_dir: Path) -> dict[str, float]:
+    """
+    Deploy the origin to the destination once, timing every phase.
+
+    :param backend: The backend to use.
+    :param origin_path: The path of the origin.
+    :param destination_path: The path of the destination.
+    :param work_dir: Directory for the clones, removed afterwards.
+    :return: Mapping of phase names to seconds.
+    """
+    timings: dict[str, float] = {}
+
+    start = time.perf_counter()
+    source_repo = backend.clone(str(origin_path), work_dir / "source")
+    destination_repo = backend.clone(str(destination_path), work_dir / "destination")
+    timings["clone"] = time.perf_counter() - start
+
+    source_dir = work_dir / "source" / "hw"
+    destination_dir = work_dir / "destination" / "hw"
+    copy_files([(source_dir, destination_dir)])
+
+    start = time.perf_counter()
+    backend.commit(destination_repo, "Benchmark commit", [destination_dir])
+    timings["commit"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    backend.push(destination_repo)
+    timings["push"] = time.perf_counter() - start
+
+    paths = [str(path.relative_to(work_dir / "source")) for path in source_dir.rglob("*.py")]
+    start = time.perf_counter()
+    for path in paths:
+        backend.read_blob(source_repo, "HEAD", path)
+    timings["read"] = time.perf_counter() - start
+
+    backend.close(source_repo)
+    backend.close(destination_repo)
+    shutil.rmtree(work_dir)
+
+    # Allow the next round to push the same content again
+    destination = Repo(destination_path)
+    destination.git.update_ref("refs/heads/main", "refs/heads/main~1")
+
+    return timings
+
+
+def main() -> None:
+    """
+    Run the benchmark and print the best time of every phase per backend.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark of the git backends")
+    parser.add_argument("--files", type=int, default=2000, help="Number of deployed files")
+    parser.add_argument("--rounds", type=int, default=3, help="Number of rounds per backend")
+    args = parser.parse_args()
+
+    backends: dict[str, GitBackend] = {"gitpython": GitPythonBackend(), "batch": BatchBackend()}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        origin_path, destination_path = create_repos(root, args.files)
+
+        print(f"{'backend':<10} {'clone':>8} {'commit':>8} {'push':>8} {'read':>8}")
+        for name, backend in backends.items():
+            rounds = [
+                run_round(backend, origin_path, destination_path, root / f"{name}_{index}")
+                for index in range(args.rounds)
+            ]
+            best = {phase: min(timings[phase] for timings in rounds) for phase in rounds[0]}
+            print(f"{name:<10} " + " ".join(f"{best[phase]:>7.3f}s" for phase in ("clone", "commit", "push", "read")))
+
+
+if __name__ == "__main__":
+    main()
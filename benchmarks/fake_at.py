@@ -0,0 +1,136 @@
+"""
+Fake 'at' command-line utility, keeping its queue in a local directory instead of the system spool.
+
+It supports the options used by homework_deployer - scheduling a job with '-t', listing the queue with '-l' and
+removing jobs with '-r' - and prints the same output as 'at'. Jobs never fire on their own, the load test takes
+them from the queue and runs them. The queue directory is taken from the FAKE_AT_QUEUE environment variable.
+
+Usage: python3 benchmarks/fake_at.py -t YYMMDDhhmm < command | -l | -r ID...
+"""
+
+import fcntl
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+QUEUE_ENV = "FAKE_AT_QUEUE"
+TIME_FORMAT = "%a %b %d %H:%M:%S %Y"  # As printed by 'at'
+
+
+def add_job(queue_dir: Path, when: datetime, command: str) -> int:
+    """
+    Add a job to the queue.
+
+    :param queue_dir: The queue directory.
+    :param when: The time the job is scheduled at.
+    :param command: The shell command of the job.
+    :return: The id of the job.
+    """
+    with _queue_lock(queue_dir):
+        counter_path = queue_dir / ".next_id"
+        job_id = int(counter_path.read_text(encoding="utf-8")) if counter_path.exists() else 1
+        counter_path.write_text(str(job_id + 1), encoding="utf-8")
+        job = {"time": when.isoformat(), "command": command}
+        (queue_dir / f"{job_id}.job").write_text(json.dumps(job), encoding="utf-8")
+
+    return job_id
+
+
+def list_jobs(queue_dir: Path) -> dict[int, dict[str, str]]:
+    """
+    Read the queued jobs.
+
+    :param queue_dir: The queue directory.
+    :return: Mapping of job ids to their time and command.
+    """
+    with _queue_lock(queue_dir):
+        return {int(path.stem): json.loads(path.read_text(encoding="utf-8")) for path in queue_dir.glob("*.job")}
+
+
+def remove_jobs(queue_dir: Path, job_ids: list[int]) -> bool:
+    """
+    Remove jobs from the queue.
+
+    :param queue_dir: The queue directory.
+    :param job_ids: The ids of the jobs.
+    :return: True if all of them were queued.
+    """
+    is_removed = True
+    with _queue_lock(queue_dir):
+        for job_id in job_ids:
+            try:
+                (queue_dir / f"{job_id}.job").unlink()
+            except FileNotFoundError:
+                is_removed = False
+
+    return is_removed
+
+
+def take_jobs(queue_dir: Path) -> dict[int, str]:
+    """
+    Remove all jobs from the queue, as 'atd' does when they fire.
+
+    :param queue_dir: The queue directory.
+    :return: Mapping of job ids to their commands.
+    """
+    with _queue_lock(queue_dir):
+        jobs = {}
+        for path in queue_dir.glob("*.job"):
+            jobs[int(path.stem)] = json.loads(path.read_text(encoding="utf-8"))["command"]
+            path.unlink()
+
+    return jobs
+
+
+def main(args: list[str]) -> int:
+    """
+    Run the fake 'at' with the given command line arguments.
+
+    :param args: The arguments, without the program name.
+    :return: The exit code.
+    """
+    queue_dir = Path(os.environ[QUEUE_ENV])
+    queue_dir.mkdir(parents=True, exist_ok=True)
+
+    match args:
+        case ["-t", when]:
+            scheduled = datetime.strptime(when, "%y%m%d%H%M")
+            job_id = add_job(queue_dir, scheduled, sys.stdin.read())
+            print("warning: commands will be executed using /bin/sh", file=sys.stderr)
+            print(f"job {job_id} at {scheduled.strftime(TIME_FORMAT)}", file=sys.stderr)
+            return 0
+        case ["-l"]:
+            for job_id, job in sorted(list_jobs(queue_dir).items()):
+                print(f"{job_id}\t{datetime.fromisoformat(job['time']).strftime(TIME_FORMAT)} a user")
+            return 0
+        case ["-r", *job_ids] if len(job_ids) > 0:
+            if remove_jobs(queue_dir, [int(job_id) for job_id in job_ids]):
+                return 0
+            print("Cannot find jobid", file=sys.stderr)
+            return 1
+        case _:
+            print(f"Unsupported arguments: {' '.join(args)}", file=sys.stderr)
+            return 2
+
+
+@contextmanager
+def _queue_lock(queue_dir: Path) -> Iterator[None]:
+    """
+    Hold an exclusive lock of the queue, shared by all processes using it.
+
+    :param queue_dir: The queue directory.
+    """
+    with open(queue_dir / ".lock", "w", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
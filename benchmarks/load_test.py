@@ -0,0 +1,402 @@
+"""
+Load test of many deadline events firing at the same time, on local repositories.
+
+Generated event configs, deploying local origins to shared local bare destinations, are registered with a fake
+'at' (see fake_at.py) whose queue is a local directory. All events are then fired at once - either every queued
+job runs its own 'run' command, as 'atd' would do, or a single 'run-due' deploys all of them. The report contains
+the throughput, the failure rate, the push contention and the consistency of the event store with the queue and
+the destinations.
+
+Usage: python3 benchmarks/load_test.py [--events 500] [--scheduler at|run-due] [--git-backend gitpython|batch]
+"""
+
+import argparse
+import fcntl
+import glob
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from git import Repo
+
+import fake_at
+import homework_deployer.constants as const
+from homework_deployer.backend import GitPythonBackend
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RMTREE_ATTEMPTS = 5
+REJECTED_PATTERN = re.compile(r"Push to .* rejected, retrying")
+OUTCOME_PATTERN = re.compile(r"^Event (\S+): (\w+)", re.MULTILINE)
+FAILURE_PATTERN = re.compile(r"Event \S+: Failed: (.*)")
+PATH_PATTERN = re.compile(r"\S*/destinations/[^\s:]+")
+
+
+def create_repos(root: Path, origins: int, destinations: int, files: int) -> tuple[list[Path], list[Path]]:
+    """
+    Create origins with generated files, and bare destinations with an initial commit.
+
+    :param root: Directory to create the repositories in.
+    :param origins: Number of origins.
+    :param destinations: Number of destinations.
+    :param files: Number of files in every origin.
+    :return: The paths of the origins and the destinations.
+    """
+    origin_paths = []
+    for index in range(origins):
+        origin_path = root / "origins" / f"origin_{index}"
+        origin = Repo.init(origin_path, initial_branch="main")
+        for file_index in range(files):
+            path = origin_path / "hw" / f"file_{file_index}.py"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(f"# Origin {index}, file {file_index}\n", encoding="utf-8")
+        GitPythonBackend().commit(origin, "Initial commit")
+        origin_paths.append(origin_path)
+
+    destination_paths = []
+    for index in range(destinations):
+        destination_path = root / "destinations" / f"destination_{index}.git"
+        Repo.init(destination_path, bare=True, initial_branch="main")
+        seed = Repo.clone_from(str(destination_path), str(root / "seed"))
+        (root / "seed" / "README.md").write_text("readme", encoding="utf-8")
+        GitPythonBackend().commit(seed, "Initial commit")
+        seed.remote("origin").push(["main"])
+        seed.close()
+        shutil.rmtree(root / "seed")
+        destination_paths.append(destination_path)
+
+    return origin_paths, destination_paths
+
+
+def write_configs(root: Path, events: int, origin_paths: list[Path], destination_paths: list[Path]) -> list[Path]:
+    """
+    Generate the event configs, all due now. Every event deploys to its own directory of a shared destination.
+
+    :param root: Directory to write the configs in.
+    :param events: Number of events.
+    :param origin_paths: The paths of the origins, assigned round robin.
+    :param destination_paths: The paths of the destinations, assigned round robin.
+    :return: The paths of the configs.
+    """
+    configs_dir = root / "configs"
+    configs_dir.mkdir()
+    date = datetime.now() - timedelta(minutes=1)
+
+    config_paths = []
+    for index in range(events):
+        config = {
+            "name": f"Load test {index}",
+            "description": "Generated by the load test",
+            "origin": str(origin_paths[index % len(origin_paths)]),
+            "destination": str(destination_paths[index % len(destination_paths)]),
+            "date": date.isoformat(),
+            "patterns": [["hw", f"students/{index}"]],
+        }
+        config_path = configs_dir / f"event_{index}.json"
+        config_path.write_text(json.dumps(config), encoding="utf-8")
+        config_paths.append(config_path)
+
+    return config_paths
+
+
+def write_settings(root: Path, git_backend: str, overrides: dict[str, Any]) -> None:
+    """
+    Write the settings of the tested runs, with the work root and the log under the test directory.
+
+    :param root: The test directory, where the runs start.
+    :param git_backend: The git backend to use.
+    :param overrides: Settings replacing the generated ones.
+    """
+    test_settings = {
+        "work_root": str(root / "work"),
+        "git_backend": git_backend,
+        "log": {"path": str(root / "homework_deployer.log"), "max_bytes": 1024 * 1024 * 1024},
+        **overrides,
+    }
+    (root / "settings.json").write_text(json.dumps(test_settings), encoding="utf-8")
+
+
+def get_env(root: Path) -> dict[str, str]:
+    """
+    Get the environment of the tested runs - the fake 'at' is found first, and uses the queue under the test directory.
+
+    :param root: The test directory.
+    :return: The environment variables.
+    """
+    bin_dir = root / "bin"
+    bin_dir.mkdir(exist_ok=True)
+    at_path = bin_dir / "at"
+    at_path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{Path(fake_at.__file__).resolve()}" "$@"\n')
+    at_path.chmod(0o755)
+
+    return {
+        **os.environ,
+        "PATH": f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+        "PYTHONPATH": str(REPO_ROOT),
+        fake_at.QUEUE_ENV: str(root / "queue"),
+    }
+
+
+def register(root: Path, env: dict[str, str]) -> float:
+    """
+    Register all generated configs with a single call.
+
+    :param root: The test directory.
+    :param env: The environment of the tested runs.
+    :return: The duration in seconds.
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "homework_deployer", "register", str(root / "configs")],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    duration = time.perf_counter() - start
+
+    if result.returncode != 0 or "No events were registered" in result.stdout:
+        raise RuntimeError(f"Registration failed:\n{result.stdout}{result.stderr}")
+
+    return duration
+
+
+def fire_jobs(root: Path, env: dict[str, str], concurrency: int) -> tuple[dict[str, bool], list[float]]:
+    """
+    Take all jobs from the queue and run them at the same time, as 'atd' does when they are due.
+
+    :param root: The test directory.
+    :param env: The environment of the tested runs.
+    :param concurrency: Maximum number of jobs running at the same time, 0 for all of them.
+    :return: Whether each event succeeded, by event id, and the durations of the jobs in seconds.
+    """
+    event_ids = {entry[0]: event_id for event_id, entry in load_store(root).items()}
+    jobs = fake_at.take_jobs(Path(env[fake_at.QUEUE_ENV]))
+
+    def run_job(command: str) -> tuple[bool, float]:
+        start = time.perf_counter()
+        result = subprocess.run(command, shell=True, cwd=root, env=env, capture_output=True, check=False)
+        return result.returncode == 0, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency or len(jobs)) as pool:
+        results = dict(zip(jobs, pool.map(run_job, jobs.values())))
+
+    return {event_ids[job_id]: is_succeeded for job_id, (is_succeeded, _) in results.items()}, [
+        duration for _, duration in results.values()
+    ]
+
+
+def run_due(root: Path, env: dict[str, str]) -> tuple[dict[str, bool], list[float]]:
+    """
+    Deploy all due events with a single 'run-due'.
+
+    :param root: The test directory.
+    :param env: The environment of the tested runs.
+    :return: Whether each event succeeded, by event id, and the duration of the run in seconds.
+    """
+    event_ids = set(load_store(root))
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-m", "homework_deployer", "run-due"],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    duration = time.perf_counter() - start
+
+    outcomes = {event_id: outcome == "succeeded" for event_id, outcome in OUTCOME_PATTERN.findall(result.stdout)}
+    return {event_id: outcomes.get(event_id, False) for event_id in event_ids}, [duration]
+
+
+def load_store(root: Path) -> dict[str, list[Any]]:
+    """
+    Read the event store of the tested runs.
+
+    :param root: The test directory.
+    :return: Mapping of event ids to their entries.
+    """
+    with open(root / "db.json", "r", encoding="utf-8") as db_file:
+        return json.load(db_file)
+
+
+def check_consistency(
+    root: Path, env: dict[str, str], registered: dict[str, list[Any]], succeeded: dict[str, bool]
+) -> dict[str, int]:
+    """
+    Compare the event store with the queue, the destinations and the outcomes of the runs.
+
+    :param root: The test directory.
+    :param env: The environment of the tested runs.
+    :param registered: The event store before the runs.
+    :param succeeded: Whether each event succeeded, by event id.
+    :return: Number of inconsistencies of every kind.
+    """
+    try:
+        store = load_store(root)
+    except ValueError:
+        return {"unreadable store": 1}
+
+    queued = fake_at.list_jobs(Path(env[fake_at.QUEUE_ENV]))
+    store_jobs = {entry[0] for entry in store.values()}
+
+    deployed: dict[str, set[str]] = {}
+    for entry in registered.values():
+        config = json.loads(Path(entry[1]).read_text(encoding="utf-8"))
+        if config["destination"] not in deployed:
+            files = Repo(config["destination"]).git.ls_tree("-r", "--name-only", "main").splitlines()
+            deployed[config["destination"]] = {str(Path(path).parent) for path in files}
+
+    missing = 0
+    for event_id, entry in registered.items():
+        config = json.loads(Path(entry[1]).read_text(encoding="utf-8"))
+        if succeeded[event_id] and config["patterns"][0][1] not in deployed[config["destination"]]:
+            missing += 1
+
+    return {
+        "succeeded but still registered": sum(1 for event_id in store if succeeded.get(event_id)),
+        "failed but deregistered": sum(1 for event_id, ok in succeeded.items() if not ok and event_id not in store),
+        "queued jobs without an event": sum(1 for job_id in queued if job_id not in store_jobs),
+        "succeeded but not deployed": missing,
+    }
+
+
+def read_log(root: Path) -> tuple[int, Counter[str]]:
+    """
+    Count the pushes rejected because of concurrent pushes to the same destination, and the reasons of the failed
+    runs, from the log files.
+
+    :param root: The test directory.
+    :return: The number of rejected pushes, and the number of failed runs by their error, without the paths.
+    """
+    rejections = 0
+    failures: Counter[str] = Counter()
+    for log_path in glob.glob(str(root / "homework_deployer.log*")):
+        with open(log_path, "r", encoding="utf-8", errors="replace") as log_file:
+            for line in log_file:
+                if REJECTED_PATTERN.search(line):
+                    rejections += 1
+                elif failure := FAILURE_PATTERN.search(line):
+                    failures[PATH_PATTERN.sub("<destination>", failure.group(1))] += 1
+
+    return rejections, failures
+
+
+def print_report(
+    args: argparse.Namespace,
+    register_time: float,
+    run_time: float,
+    succeeded: dict[str, bool],
+    durations: list[float],
+    log: tuple[int, Counter[str]],
+    inconsistencies: dict[str, int],
+) -> None:
+    """
+    Print the results of the load test.
+    """
+    failed = sum(1 for ok in succeeded.values() if not ok)
+    rejections, failures = log
+    quantiles = statistics.quantiles(durations, n=20) if len(durations) > 1 else durations * 19
+
+    print(f"{'events':<32} {args.events}")
+    print(f"{'scheduler':<32} {args.scheduler}")
+    print(f"{'git backend':<32} {args.git_backend}")
+    print(f"{'register':<32} {register_time:.2f}s ({args.events / register_time:.1f} events/s)")
+    print(f"{'run':<32} {run_time:.2f}s ({args.events / run_time:.1f} events/s)")
+    print(f"{'run duration p50 / p95':<32} {quantiles[9]:.2f}s / {quantiles[18]:.2f}s")
+    print(f"{'failed':<32} {failed} ({100 * failed / args.events:.1f}%)")
+    for reason, count in failures.most_common(5):
+        print(f"{'':<4}{count:>5} {reason[:120]}")
+    print(f"{'rejected pushes':<32} {rejections} ({rejections / args.destinations:.1f} per destination)")
+    for name, count in inconsistencies.items():
+        print(f"{name:<32} {count}")
+
+
+def remove_test_dir(root: Path) -> None:
+    """
+    Remove the test directory, after the detached 'gc' processes started by the finished runs.
+
+    :param root: The test directory.
+    """
+    # The running 'gc' holds the lock until it exits - a process still starting finds nothing to delete
+    gc_lock_path = root / "work" / const.LOCKS_DIR / const.GC_LOCK_FILE
+    if gc_lock_path.exists():
+        with open(gc_lock_path, "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+    for _ in range(RMTREE_ATTEMPTS):
+        shutil.rmtree(root, ignore_errors=True)
+        if not root.exists():
+            return
+        time.sleep(1)
+
+    print(f"Cannot remove the test directory: {root}", file=sys.stderr)
+
+
+def main() -> None:
+    """
+    Run the load test and print the report. Exits with a non-zero code if the event store is inconsistent.
+    """
+    parser = argparse.ArgumentParser(description="Load test of many events firing at the same time")
+    parser.add_argument("--events", type=int, default=500, help="Number of events")
+    parser.add_argument("--origins", type=int, default=20, help="Number of origins, shared by the events")
+    parser.add_argument("--destinations", type=int, default=10, help="Number of destinations, shared by the events")
+    parser.add_argument("--files", type=int, default=5, help="Number of deployed files per event")
+    parser.add_argument("--scheduler", choices=["at", "run-due"], default="at", help="How the due events are run")
+    parser.add_argument("--concurrency", type=int, default=0, help="Jobs fired at once by 'at', 0 for all of them")
+    parser.add_argument("--git-backend", choices=["gitpython", "batch"], default="gitpython")
+    parser.add_argument("--settings", help="JSON file with settings overriding the generated ones")
+    parser.add_argument("--keep", action="store_true", help="Keep the test directory, and print its path")
+    args = parser.parse_args()
+
+    overrides = {}
+    if args.settings:
+        with open(args.settings, "r", encoding="utf-8") as settings_file:
+            overrides = json.load(settings_file)
+
+    temp_dir = tempfile.mkdtemp(prefix="homework_deployer_load_")
+    root = Path(temp_dir)
+    inconsistencies: dict[str, int] = {}
+    try:
+        origin_paths, destination_paths = create_repos(root, args.origins, args.destinations, args.files)
+        write_configs(root, args.events, origin_paths, destination_paths)
+        write_settings(root, args.git_backend, overrides)
+        env = get_env(root)
+
+        register_time = register(root, env)
+        registered = load_store(root)
+
+        start = time.perf_counter()
+        if args.scheduler == "at":
+            succeeded, durations = fire_jobs(root, env, args.concurrency)
+        else:
+            succeeded, durations = run_due(root, env)
+        run_time = time.perf_counter() - start
+
+        inconsistencies = check_consistency(root, env, registered, succeeded)
+        print_report(args, register_time, run_time, succeeded, durations, read_log(root), inconsistencies)
+    finally:
+        if args.keep:
+            print(f"Test directory: {root}")
+        else:
+            remove_test_dir(root)
+
+    if any(count > 0 for count in inconsistencies.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
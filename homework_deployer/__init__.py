@@ -1,11 +1,29 @@
+import glob
 import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from pydantic import ValidationError
+
+import homework_deployer.admission as admission
 import homework_deployer.at as at
 import homework_deployer.constants as const
 import homework_deployer.db as db
+import homework_deployer.plan as plan
+import homework_deployer.reconcile as reconcile
+import homework_deployer.runner as runner
+import homework_deployer.settings as settings
+import homework_deployer.snapshot as snapshot
+import homework_deployer.sync as sync
+import homework_deployer.validate as validate
+import homework_deployer.workdir as workdir
 
 from homework_deployer.cli import get_args
 from homework_deployer.event import Event
-from homework_deployer.executor import execute
+from homework_deployer.executor import execute, execute_group, resume as resume_run
 from homework_deployer.logger import setup_logger
 
 
@@ -18,31 +36,207 @@ def main() -> None:
 
     match args["command"]:
         case const.ActionType.REGISTER:
-            config_path = args["config"]
-            register(config_path)
+            config_paths = args["config"]
+            register(logger, config_paths)
         case const.ActionType.DEREGISTER:
             event_id = args["event_id"]
             deregister(event_id)
         case const.ActionType.LIST:
             list_events()
+        case const.ActionType.RECONCILE:
+            reconcile_events(logger)
+        case const.ActionType.PLAN:
+            plan_event(logger, args["event_id"])
+        case const.ActionType.VALIDATE:
+            validate_configs(logger, args["config"], not args["no_fetch"])
         case const.ActionType.RUN:
             event_id = args["event_id"]
             is_no_push = args["no_push"]
             is_no_remove = args["no_remove"]
-            run(logger, event_id, is_no_push, is_no_remove)
+            is_revalidate = args["revalidate"]
+            is_force = args["force"]
+            run(logger, event_id, is_no_push, is_no_remove, is_revalidate, is_force)
+        case const.ActionType.RUN_DUE:
+            is_no_push = args["no_push"]
+            is_no_remove = args["no_remove"]
+            run_due(logger, is_no_push, is_no_remove)
+        case const.ActionType.RESUME:
+            run_id = args["run_id"]
+            is_no_push = args["no_push"]
+            is_no_remove = args["no_remove"]
+            resume(logger, run_id, is_no_push, is_no_remove)
+        case const.ActionType.SYNC:
+            sync_event(logger, args["event"], args["interval"], args["once"])
+        case const.ActionType.GC:
+            work_root = args["work_root"]
+            workdir.collect_garbage(Path(work_root) if work_root else workdir.get_root())
         case _:
             print("Unknown command")
 
 
-def run(logger: logging.Logger, event_id: str, is_no_push: bool, is_no_remove: bool) -> None:
+def run(
+    logger: logging.Logger, event_id: str, is_no_push: bool, is_no_remove: bool, is_revalidate: bool, is_force: bool
+) -> None:
+    """
+    Run a registered event, after its registered dependencies. The 'at' job of every event runs this.
+    Dependencies which are not due yet are not run early - the event is rescheduled to the date of the latest of them.
+
+    :param event_id: The ID of the event.
+    """
     events = db.load(const.DB_PATH)
-    config_path = events[event_id][1]
-    event = load_event(config_path, event_id)
+    if event_id not in events:
+        print(f"Event {event_id} is not registered")
+        return
+
+    collected = runner.collect_dependencies(
+        event_id, lambda _id: get_registered_event(logger, events, _id, is_revalidate), set(events)
+    )
+
+    # The jobs of the dependencies may fire at the same time - the events deployed by them while waiting
+    # are not registered anymore, and are not deployed again
+    with runner.lock_events(collected):
+        events = db.load(const.DB_PATH)
+        if event_id not in events:
+            logger.info("Event %s: Already deployed by another run", event_id)
+            return
+
+        collected = {_id: event for _id, event in collected.items() if _id in events}
+        due = {_id: event for _id, event in collected.items() if _id == event_id or runner.is_due(event)}
+        batch = runner.exclude_blocked(due, set(events))
+        if event_id not in batch:
+            postpone(logger, events, collected[event_id], [event for _id, event in collected.items() if _id not in due])
+        if len(batch) == 0:
+            return
+
+        logger.info("Manually running event %s", event_id)
+        if len(batch) > 1:
+            dependencies = sorted(batch.keys() - {event_id})
+            logger.info("Running the registered dependencies of event %s first: %s", event_id, dependencies)
+        run_batch(batch, is_no_push, is_no_remove, is_force)
+
+
+def postpone(logger: logging.Logger, events: dict[str, db.Entry], event: Event, blocking: list[Event]) -> None:
+    """
+    Schedule an event again, at the date of the latest of the dependencies it waits for.
+
+    :param events: The loaded DB.
+    :param event: The waiting event.
+    :param blocking: The registered dependencies which are not due yet.
+    """
+    date = max(blocking, key=lambda dependency: dependency.date.timestamp()).date
+    blocking_ids = sorted(dependency.id for dependency in blocking)
+    at_id = at.register(event.model_copy(update={"date": date}))
+    if at_id is None:
+        logger.error("Event %s: Waiting for %s, but cannot be scheduled again", event.id, blocking_ids)
+        print(f"Event {event.id}: Waiting for {blocking_ids}, failed to schedule it again")
+        return
+
+    old_at_id, config_path, event_snapshot = events[event.id]
+    with db.lock(const.DB_PATH):
+        db.apply(const.DB_PATH, {event.id: (at_id, config_path, event_snapshot)}, set())
+    at.deregister(old_at_id)
+
+    logger.info("Event %s: Waiting for %s, scheduled again at %s", event.id, blocking_ids, date)
+    print(f"Event {event.id}: Waiting for {blocking_ids}, scheduled again at {date}")
+
+
+def run_due(logger: logging.Logger, is_no_push: bool, is_no_remove: bool) -> None:
+    """
+    Run all registered events whose date has passed, ordered by their dependencies.
+
+    :param is_no_push: Whether to skip pushing.
+    :param is_no_remove: Whether to keep the local repos.
+    """
+    events = db.load(const.DB_PATH)
+    due = {}
+    for event_id in events:
+        event = get_registered_event(logger, events, event_id, False)
+        if runner.is_due(event):
+            due[event_id] = event
+
+    with runner.lock_events(due):
+        # Events deployed by their own jobs while waiting for the locks are not deployed again
+        events = db.load(const.DB_PATH)
+        due = {event_id: event for event_id, event in due.items() if event_id in events}
+        batch = runner.exclude_blocked(due, set(events))
+        logger.info("Running %d due events", len(batch))
+        run_batch(batch, is_no_push, is_no_remove, False)
+
+
+def run_batch(batch: dict[str, Event], is_no_push: bool, is_no_remove: bool, is_force: bool) -> None:
+    """
+    Run events ordered by their dependencies, and deregister the succeeded ones.
+    Events pushing to different branches of the same destination are deployed together, as one group.
+    Events start only while their estimated disk and memory cost fits the budget, earliest date first.
+    Exits with a non-zero code if any of them did not succeed.
+
+    :param batch: Mapping of event ids to events.
+    """
+    groups = {group[0]: group for group in runner.find_groups(batch)}
+    grouped = {event_id for group in groups.values() for event_id in group[1:]}
+
+    def run_event(event: Event) -> None:
+        if event.id in groups:
+            execute_group([batch[event_id] for event_id in groups[event.id]], is_no_push, is_no_remove, is_force)
+        else:
+            execute(event, is_no_push or event.is_dry_run, is_no_remove or event.is_dry_run, is_force)
+
+    # Every group runs as its first event, which the others share the outcome with
+    graph = {event_id: event for event_id, event in batch.items() if event_id not in grouped}
+    with ThreadPoolExecutor() as pool:
+        costs = dict(zip(batch, pool.map(admission.estimate, batch.values())))
+    for leader_id, group in groups.items():
+        costs[leader_id] = sum((costs[event_id] for event_id in group), admission.Cost(0, 0))
+
+    batch_admission = admission.Admission(graph, costs, admission.get_budget())
+    outcomes = runner.run_graph(graph, run_event, settings.get().max_parallel_runs, batch_admission)
+    waits = dict(batch_admission.waits)
+    for leader_id, group in groups.items():
+        outcomes.update({event_id: outcomes[leader_id] for event_id in group[1:]})
+        waits.update({event_id: waits[leader_id] for event_id in group[1:] if leader_id in waits})
+
+    for event_id, outcome in sorted(outcomes.items()):
+        wait = f" (queued for {waits[event_id]:.1f}s)" if event_id in waits else ""
+        print(f"Event {event_id}: {outcome.value}{wait}")
+        if outcome == const.Outcome.SUCCEEDED:
+            deregister(event_id)
 
-    logger.info("Manually running event %s", event.id)
-    execute(event, is_no_push or event.is_dry_run, is_no_remove or event.is_dry_run)
+    if any(outcome != const.Outcome.SUCCEEDED for outcome in outcomes.values()):
+        sys.exit(1)
 
-    deregister(event_id)
+
+def resume(logger: logging.Logger, run_id: str, is_no_push: bool, is_no_remove: bool) -> None:
+    """
+    Continue a failed run, and deregister its event if it is still registered.
+
+    :param run_id: The ID of the run to continue.
+    """
+    logger.info("Manually resuming run %s", run_id)
+    event = resume_run(run_id, is_no_push, is_no_remove)
+
+    entry = db.load(const.DB_PATH).get(event.id)
+    # The id may have been reused by another event since the run started
+    if entry is not None and entry[2].get("event") == event.model_dump(mode="json"):
+        deregister(event.id)
+
+
+def sync_event(logger: logging.Logger, target: str, interval: Optional[float], is_once: bool) -> None:
+    """
+    Keep the destination of an event in sync with its origin.
+
+    :param target: ID of a registered event, or path to an event configuration file.
+    :param interval: Seconds between polls of the origin, overriding the event and the settings.
+    :param is_once: Whether to poll only once.
+    """
+    events = db.load(const.DB_PATH)
+    if target in events:
+        event = get_registered_event(logger, events, target, False)
+    else:
+        event = load_event(target, Path(target).stem)
+
+    sync_interval = sync.get_interval(event, interval, settings.get().sync_interval)
+    logger.info("Syncing event %s every %.0fs", event.id, sync_interval)
+    sync.sync(event, sync_interval, is_once)
 
 
 def list_events() -> None:
@@ -50,8 +244,62 @@ def list_events() -> None:
     List all registered deployment events.
     """
     events = db.load(const.DB_PATH)
-    for event_id, (at_id, config_path) in events.items():
-        print(f"Event ID: {event_id}, Config Path: {config_path}, At id: {at_id}, Scheduled at: {at.get_time(at_id)}")
+    jobs = at.list_jobs() or {}
+    for event_id, (at_id, config_path, _) in events.items():
+        print(f"Event ID: {event_id}, Config Path: {config_path}, At id: {at_id}, Scheduled at: {jobs.get(at_id, '')}")
+
+
+def plan_event(logger: logging.Logger, event_id: str) -> None:
+    """
+    Print the changes a registered event would make to its destination, without deploying it.
+
+    :param event_id: The ID of the event.
+    """
+    events = db.load(const.DB_PATH)
+    if event_id not in events:
+        print(f"Event {event_id} is not registered")
+        return
+
+    event = get_registered_event(logger, events, event_id, False)
+    event_plan = plan.plan(event)
+
+    destination_commit = event_plan.destination_commit[:7] if event_plan.destination_commit else "(new)"
+    print(f"Event {event_id}: origin at {event_plan.origin_commit[:7]}, destination at {destination_commit}")
+    for change in event_plan.changes:
+        print(f"    {change.status:<10} {change.path} ({change.size} bytes)")
+    print(
+        f"{event_plan.count(plan.ADDED)} added, {event_plan.count(plan.MODIFIED)} modified, "
+        f"{event_plan.count(plan.UNCHANGED)} unchanged, estimated push size: {event_plan.push_size} bytes"
+    )
+
+    estimates = [
+        f"{phase.value} {'unknown' if duration is None else f'{duration:.1f}s'}"
+        for phase, duration in event_plan.durations.items()
+    ]
+    print(f"Estimated phase times: {', '.join(estimates)}")
+
+
+def reconcile_events(logger: logging.Logger) -> None:
+    """
+    Bring the registered events in line with the queue of scheduled 'at' jobs.
+    """
+    # Runs and registrations changing the DB in the meantime would be overwritten
+    with db.lock(const.DB_PATH):
+        events = db.load(const.DB_PATH)
+        report = reconcile.reconcile(const.DB_PATH, lambda _id: get_registered_event(logger, events, _id, False))
+    if report is None:
+        print("Cannot read the 'at' queue, nothing was changed")
+        sys.exit(1)
+
+    logger.info("Reconciled events: %s", report._asdict())
+    print(f"Kept: {len(report.kept)}")
+    print(f"Re-submitted: {len(report.resubmitted)} {report.resubmitted}")
+    print(f"Removed past: {len(report.past)} {report.past}")
+    print(f"Failed, still pending: {len(report.pending)} {report.pending}")
+    print(f"Invalid configs, kept: {len(report.invalid)} {report.invalid}")
+    if report.failed:
+        print(f"Failed to re-submit: {len(report.failed)} {report.failed}")
+        sys.exit(1)
 
 
 def deregister(event_id: str) -> None:
@@ -60,23 +308,166 @@ def deregister(event_id: str) -> None:
     :param event_id: The ID of the event to deregister.
     """
     events = db.load(const.DB_PATH)
+    if event_id not in events:
+        print(f"Event {event_id} is not registered")
+        return
+
     at_id = events[event_id][0]
-    db.remove(const.DB_PATH, event_id)
+    with db.lock(const.DB_PATH):
+        db.remove(const.DB_PATH, event_id)
     at.deregister(at_id)
 
 
-def register(config_path: str) -> None:
+def register(logger: logging.Logger, config_args: list[str]) -> None:
     """
-    Register a deployment event from a configuration file.
-    :param config_path: Path to the event configuration file.
+    Register deployment events from one or more configuration files.
+    The batch is registered as a whole - if any config is invalid or any event fails to be scheduled,
+    none of the events are registered.
+
+    :param config_args: Paths to config files, directories with config files or glob patterns.
+    """
+    config_paths = expand_config_paths(config_args)
+    if len(config_paths) == 0:
+        print("No configuration files found")
+        return
+
+    loaded = []
+    with ThreadPoolExecutor() as pool:
+        futures = [(config_path, pool.submit(load_with_snapshot, config_path)) for config_path in config_paths]
+
+    for config_path, future in futures:
+        try:
+            loaded.append((config_path, *future.result()))
+        except (OSError, ValidationError) as error:
+            logger.error("Invalid config %s: %s", config_path, error)
+            print(f"Invalid config {config_path}: {error}")
+
+    if len(loaded) != len(config_paths):
+        print("No events were registered")
+        return
+
+    # The ids are taken and written as one step, so concurrent registrations do not get the same ones
+    with db.lock(const.DB_PATH):
+        registered = db.load(const.DB_PATH)
+        # Ids of events which are not registered anymore may be taken by new events, so they cannot be depended on
+        unknown = sorted({dependency for _, event, _ in loaded for dependency in event.depends_on} - registered.keys())
+        if len(unknown) > 0:
+            print(f"Dependencies are not registered events: {unknown}, no events were registered")
+            return
+
+        new_ids = db.get_next_free_ids(const.DB_PATH, len(loaded))
+        for new_id, (_, event, _) in zip(new_ids, loaded):
+            event.id = new_id
+
+        with ThreadPoolExecutor() as pool:
+            at_ids = list(pool.map(at.register, [event for _, event, _ in loaded]))
+
+        scheduled = [at_id for at_id in at_ids if at_id is not None]
+        if len(scheduled) != len(at_ids):
+            rollback(logger, scheduled)
+            print("Failed to schedule events, no events were registered")
+            return
+
+        entries: dict[str, db.Entry] = {
+            event.id: (at_id, config_path, event_snapshot)
+            for (config_path, event, event_snapshot), at_id in zip(loaded, scheduled)
+        }
+        try:
+            db.add_many(const.DB_PATH, entries)
+        except Exception:
+            # Without their entries, nothing would know about the jobs
+            rollback(logger, scheduled)
+            print("Failed to store events, no events were registered")
+            raise
+
+    for config_path, event, _ in loaded:
+        print(f"Registered event with id: {event.id} ({config_path})")
+
+
+def rollback(logger: logging.Logger, at_ids: list[int]) -> None:
+    """
+    Remove the jobs scheduled by a registration which did not complete.
+
+    :param at_ids: The IDs of the scheduled jobs.
+    """
+    if not at.deregister_many(at_ids):
+        logger.error("Failed to remove the scheduled jobs %s, remove them by hand", at_ids)
+        print(f"Failed to remove the scheduled jobs {at_ids}, remove them by hand")
+
+
+def validate_configs(logger: logging.Logger, config_args: list[str], is_fetch: bool) -> None:
+    """
+    Validate event configs, and resolve their patterns against the current tips of their origins.
+    Exits with a non-zero code if any config is invalid.
+
+    :param config_args: Paths to config files, directories with config files or glob patterns.
+    :param is_fetch: Whether to fetch the origins, instead of using their existing mirrors.
+    """
+    config_paths = expand_config_paths(config_args)
+    if len(config_paths) == 0:
+        print("No configuration files found")
+        return
+
+    with ThreadPoolExecutor() as pool:
+        futures = [
+            (config_path, pool.submit(load_event, config_path, Path(config_path).stem)) for config_path in config_paths
+        ]
+
+    events = {}
+    is_valid = True
+    for config_path, future in futures:
+        try:
+            events[config_path] = future.result()
+        except (OSError, ValidationError) as error:
+            logger.error("Invalid config %s: %s", config_path, error)
+            print(f"{config_path}: Invalid config: {error}")
+            is_valid = False
+
+    for config_path, report in validate.validate(events, is_fetch).items():
+        is_valid = is_valid and report.is_valid
+        if report.error is not None:
+            print(f"{config_path}: {report.error}")
+            continue
+
+        status = "OK" if report.is_valid else "Invalid"
+        print(f"{config_path}: {status} (origin at {str(report.origin_commit)[:7]})")
+        for pattern in report.patterns:
+            result = pattern.error or f"{pattern.matches} matches, {pattern.files} files, {pattern.size} bytes"
+            print(f"    {pattern.source} -> {pattern.destination}: {result}")
+
+    if not is_valid:
+        sys.exit(1)
+
+
+def expand_config_paths(config_args: list[str]) -> list[str]:
+    """
+    Expand the config arguments to a list of config files.
+    Directories are expanded to the JSON files they contain, and glob patterns to the files matching them.
+
+    :param config_args: Paths to config files, directories with config files or glob patterns.
+    :return: The list of config file paths, without duplicates.
     """
-    new_id = db.get_next_free_id(const.DB_PATH)
-    event = load_event(config_path, new_id)
-    at_id = at.register(event)
+    config_paths: list[str] = []
+    for config_arg in config_args:
+        if os.path.isdir(config_arg):
+            config_paths.extend(sorted(glob.glob(os.path.join(config_arg, "*.json"))))
+        elif glob.has_magic(config_arg):
+            config_paths.extend(sorted(path for path in glob.glob(config_arg, recursive=True) if os.path.isfile(path)))
+        else:
+            config_paths.append(config_arg)
 
-    if at_id is not None:
-        db.add(const.DB_PATH, event, config_path, at_id)
-        print("Registered event with id:", event.id)
+    return list(dict.fromkeys(config_paths))
+
+
+def load_with_snapshot(config_path: str) -> tuple[Event, dict[str, Any]]:
+    """
+    Load and validate an event config, and take a snapshot of it.
+
+    :param config_path: The path to the JSON file
+    :return: The event, without an id, and its snapshot
+    """
+    event = load_event(config_path, "")
+    return event, snapshot.create(event, config_path)
 
 
 def load_event(config_path: str, target_id: str) -> Event:
@@ -91,3 +482,42 @@ def load_event(config_path: str, target_id: str) -> Event:
 
     event.id = target_id
     return event
+
+
+def get_registered_event(
+    logger: logging.Logger, events: dict[str, db.Entry], event_id: str, is_revalidate: bool
+) -> Event:
+    """
+    Get a registered event from the loaded DB.
+
+    :param events: The loaded DB.
+    :param event_id: The ID of the event.
+    :param is_revalidate: Whether to force loading and validating the config file.
+    :return: An event object
+    """
+    _, config_path, event_snapshot = events[event_id]
+    return resolve_event(logger, event_id, config_path, event_snapshot, is_revalidate)
+
+
+def resolve_event(
+    logger: logging.Logger, event_id: str, config_path: str, event_snapshot: dict[str, Any], is_revalidate: bool
+) -> Event:
+    """
+    Get the event to run, preferring the snapshot taken at registration.
+    The config is validated again only if requested, if it changed since registration,
+    or if the event was registered without a snapshot.
+
+    :param event_id: The ID of the event.
+    :param config_path: Path to the event configuration file.
+    :param event_snapshot: The snapshot stored in the DB.
+    :param is_revalidate: Whether to force loading and validating the config file.
+    :return: An event object
+    """
+    if not event_snapshot:
+        return load_event(config_path, event_id)
+
+    if is_revalidate or snapshot.is_stale(event_snapshot, config_path):
+        logger.info("Event %s: Re-validating config %s", event_id, config_path)
+        return load_event(config_path, event_id)
+
+    return snapshot.restore(event_snapshot, event_id)
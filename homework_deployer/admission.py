@@ -0,0 +1,180 @@
+"""
+Admission control of batch runs - events are admitted into the worker pool only while the estimated disk and memory
+cost of the running deployments fits the budget from the settings.
+
+The disk cost of a deployment is estimated from the sizes of its repositories (measured directly for local ones,
+otherwise taken from their previous clones or their mirrors) and the bytes matched by its patterns. Ready events
+are admitted in the order of their dates, so an event with an earlier deadline is never overtaken by a later one.
+"""
+
+import logging
+import os
+import shutil
+import time
+from typing import NamedTuple
+
+from git import Repo
+from git.exc import GitCommandError
+from gitdb.exc import BadName
+
+import homework_deployer.mirror as mirror
+import homework_deployer.settings as settings
+import homework_deployer.tree as tree
+import homework_deployer.workdir as workdir
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+
+class Cost(NamedTuple):
+    """
+    Resources used by a running deployment, or available to all of them.
+    """
+
+    disk: int  # Bytes in the work root
+    memory: int  # Bytes
+
+    def __add__(self, other: object) -> "Cost":
+        assert isinstance(other, Cost)
+        return Cost(self.disk + other.disk, self.memory + other.memory)
+
+    def __sub__(self, other: "Cost") -> "Cost":
+        return Cost(self.disk - other.disk, self.memory - other.memory)
+
+    def fits(self, budget: "Cost") -> bool:
+        """
+        Check if the cost is within a budget.
+
+        :param budget: The budget.
+        :return: True if neither of the resources exceeds the budget.
+        """
+        return self.disk <= budget.disk and self.memory <= budget.memory
+
+
+class Admission:
+    """
+    Admits ready events while the total cost of the running ones fits the budget, earliest date first.
+    An event which does not fit even into an empty pool runs alone.
+    """
+
+    def __init__(self, events: dict[str, Event], costs: dict[str, Cost], budget: Cost) -> None:
+        self._events = events
+        self._costs = costs
+        self._budget = budget
+        self._used = Cost(0, 0)
+        self._running: set[str] = set()
+        self._ready_since: dict[str, float] = {}
+        self.waits: dict[str, float] = {}  # Seconds between becoming ready and being admitted, per event id
+
+    def admit(self, ready: list[str], slots: int) -> list[str]:
+        """
+        Choose the ready events which can start now, and count their cost as used.
+
+        :param ready: The ids of the events whose dependencies are satisfied.
+        :param slots: Maximum number of events to admit.
+        :return: The ids of the admitted events.
+        """
+        now = time.monotonic()
+        for event_id in ready:
+            self._ready_since.setdefault(event_id, now)
+
+        admitted: list[str] = []
+        for event_id in sorted(ready, key=lambda _id: (self._events[_id].date.timestamp(), _id)):
+            cost = self._costs[event_id]
+            if len(admitted) == slots:
+                break
+            if len(self._running) > 0 and not (self._used + cost).fits(self._budget):
+                # Later events wait as well, so the earliest one is admitted as soon as there is room for it
+                break
+
+            self._used = self._used + cost
+            self._running.add(event_id)
+            self.waits[event_id] = now - self._ready_since[event_id]
+            logger.info("Event %s: Admitted after waiting %.1fs", event_id, self.waits[event_id])
+            admitted.append(event_id)
+
+        return admitted
+
+    def release(self, event_id: str) -> None:
+        """
+        Free the cost of a finished event.
+
+        :param event_id: The id of the event.
+        """
+        self._running.discard(event_id)
+        self._used = self._used - self._costs[event_id]
+
+
+def estimate(event: Event) -> Cost:
+    """
+    Estimate the disk and memory cost of deploying an event.
+
+    :param event: The event.
+    :return: The estimated cost.
+    """
+    disk_space = settings.get().disk_space
+    matched = get_matched_size(event)
+    origin = get_repo_size(event.origin) if event.origin_fetch == "clone" else 0
+
+    disk = int(disk_space.margin * (origin + get_repo_size(event.destination) + matched))
+    return Cost(disk, settings.get().admission.memory_per_run + matched)
+
+
+def get_repo_size(url: str) -> int:
+    """
+    Estimate the size of a clone of a repository - measured directly for local repositories, otherwise
+    from its last clone, or its mirror if it was never cloned.
+
+    :param url: The URL of the repository.
+    :return: The estimated size in bytes.
+    """
+    if os.path.isdir(url) or url in workdir.load_sizes():
+        return workdir.estimate_size(url)
+
+    mirror_path = mirror.get_path(url)
+    if mirror_path.exists():
+        return workdir.get_size(mirror_path)
+
+    return settings.get().disk_space.default_repo_size
+
+
+def get_matched_size(event: Event) -> int:
+    """
+    Get the bytes of the files an event copies, from the existing mirror of its origin. Nothing is fetched.
+
+    :param event: The event.
+    :return: The size in bytes, 0 if the origin has no mirror.
+    """
+    mirror_path = mirror.get_path(event.origin)
+    if not mirror_path.exists():
+        return 0
+
+    try:
+        repo = Repo(mirror_path)
+        entries = tree.list_tree(repo, repo.commit(mirror.get_ref(event.origin_ref)).hexsha)
+    except (BadName, GitCommandError, ValueError) as error:
+        logger.warning("Event %s: Cannot read the mirror of the origin: %s", event.id, error)
+        return 0
+
+    return sum(entries[source].size for source in tree.map_paths(event.patterns, entries).values())
+
+
+def get_budget() -> Cost:
+    """
+    Get the budget of the deployments running at the same time, from the settings.
+    Unset budgets default to the free space of the work root and the available memory.
+
+    :return: The budget.
+    """
+    admission_settings = settings.get().admission
+    disk = admission_settings.disk_budget
+    if disk == 0:
+        work_root = workdir.get_root()
+        work_root.mkdir(parents=True, exist_ok=True)
+        disk = shutil.disk_usage(work_root).free
+
+    memory = admission_settings.memory_budget
+    if memory == 0:
+        memory = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+
+    return Cost(disk, memory)
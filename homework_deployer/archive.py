@@ -0,0 +1,150 @@
+"""
+Archive-based fetching of origins - only the files matched by the patterns are requested with 'git archive',
+and the tar stream is extracted directly into the destination, without a clone of the origin.
+
+The archive is created either from the local mirror of the origin, or by the origin server itself
+('git archive --remote'), for origins which cannot be mirrored.
+"""
+
+import logging
+import os
+import shutil
+import stat
+import subprocess
+import tarfile
+from contextlib import nullcontext
+from pathlib import Path
+from typing import IO, Optional
+
+from git import Repo
+
+import homework_deployer.limiter as limiter
+import homework_deployer.transform as transform
+import homework_deployer.tree as tree
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+
+def extract(event: Event, destination_dir: Path, repo: Optional[Repo], rev: str) -> list[Path]:
+    """
+    Extract the files matched by the patterns of an event into the destination.
+
+    :param event: The event.
+    :param destination_dir: The working tree of the destination.
+    :param repo: The mirror of the origin, or None to request the archive from the origin server.
+    :param rev: The revision to archive.
+    :return: The written destination paths.
+    :raises ArchiveError: If the archive cannot be created.
+    """
+    command = build_command(event, repo, rev)
+    if command is None:
+        logger.warning("Event %s: The patterns match nothing in %s", event.id, rev)
+        return []
+
+    with limiter.limit(event.origin) if repo is None else nullcontext():
+        # The errors are small and read after the whole archive, so they cannot block the stream
+        with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            assert process.stdout is not None and process.stderr is not None
+            written = extract_stream(event, process.stdout, destination_dir)
+            errors = process.stderr.read().decode("utf-8", "replace")
+
+    if process.returncode != 0:
+        raise ArchiveError(f"Cannot archive {event.origin} at {rev}: {errors.strip()}")
+
+    logger.info("Event %s: Extracted %d files from an archive of %s", event.id, len(written), rev)
+    return written
+
+
+def build_command(event: Event, repo: Optional[Repo], rev: str) -> Optional[list[str]]:
+    """
+    Build the 'git archive' command for the paths matched by the patterns of an event.
+    With a mirror, the patterns are resolved against its tree, so only the matched paths are requested, literally.
+    Otherwise, they are passed to the server as glob pathspecs.
+
+    :param event: The event.
+    :param repo: The mirror of the origin, or None to request the archive from the origin server.
+    :param rev: The revision to archive.
+    :return: The command, or None if the patterns match nothing.
+    """
+    if repo is None:
+        pathspecs = [f":(glob){source_pattern}" for source_pattern, _ in event.patterns]
+        return ["git", "archive", "--format=tar", f"--remote={event.origin}", rev, "--", *pathspecs]
+
+    resolved = tree.resolve(event.patterns, tree.list_tree(repo, rev))
+    matched = sorted({path for paths in resolved.values() for path in paths})
+    if len(matched) == 0:
+        return None
+    # Matched paths may contain '*', '?' or '[', which must not match other paths
+    git_dir = str(repo.git_dir)
+    return ["git", "--literal-pathspecs", "--git-dir", git_dir, "archive", "--format=tar", rev, "--", *matched]
+
+
+def extract_stream(event: Event, stream: IO[bytes], destination_dir: Path) -> list[Path]:
+    """
+    Extract the files of a tar stream to their destination paths, in a single pass.
+
+    :param event: The event, whose patterns and transforms are applied.
+    :param stream: The tar stream.
+    :param destination_dir: The working tree of the destination.
+    :return: The written destination paths.
+    """
+    written = []
+    with tarfile.open(fileobj=stream, mode="r|") as archive:
+        for member in archive:
+            if not (member.isfile() or member.issym()):
+                continue
+
+            destinations = tree.get_destinations(event.patterns, member.name)
+            paths = [destination_dir / destination for destination in destinations]
+            if len(paths) == 0:
+                continue
+            for path in paths:
+                if not Path(os.path.normpath(path)).is_relative_to(destination_dir):
+                    raise ArchiveError(f"Archive member {member.name} is outside of the destination")
+
+            # A stream cannot be read twice, so further destinations are copies of the first one
+            write_member(archive, member, paths[0], transform.get_pipeline(event.transforms, member.name))
+            for path in paths[1:]:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(paths[0], path, follow_symlinks=False)
+            written.extend(paths)
+
+    return written
+
+
+def write_member(
+    archive: tarfile.TarFile, member: tarfile.TarInfo, path: Path, pipeline: Optional[transform.Pipeline]
+) -> None:
+    """
+    Write a single archive member, keeping its type and executable bit.
+
+    :param archive: The archive being read.
+    :param member: The member to write.
+    :param path: The destination path.
+    :param pipeline: The transforms to apply to the content, if any.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.is_symlink() or path.is_file():
+        path.unlink()
+
+    if member.issym():
+        os.symlink(member.linkname, path)
+        return
+
+    source = archive.extractfile(member)
+    assert source is not None
+    with source, open(path, "wb") as destination:
+        if pipeline is None:
+            shutil.copyfileobj(source, destination)
+        else:
+            destination.write(transform.transform_bytes(source.read(), pipeline))
+
+    if member.mode & stat.S_IXUSR:
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+class ArchiveError(Exception):
+    """
+    Custom exception for archives which cannot be created.
+    """
@@ -0,0 +1,431 @@
+"""
+Asyncio API for executing deployment events, for embedding the deployer in a long-running service.
+
+Git runs in asyncio subprocesses, so many events are deployed concurrently in one event loop, without a thread
+per deployment - only the copying of files is handed to the default executor of the loop, and it runs to the end
+even if the deployment is cancelled. Every call takes
+an explicit work root and logger, instead of the global ones of the command line tool.
+
+Cancelling a deployment, or exceeding the time limit of one of its phases, kills its running git process.
+The runs are not checkpointed and not fingerprinted - a failed or cancelled deployment is started again as a whole.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+import random
+import shutil
+import signal
+import weakref
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from git import Repo
+
+import homework_deployer.backend as backend
+import homework_deployer.constants as const
+import homework_deployer.limiter as limiter
+import homework_deployer.settings as settings
+from homework_deployer.event import Event
+from homework_deployer.executor import PushError, copy_files, expand_patterns, is_transient_rejection
+from homework_deployer.hooks import OUTPUT_TAIL, HookError
+from homework_deployer.logger import log_context
+
+T = TypeVar("T")
+
+# Concurrent git network operations per host, per event loop
+_host_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def execute_async(
+    event: Event,
+    work_root: Path,
+    logger: logging.Logger,
+    is_no_push: bool = False,
+    is_no_remove: bool = False,
+    timeouts: Optional[dict[const.Phase, float]] = None,
+) -> None:
+    """
+    Execute a deployment event - clone both repositories, copy the matched files, commit and push them.
+
+    :param event: The Event object containing deployment details.
+    :param work_root: The directory the run directory is created in.
+    :param logger: The logger of the deployment.
+    :param is_no_push: Whether to skip pushing.
+    :param is_no_remove: Whether to keep the run directory.
+    :param timeouts: Seconds per phase, phases without one are not limited.
+    :raises PhaseTimeoutError: If a phase exceeds its time limit.
+    """
+    if event.origin_fetch != "clone":
+        raise ValueError(f"Event {event.id}: Origin fetch '{event.origin_fetch}' is not supported by the async API")
+
+    run_id = f"run_{event.id}{datetime.datetime.now().strftime('%y%m%d%H%M%S%f')}"
+    run_dir = work_root / run_id
+    run_dir.mkdir(parents=True)
+    source_repo_dir = run_dir / const.SOURCE_REPO_DIR
+    destination_repo_dir = run_dir / const.DESTINATION_REPO_DIR
+
+    def timed(phase: const.Phase, operation: Awaitable[T]) -> Awaitable[T]:
+        return run_phase(event, phase, operation, (timeouts or {}).get(phase))
+
+    with log_context(event.id, run_id):
+        try:
+            await timed(
+                const.Phase.CLONED,
+                gather_or_cancel(
+                    clone_async(event.origin, source_repo_dir, event.origin_ref),
+                    clone_destination_async(event, destination_repo_dir),
+                ),
+            )
+
+            async def copy() -> list[Path]:
+                def expand_and_copy() -> list[Path]:
+                    paths = expand_patterns(str(source_repo_dir), str(destination_repo_dir), event.patterns)
+                    copy_files(paths, event.transforms, source_repo_dir)
+                    return [destination for _, destination in paths]
+
+                return await asyncio.to_thread(expand_and_copy)
+
+            logger.info("Event %s: Copying the matched files", event.id)
+            destination_paths = await timed(const.Phase.COPIED, copy())
+
+            commit_message = f"Automated commit for event {event.id}"
+            await timed(const.Phase.COMMITTED, commit_async(destination_repo_dir, commit_message, destination_paths))
+            await run_hooks_async(event, destination_repo_dir, logger)
+
+            async def replay(repo_dir: Path) -> None:
+                await commit_async(repo_dir, commit_message, await copy())
+
+            async def verify(repo_dir: Path) -> None:
+                await run_hooks_async(event, repo_dir, logger)
+
+            if not is_no_push:
+                await timed(const.Phase.PUSHED, push_async(destination_repo_dir, logger, replay, verify))
+            logger.info("Event %s: Deployed", event.id)
+        except BaseException:
+            logger.error("Event %s: Async run %s failed", event.id, run_id)
+            raise
+        finally:
+            if not is_no_remove:
+                await asyncio.to_thread(shutil.rmtree, run_dir, True)
+
+
+async def execute_many_async(
+    events: list[Event],
+    work_root: Path,
+    logger: logging.Logger,
+    is_no_push: bool = False,
+    timeouts: Optional[dict[const.Phase, float]] = None,
+) -> dict[str, Optional[BaseException]]:
+    """
+    Execute deployment events concurrently. The failure of an event does not stop the others.
+
+    :param events: The events.
+    :param work_root: The directory the run directories are created in.
+    :param logger: The logger of the deployments.
+    :param is_no_push: Whether to skip pushing.
+    :param timeouts: Seconds per phase, phases without one are not limited.
+    :return: Mapping of event ids to their errors, None for the succeeded ones.
+    """
+    results = await asyncio.gather(
+        *[execute_async(event, work_root, logger, is_no_push, event.is_dry_run, timeouts) for event in events],
+        return_exceptions=True,
+    )
+    for event, result in zip(events, results):
+        if isinstance(result, asyncio.CancelledError):
+            raise result
+        if isinstance(result, BaseException):
+            logger.error("Event %s: Failed: %s", event.id, result, exc_info=result)
+
+    return {event.id: result if isinstance(result, BaseException) else None for event, result in zip(events, results)}
+
+
+async def gather_or_cancel(*operations: Awaitable[T]) -> list[T]:
+    """
+    Run operations concurrently. If one of them fails, the others are cancelled.
+
+    :param operations: The operations.
+    :return: Their results, in the same order.
+    """
+    tasks = [asyncio.ensure_future(operation) for operation in operations]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def run_phase(event: Event, phase: const.Phase, operation: Awaitable[T], timeout: Optional[float]) -> T:
+    """
+    Run a phase of a deployment, with a time limit.
+
+    :param event: The event.
+    :param phase: The phase.
+    :param operation: The work of the phase.
+    :param timeout: Seconds for the phase, None for no limit.
+    :return: The result of the phase.
+    :raises PhaseTimeoutError: If the phase exceeds its time limit.
+    """
+    try:
+        async with asyncio.timeout(timeout):
+            return await operation
+    except TimeoutError as error:
+        raise PhaseTimeoutError(f"Event {event.id}: Phase {phase.value} did not finish in {timeout:g}s") from error
+
+
+async def clone_async(url: str, destination: Path, branch: Optional[str] = None) -> None:
+    """
+    Clone a git repository to a specified destination.
+
+    :param url: The URL of the git repository to clone.
+    :param destination: The local path where the repository should be cloned.
+    :param branch: The branch to check out, the default branch if not set.
+    """
+    branch_args = [] if branch is None else ["--branch", branch]
+    async with limit_host(url):
+        await run_git("clone", *branch_args, "--", url, str(destination))
+
+
+async def clone_destination_async(event: Event, destination: Path) -> None:
+    """
+    Clone the destination of an event, and switch to its branch.
+    A branch which does not exist in the remote yet is created from the default branch.
+
+    :param event: The event.
+    :param destination: The local path where the repository should be cloned.
+    """
+    await clone_async(event.destination, destination)
+    if event.destination_ref is None:
+        return
+
+    _, remote_branches = await run_git("branch", "--remotes", "--format=%(refname:lstrip=3)", cwd=destination)
+    if event.destination_ref in remote_branches.split():
+        await run_git("checkout", "-B", event.destination_ref, f"origin/{event.destination_ref}", cwd=destination)
+    else:
+        await run_git("checkout", "-b", event.destination_ref, cwd=destination)
+
+
+async def commit_async(repo_dir: Path, message: str, paths: Optional[list[Path]] = None) -> bool:
+    """
+    Commit the changes of the working tree, if there are any.
+
+    :param repo_dir: The working tree of the repository.
+    :param message: The commit message to use.
+    :param paths: The changed files or directories, or None to look for changes in the whole working tree.
+    :return: True if a commit was created, False otherwise.
+    """
+    if paths is None:
+        await run_git("add", "-A", cwd=repo_dir)
+    elif len(paths) > 0:
+        pathspecs = b"\0".join(os.fsencode(path) for path in paths)
+        await run_git("add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul", cwd=repo_dir, stdin=pathspecs)
+
+    returncode, _ = await run_git("diff", "--cached", "--quiet", cwd=repo_dir, is_check=False)
+    if returncode == 0:
+        return False
+
+    env = backend.get_identity_env(Repo(repo_dir))
+    await run_git("commit", "--quiet", "-m", message, cwd=repo_dir, env=env)
+    return True
+
+
+async def push_async(
+    repo_dir: Path,
+    logger: logging.Logger,
+    replay: Optional[Callable[[Path], Awaitable[None]]] = None,
+    verify: Optional[Callable[[Path], Awaitable[None]]] = None,
+) -> None:
+    """
+    Push the current branch to the remote repository.
+    If the push is rejected because the remote branch moved, or the remote could not update the branch pushed to
+    concurrently, the local commits are rebased onto the new remote tip and the push is retried with a jittered
+    exponential backoff.
+
+    :param repo_dir: The working tree of the repository.
+    :param logger: The logger of the deployment.
+    :param replay: Recreates the local changes on top of the remote tip, used if the rebase fails.
+    :param verify: Checks the rebased working tree before it is pushed again.
+    :raises PushError: If the push fails, or is still rejected after the last attempt.
+    """
+    _, branch = await run_git("rev-parse", "--abbrev-ref", "HEAD", cwd=repo_dir)
+    branch = branch.strip()
+    _, url = await run_git("remote", "get-url", "origin", cwd=repo_dir)
+    url = url.strip()
+    retry = settings.get().push_retry
+
+    for attempt in range(1, retry.max_attempts + 1):
+        async with limit_host(url):
+            refspec = f"refs/heads/{branch}:refs/heads/{branch}"
+            returncode, output = await run_git("push", "--porcelain", "origin", refspec, cwd=repo_dir, is_check=False)
+
+        if returncode == 0:
+            return
+        if "[rejected]" not in output and not is_transient_rejection(output):
+            raise PushError(f"Push to {url} failed: {output.strip()}")
+        if attempt == retry.max_attempts:
+            break
+
+        delay = min(retry.max_delay, retry.base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1)
+        logger.warning("Push to %s rejected, retrying in %.1fs (attempt %d)", url, delay, attempt)
+        await asyncio.sleep(delay)
+
+        async with limit_host(url):
+            await run_git("fetch", "origin", cwd=repo_dir)
+        await rebase_async(repo_dir, branch, logger, replay)
+        if verify is not None:
+            await verify(repo_dir)
+
+    raise PushError(f"Push to {url} rejected after {retry.max_attempts} attempts")
+
+
+async def rebase_async(
+    repo_dir: Path, branch: str, logger: logging.Logger, replay: Optional[Callable[[Path], Awaitable[None]]]
+) -> None:
+    """
+    Move the local commits of a branch on top of its remote counterpart.
+    If they cannot be rebased cleanly, the branch is reset to the remote one and the changes are replayed.
+
+    :param repo_dir: The working tree of the repository.
+    :param branch: The checked out branch.
+    :param logger: The logger of the deployment.
+    :param replay: Recreates the local changes on top of the remote tip.
+    """
+    remote_branch = f"origin/{branch}"
+    env = backend.get_identity_env(Repo(repo_dir))
+    returncode, _ = await run_git("rebase", remote_branch, cwd=repo_dir, env=env, is_check=False)
+    if returncode == 0:
+        return
+
+    await run_git("rebase", "--abort", cwd=repo_dir)
+    if replay is None:
+        raise PushError(f"Cannot rebase onto {remote_branch}")
+
+    logger.info("Rebase onto %s failed, replaying the changes", remote_branch)
+    await run_git("reset", "--hard", remote_branch, cwd=repo_dir)
+    await replay(repo_dir)
+
+
+async def run_hooks_async(event: Event, repo_dir: Path, logger: logging.Logger) -> None:
+    """
+    Run the pre-push hooks of an event in the committed working tree, within their time limit.
+    Unlike the hooks of the command line tool, their results are not cached.
+
+    :param event: The event.
+    :param repo_dir: The working tree of the destination.
+    :param logger: The logger of the deployment.
+    :raises HookError: If a hook fails or the time limit is exceeded.
+    """
+    if len(event.hooks) == 0:
+        return
+
+    timeout = event.hook_timeout or settings.get().hooks.timeout
+    try:
+        async with asyncio.timeout(timeout):
+            for command in event.hooks:
+                logger.info("Event %s: Running hook: %s", event.id, command)
+                await run_hook_async(command, repo_dir)
+    except TimeoutError as error:
+        raise HookError(f"Event {event.id}: Hooks did not finish in {timeout:g}s") from error
+
+    await run_git("reset", "--hard", cwd=repo_dir)
+    await run_git("clean", "-fdx", cwd=repo_dir)
+
+
+async def run_hook_async(command: str, repo_dir: Path) -> None:
+    """
+    Run a single hook command in a shell. If it is cancelled, its whole process group is killed.
+
+    :param command: The shell command.
+    :param repo_dir: The directory the command runs in.
+    :raises HookError: If the command fails.
+    """
+    process = await asyncio.create_subprocess_shell(
+        command, cwd=repo_dir, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, start_new_session=True
+    )
+    try:
+        output, _ = await process.communicate()
+    except asyncio.CancelledError:
+        os.killpg(process.pid, signal.SIGKILL)
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        tail = output.decode("utf-8", "replace")[-OUTPUT_TAIL:].strip()
+        raise HookError(f"Hook '{command}' failed with exit code {process.returncode}:\n{tail}")
+
+
+async def run_git(
+    *args: str,
+    cwd: Optional[Path] = None,
+    stdin: Optional[bytes] = None,
+    env: Optional[dict[str, str]] = None,
+    is_check: bool = True,
+) -> tuple[int, str]:
+    """
+    Run a git command in an asyncio subprocess. If the calling task is cancelled, the process is killed.
+
+    :param args: The arguments of the git command.
+    :param cwd: The directory the command runs in.
+    :param stdin: The input of the command, if any.
+    :param env: Environment variables added to the ones of the process.
+    :param is_check: Whether to raise an error if the command fails.
+    :return: The exit code, and the standard output and error of the command.
+    :raises GitError: If the command fails and is_check is set.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "git",
+        *args,
+        cwd=cwd,
+        stdin=asyncio.subprocess.DEVNULL if stdin is None else asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        env=None if env is None else {**os.environ, **env},
+    )
+    try:
+        output, _ = await process.communicate(stdin)
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    decoded = output.decode("utf-8", "replace")
+    if is_check and process.returncode != 0:
+        raise GitError(f"git {args[0]} failed with exit code {process.returncode}: {decoded.strip()}")
+
+    assert process.returncode is not None
+    return process.returncode, decoded
+
+
+@asynccontextmanager
+async def limit_host(url: str) -> AsyncIterator[None]:
+    """
+    Limit the concurrent git network operations against the host of a URL, within the running event loop,
+    to the max_concurrent of the host from the settings.
+
+    :param url: The URL of the remote repository.
+    """
+    host = limiter.get_host(url)
+    semaphores = _host_semaphores.setdefault(asyncio.get_running_loop(), {})
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(max(settings.get().get_host_limit(host).max_concurrent, 1))
+
+    async with semaphores[host]:
+        yield
+
+
+class GitError(Exception):
+    """
+    Custom exception for git commands which failed.
+    """
+
+
+class PhaseTimeoutError(Exception):
+    """
+    Custom exception for phases of a deployment which exceeded their time limit.
+    """
@@ -71,27 +71,53 @@ def deregister(at_id: int) -> bool:
     return output.returncode == 0
 
 
-def get_time(at_id: int) -> str:
+def deregister_many(at_ids: list[int]) -> bool:
     """
-    Get the scheduled execution time of a given event
+    Deregister multiple scheduled jobs with a single call of the 'at' command-line utility.
 
-    :param at_id: _description_
-    :return: _description_
+    :param at_ids: The IDs of the scheduled jobs to remove.
+    :return: True if all of them were removed, False otherwise.
+    """
+    if len(at_ids) == 0:
+        return True
+
+    at_command = [const.AT_BINARY, "-r", *[str(at_id) for at_id in at_ids]]
+
+    output = run(at_command, check=False, text=True, capture_output=True)
+
+    return output.returncode == 0
+
+
+def list_jobs() -> Optional[dict[int, str]]:
+    """
+    Take a snapshot of the queue of scheduled jobs, including the running ones.
+
+    :return: Mapping of the IDs of the scheduled jobs to their execution times, or None if the queue cannot be read.
     """
     at_command = [const.AT_BINARY, "-l"]
 
     process_result = run(at_command, check=False, text=True, capture_output=True)
+    if process_result.returncode != 0:
+        logger.error("Failed to list the 'at' queue: %s", process_result.stderr.strip())
+        return None
 
-    output = process_result.stdout.split("\n")
-
-    for line in output:
+    jobs = {}
+    for line in process_result.stdout.splitlines():
         components = line.split()
-        if line == "":
-            continue
-        if str(at_id) == components[0]:
-            return " ".join(components[1:6])
+        if len(components) > 0 and components[0].isdigit():
+            jobs[int(components[0])] = " ".join(components[1:6])
+
+    return jobs
+
 
-    return ""
+def get_time(at_id: int) -> str:
+    """
+    Get the scheduled execution time of a given event
+
+    :param at_id: The ID of the scheduled job.
+    :return: The execution time, or an empty string if the job is not scheduled.
+    """
+    return (list_jobs() or {}).get(at_id, "")
 
 
 def build_command(event: Event) -> str:
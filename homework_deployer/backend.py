@@ -0,0 +1,258 @@
+"""
+Git backends, used by the executor to clone, commit, push and read objects.
+
+The GitPython backend starts a new git process for most operations, and scans the whole working tree on commit.
+The batch backend reads objects through a long-lived 'git cat-file --batch' process per repository, and commits
+by streaming only the changed paths to 'git update-index --stdin' and writing the staged tree directly.
+"""
+
+import atexit
+import os
+import subprocess
+import threading
+from abc import ABC, abstractmethod
+from functools import cache
+from pathlib import Path
+from typing import IO, Optional
+
+from git import Actor, PushInfo, Repo
+
+import homework_deployer.settings as settings
+
+
+class GitBackend(ABC):
+    """
+    Interface of the git operations used by the executor.
+    """
+
+    def clone(self, url: str, destination: Path, branch: Optional[str] = None) -> Repo:
+        """
+        Clone a git repository to a specified destination.
+
+        :param url: The URL of the git repository to clone.
+        :param destination: The local path where the repository should be cloned.
+        :param branch: The branch to check out, the default branch if not set.
+        :return: The cloned Repo object.
+        """
+        if branch is None:
+            return Repo.clone_from(url, str(destination))
+        return Repo.clone_from(url, str(destination), branch=branch)
+
+    @abstractmethod
+    def commit(self, repo: Repo, message: str, paths: Optional[list[Path]] = None) -> bool:
+        """
+        Commit the changes of the working tree, if there are any.
+
+        :param repo: The Repo object representing the git repository.
+        :param message: The commit message to use.
+        :param paths: The changed files or directories, or None to look for changes in the whole working tree.
+        :return: True if a commit was created, False otherwise.
+        """
+
+    def push(self, repo: Repo, refspecs: Optional[list[str]] = None, is_atomic: bool = False) -> list[PushInfo]:
+        """
+        Push to the origin remote.
+
+        :param repo: The Repo object representing the git repository.
+        :param refspecs: The refs to push, the current branch if not set.
+        :param is_atomic: Whether all refs have to be updated, or none of them.
+        :return: The result of the push, per ref.
+        """
+        origin = repo.remote(name="origin")
+        if is_atomic:
+            return list(origin.push(refspecs, atomic=True))
+        return list(origin.push(refspecs))
+
+    @abstractmethod
+    def read_blob(self, repo: Repo, rev: str, path: str) -> bytes:
+        """
+        Read the content of a file in a commit.
+
+        :param repo: The Repo object representing the git repository.
+        :param rev: The commit, or any revision pointing to it.
+        :param path: The path of the file in the commit.
+        :return: The content of the file.
+        """
+
+    def close(self, repo: Repo) -> None:
+        """
+        Release the resources held for a repository.
+
+        :param repo: The Repo object representing the git repository.
+        """
+
+
+class GitPythonBackend(GitBackend):
+    """
+    Backend using the GitPython API.
+    """
+
+    def commit(self, repo: Repo, message: str, paths: Optional[list[Path]] = None) -> bool:
+        repo.git.add(A=True)
+        if repo.is_dirty():
+            repo.index.commit(message)
+            return True
+        return False
+
+    def read_blob(self, repo: Repo, rev: str, path: str) -> bytes:
+        return (repo.commit(rev).tree / path).data_stream.read()
+
+
+class BatchBackend(GitBackend):
+    """
+    Backend keeping a long-lived 'git cat-file --batch' process per repository for reading objects,
+    and staging only the given paths through 'git update-index --stdin'.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._readers: dict[str, CatFileProcess] = {}
+        atexit.register(self.close_all)
+
+    def commit(self, repo: Repo, message: str, paths: Optional[list[Path]] = None) -> bool:
+        if paths is None:
+            repo.git.add(A=True)
+        else:
+            update_index(repo, paths)
+
+        tree = repo.git.write_tree()
+        head_tree = repo.git.rev_parse("HEAD^{tree}") if repo.head.is_valid() else None
+        if tree == head_tree:
+            return False
+
+        parents = ["-p", "HEAD"] if head_tree is not None else []
+        commit = repo.git.commit_tree(tree, *parents, "-m", message, env=get_identity_env(repo))
+        repo.git.update_ref("HEAD", commit)
+        return True
+
+    def read_blob(self, repo: Repo, rev: str, path: str) -> bytes:
+        with self._lock:
+            reader = self._readers.get(str(repo.git_dir))
+            if reader is None:
+                reader = self._readers[str(repo.git_dir)] = CatFileProcess(str(repo.git_dir))
+        return reader.read(f"{rev}:{path}")
+
+    def close(self, repo: Repo) -> None:
+        with self._lock:
+            reader = self._readers.pop(str(repo.git_dir), None)
+        if reader is not None:
+            reader.close()
+
+    def close_all(self) -> None:
+        """
+        Stop the processes of all repositories.
+        """
+        with self._lock:
+            readers = list(self._readers.values())
+            self._readers.clear()
+
+        for reader in readers:
+            reader.close()
+
+
+class CatFileProcess:
+    """
+    A long-lived 'git cat-file --batch' process, answering object requests one at a time.
+    """
+
+    def __init__(self, git_dir: str) -> None:
+        self._lock = threading.Lock()
+        self._process = subprocess.Popen(  # pylint: disable=R1732
+            ["git", "--git-dir", git_dir, "cat-file", "--batch"], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+
+    def read(self, spec: str) -> bytes:
+        """
+        Read the content of an object.
+
+        :param spec: The object name, e.g. '<commit>:<path>'.
+        :return: The content of the object.
+        :raises KeyError: If the object does not exist.
+        """
+        stdin: IO[bytes] = self._process.stdin  # type: ignore[assignment]
+        stdout: IO[bytes] = self._process.stdout  # type: ignore[assignment]
+
+        with self._lock:
+            stdin.write(spec.encode("utf-8") + b"\n")
+            stdin.flush()
+
+            header = stdout.readline().split()
+            if len(header) != 3:
+                raise KeyError(spec)
+
+            content = stdout.read(int(header[2]))
+            stdout.read(1)  # Trailing newline
+
+        return content
+
+    def close(self) -> None:
+        """
+        Stop the process.
+        """
+        if self._process.stdin is not None:
+            self._process.stdin.close()
+        self._process.wait()
+        if self._process.stdout is not None:
+            self._process.stdout.close()
+
+
+def get_identity_env(repo: Repo) -> dict[str, str]:
+    """
+    Get the author and committer of new commits as environment variables of git,
+    with the same fallbacks as GitPython if they are not configured.
+
+    :param repo: The Repo object representing the git repository.
+    :return: The environment variables.
+    """
+    author = Actor.author(repo.config_reader())
+    committer = Actor.committer(repo.config_reader())
+    return {
+        "GIT_AUTHOR_NAME": author.name or "",
+        "GIT_AUTHOR_EMAIL": author.email or "",
+        "GIT_COMMITTER_NAME": committer.name or "",
+        "GIT_COMMITTER_EMAIL": committer.email or "",
+    }
+
+
+def update_index(repo: Repo, paths: list[Path]) -> None:
+    """
+    Stage changed paths, streaming them to a single 'git update-index' process.
+    Missing paths are removed from the index.
+
+    :param repo: The Repo object representing the git repository.
+    :param paths: Changed files or directories, inside the working tree.
+    """
+    working_dir = Path(str(repo.working_dir))
+    command = ["git", "update-index", "--add", "--remove", "-z", "--stdin"]
+    with subprocess.Popen(command, cwd=working_dir, stdin=subprocess.PIPE) as process:
+        assert process.stdin is not None
+        for path in paths:
+            for file_path in _list_files(path):
+                process.stdin.write(os.fsencode(file_path.relative_to(working_dir)) + b"\0")
+        process.stdin.close()
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+
+def _list_files(path: Path) -> list[Path]:
+    if path.is_symlink() or not path.is_dir():
+        return [path]
+
+    files: list[Path] = []
+    for root, directories, names in os.walk(path):
+        files.extend(Path(root) / name for name in names)
+        files.extend(Path(root) / name for name in directories if (Path(root) / name).is_symlink())
+    return files
+
+
+@cache
+def get(name: Optional[str] = None) -> GitBackend:
+    """
+    Get the git backend, as configured in the settings.
+
+    :param name: The name of the backend, overriding the settings.
+    :return: The backend.
+    """
+    backends = {"gitpython": GitPythonBackend, "batch": BatchBackend}
+    return backends[name or settings.get().git_backend]()
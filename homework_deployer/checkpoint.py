@@ -0,0 +1,88 @@
+"""
+Checkpoints of deployment runs, stored in the run directory.
+They record the completed phases of a run, so a failed run can continue from where it stopped.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+import homework_deployer.constants as const
+import homework_deployer.snapshot as snapshot
+from homework_deployer.event import Event
+
+
+def create(run_dir: Path, event: Event) -> dict[str, Any]:
+    """
+    Create the checkpoint of a new run.
+
+    :param run_dir: The directory of the run.
+    :param event: The event being deployed.
+    :return: The checkpoint.
+    """
+    checkpoint = {
+        "event_id": event.id,
+        "event": event.model_dump(mode="json"),
+        "phases": [],
+        "paths": [],
+    }
+    save(run_dir, checkpoint)
+    return checkpoint
+
+
+def load(run_dir: Path) -> dict[str, Any]:
+    """
+    Load the checkpoint of a run.
+
+    :param run_dir: The directory of the run.
+    :return: The checkpoint.
+    """
+    with open(run_dir / const.CHECKPOINT_FILE, "r", encoding="utf-8") as checkpoint_file:
+        return json.load(checkpoint_file)
+
+
+def save(run_dir: Path, checkpoint: dict[str, Any]) -> None:
+    """
+    Write the checkpoint of a run. The file is replaced atomically, so it is never left half-written.
+
+    :param run_dir: The directory of the run.
+    :param checkpoint: The checkpoint.
+    """
+    temp_path = run_dir / f"{const.CHECKPOINT_FILE}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(checkpoint, checkpoint_file, indent=4)
+    os.replace(temp_path, run_dir / const.CHECKPOINT_FILE)
+
+
+def mark(run_dir: Path, checkpoint: dict[str, Any], phase: const.Phase) -> None:
+    """
+    Record a phase as completed.
+
+    :param run_dir: The directory of the run.
+    :param checkpoint: The checkpoint.
+    :param phase: The completed phase.
+    """
+    checkpoint["phases"].append(phase.value)
+    save(run_dir, checkpoint)
+
+
+def is_done(checkpoint: dict[str, Any], phase: const.Phase) -> bool:
+    """
+    Check if a phase was already completed.
+
+    :param checkpoint: The checkpoint.
+    :param phase: The phase to check.
+    :return: True if the phase was completed, False otherwise.
+    """
+    return phase.value in checkpoint["phases"]
+
+
+def get_event(checkpoint: dict[str, Any]) -> Event:
+    """
+    Get the event of the run.
+
+    :param checkpoint: The checkpoint.
+    :return: The event being deployed.
+    """
+    return snapshot.restore(checkpoint, checkpoint["event_id"])
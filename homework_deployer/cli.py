@@ -21,23 +21,61 @@ def get_args() -> dict[str, Any]:
 
     subparsers = parser.add_subparsers(dest="command", required=True, help="Available commands")
 
-    register_parser = subparsers.add_parser("register", help="Register a deployment event")
-    register_parser.add_argument("config", type=str, help="Path to the event configuration file")
+    register_parser = subparsers.add_parser("register", help="Register deployment events")
+    register_parser.add_argument(
+        "config", type=str, nargs="+", help="Paths to event configuration files, directories or glob patterns"
+    )
+
+    validate_parser = subparsers.add_parser("validate", help="Validate event configs against their origins")
+    validate_parser.add_argument(
+        "config", type=str, nargs="+", help="Paths to event configuration files, directories or glob patterns"
+    )
+    validate_parser.add_argument(
+        "--no-fetch", action="store_true", help="Use the existing mirrors of the origins without fetching"
+    )
 
     deregister_parser = subparsers.add_parser("deregister", help="Deregister a deployment event")
     deregister_parser.add_argument("event_id", type=str, help="ID of the event to deregister")
 
     subparsers.add_parser("list", help="List all deployment event")
 
+    subparsers.add_parser("reconcile", help="Bring the registered events in line with the scheduled 'at' jobs")
+
     run_parser = subparsers.add_parser("run", help="Run a deployment event")
     run_parser.add_argument("event_id", type=str, help="ID of the event to run")
     run_parser.add_argument("--no-push", action="store_true", help="Skip pushing changes to remote")
     run_parser.add_argument("--no-remove", action="store_true", help="Skip removing local repos")
+    run_parser.add_argument(
+        "--revalidate", action="store_true", help="Load and validate the config file instead of the stored snapshot"
+    )
+    run_parser.add_argument(
+        "--force", action="store_true", help="Deploy even if nothing changed since the last deployment"
+    )
+
+    plan_parser = subparsers.add_parser("plan", help="Show the changes a deployment event would make")
+    plan_parser.add_argument("event_id", type=str, help="ID of the event to plan")
+
+    run_due_parser = subparsers.add_parser("run-due", help="Run all due deployment events, ordered by dependencies")
+    run_due_parser.add_argument("--no-push", action="store_true", help="Skip pushing changes to remote")
+    run_due_parser.add_argument("--no-remove", action="store_true", help="Skip removing local repos")
+
+    resume_parser = subparsers.add_parser("resume", help="Continue a failed run from its last completed phase")
+    resume_parser.add_argument("run_id", type=str, help="ID of the run to continue")
+    resume_parser.add_argument("--no-push", action="store_true", help="Skip pushing changes to remote")
+    resume_parser.add_argument("--no-remove", action="store_true", help="Skip removing local repos")
+
+    gc_parser = subparsers.add_parser("gc", help="Delete finished runs and expired failed runs")
+    gc_parser.add_argument("--work-root", type=str, default=None, help="Work root to clean, instead of the configured")
+
+    sync_parser = subparsers.add_parser("sync", help="Keep the destination of an event in sync with its origin")
+    sync_parser.add_argument("event", type=str, help="ID of a registered event, or path to an event configuration file")
+    sync_parser.add_argument("--interval", type=float, default=None, help="Seconds between polls of the origin")
+    sync_parser.add_argument("--once", action="store_true", help="Poll the origin once and exit")
 
     parser.add_argument("--version", action="version", help="Show the version of the tool", version=VERSION)
 
     # TODO - Can this be improved?
     args = parser.parse_args().__dict__
     if args["command"]:
-        args["command"] = ActionType[args["command"].upper()]
+        args["command"] = ActionType(args["command"])
     return args
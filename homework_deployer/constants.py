@@ -11,10 +11,21 @@ WORK_DIR = os.path.join("/tmp", "homework_deployer")
 
 SOURCE_REPO_DIR = "source_repo"
 DESTINATION_REPO_DIR = "destination_repo"
+CHECKPOINT_FILE = "checkpoint.json"
 
 
 AT_BINARY = "at"
 DB_PATH = "db.json"
+SETTINGS_PATH = "settings.json"
+FINGERPRINTS_PATH = "fingerprints.json"
+
+LOCKS_DIR = "locks"
+TRASH_DIR = "trash"
+GC_LOCK_FILE = "gc.lock"
+SIZES_FILE = "sizes.json"
+HISTORY_FILE = "history.json"
+HOOKS_FILE = "hooks.json"
+MIRRORS_DIR = "mirrors"
 
 SCRIPT_PATH = os.path.abspath("homework-deployer.py")
 
@@ -24,3 +35,24 @@ class ActionType(enum.Enum):
     DEREGISTER = "deregister"
     LIST = "list"
     RUN = "run"
+    RESUME = "resume"
+    GC = "gc"
+    SYNC = "sync"
+    RUN_DUE = "run-due"
+    RECONCILE = "reconcile"
+    VALIDATE = "validate"
+    PLAN = "plan"
+
+
+class Phase(enum.Enum):
+    CLONED = "cloned"
+    EXPANDED = "expanded"
+    COPIED = "copied"
+    COMMITTED = "committed"
+    PUSHED = "pushed"
+
+
+class Outcome(enum.Enum):
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    SKIPPED = "skipped"
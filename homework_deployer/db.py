@@ -2,14 +2,23 @@
 Persistent storage for deployment events using a JSON file.
 """
 
+import fcntl
 import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
 
 from homework_deployer.event import Event
 
+# (at id, config path, event snapshot)
+Entry = tuple[int, str, dict[str, Any]]
 
-def load(db_path: str) -> dict[str, tuple[int, str]]:
+
+def load(db_path: str) -> dict[str, Entry]:
     """
     Load the database from a JSON file.
+    Entries written before snapshots were introduced get an empty snapshot.
 
     :param db_path: Path to the database file.
     :return: List of event dictionaries.
@@ -18,26 +27,55 @@ def load(db_path: str) -> dict[str, tuple[int, str]]:
     try:
         with open(db_path, "r", encoding="utf-8") as db_file:
             content = json.load(db_file)
-            content = {k: tuple(v) for k, v in content.items()}
-            return content
+            return {k: (v[0], v[1], v[2] if len(v) > 2 else {}) for k, v in content.items()}
     except FileNotFoundError:
-        with open(db_path, "w", encoding="utf-8") as db_file:
-            json.dump({}, db_file)
+        save(db_path, {})
         return {}
 
 
-def add(db_path: str, event: Event, config_path: str, at_id: int) -> None:
+def add(db_path: str, event: Event, config_path: str, at_id: int, snapshot: dict[str, Any]) -> None:
     """
     Add a new event to the database.
 
     :param db_path: Path to the database file.
     :param event: The Event object to add.
+    :param config_path: Path to the event configuration file.
+    :param at_id: The id of the scheduled 'at' job.
+    :param snapshot: The validated snapshot of the event.
     """
     db = load(db_path)
-    db[event.id] = (at_id, config_path)
+    db[event.id] = (at_id, config_path, snapshot)
+
+    save(db_path, db)
 
-    with open(db_path, "w", encoding="utf-8") as db_file:
-        json.dump(db, db_file, indent=4)
+
+def add_many(db_path: str, entries: dict[str, Entry]) -> None:
+    """
+    Add multiple events to the database with a single write.
+
+    :param db_path: Path to the database file.
+    :param entries: Mapping of event ids to their entries.
+    """
+    db = load(db_path)
+    db.update(entries)
+
+    save(db_path, db)
+
+
+def apply(db_path: str, updated: dict[str, Entry], removed: set[str]) -> None:
+    """
+    Update and remove multiple events with a single write.
+
+    :param db_path: Path to the database file.
+    :param updated: Mapping of event ids to their new entries.
+    :param removed: The ids of the events to remove.
+    """
+    db = load(db_path)
+    db.update(updated)
+    for event_id in removed:
+        db.pop(event_id, None)
+
+    save(db_path, db)
 
 
 def remove(db_path: str, event_id: str) -> None:
@@ -51,8 +89,34 @@ def remove(db_path: str, event_id: str) -> None:
     if event_id in db:
         del db[event_id]
 
-        with open(db_path, "w", encoding="utf-8") as db_file:
-            json.dump(db, db_file, indent=4)
+        save(db_path, db)
+
+
+def save(db_path: str, db: dict[str, Entry]) -> None:
+    """
+    Write the whole database to a JSON file.
+    The file is replaced at once, so readers without the lock never see a partial write.
+
+    :param db_path: Path to the database file.
+    :param db: The database content.
+    """
+    temp_path = f"{db_path}.{os.getpid()}.{threading.get_ident()}"
+    with open(temp_path, "w", encoding="utf-8") as db_file:
+        json.dump(db, db_file, indent=4)
+    os.replace(temp_path, db_path)
+
+
+@contextmanager
+def lock(db_path: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock of the database, shared by all processes, so that reading it and writing it back
+    is a single step.
+
+    :param db_path: Path to the database file.
+    """
+    with open(f"{db_path}.lock", "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
 
 
 def get_next_free_id(db_path: str) -> str:
@@ -62,15 +126,42 @@ def get_next_free_id(db_path: str) -> str:
     :param db_path: Path to the DB
     :return: The next free id
     """
-    existing_ids = set(int(_id) for _id in load(db_path).keys())
+    return get_next_free_ids(db_path, 1)[0]
 
-    if len(existing_ids) == 0:
-        return "1"
-    highest_id = max(existing_ids)
 
-    # If there is a hole in ids, this will find it
-    for candidate_id in range(1, highest_id + 1):
+def get_next_free_ids(db_path: str, count: int) -> list[str]:
+    """
+    Return the given number of free event ids, filling holes in the existing ids first.
+    Ids which registered events depend on are not free, even if they are not registered anymore,
+    so a new event never takes the place of a dependency.
+
+    :param db_path: Path to the DB
+    :param count: How many ids are needed
+    :return: The free ids, in ascending order
+    """
+    db = load(db_path)
+    existing_ids = set(int(_id) for _id in db.keys())
+    existing_ids.update(int(_id) for _id in get_dependencies(db) if _id.isdigit())
+
+    free_ids: list[str] = []
+    candidate_id = 1
+    while len(free_ids) < count:
         if candidate_id not in existing_ids:
-            return str(candidate_id)
+            free_ids.append(str(candidate_id))
+        candidate_id += 1
 
-    return str(highest_id + 1)
+    return free_ids
+
+
+def get_dependencies(db: dict[str, Entry]) -> set[str]:
+    """
+    Collect the ids the registered events depend on, from their snapshots.
+
+    :param db: The database content.
+    :return: The ids of the dependencies, registered or not.
+    """
+    return {
+        dependency
+        for _, _, event_snapshot in db.values()
+        for dependency in event_snapshot.get("event", {}).get("depends_on", [])
+    }
@@ -3,10 +3,21 @@ Event model representing a deployment event.
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel, Field
 
 
+class Transform(BaseModel):
+    """
+    Content transform, applied to the deployed files matching a glob pattern.
+    """
+
+    files: str  # Glob pattern of source files, relative to the origin, e.g. "**/*.py"
+    strip_markers: Optional[tuple[str, str]] = None  # Lines between these markers are removed, markers included
+    placeholders: dict[str, str] = {}  # Text to replace, and its replacement
+    line_endings: Optional[Literal["lf", "crlf"]] = None
+
+
 class Event(BaseModel):
     """
     Deployment event model.
@@ -20,3 +31,12 @@ class Event(BaseModel):
     date: datetime
     patterns: list[tuple[str, Optional[str]]]
     is_dry_run: bool = False
+    sync_interval: Optional[float] = None  # Seconds between polls of the origin in sync mode
+    depends_on: list[str] = []  # IDs of events which have to be deployed before this one
+    transforms: list[Transform] = []
+    # How the origin is fetched - a full clone, or an archive of the matched paths from its mirror or its server
+    origin_fetch: Literal["clone", "mirror", "remote"] = "clone"
+    origin_ref: Optional[str] = None  # Branch of the origin to deploy, the default branch if not set
+    destination_ref: Optional[str] = None  # Branch of the destination to push to, created if it does not exist
+    hooks: list[str] = []  # Shell commands run in the committed destination tree before pushing
+    hook_timeout: Optional[float] = None  # Seconds for all hooks, the settings are used if not set
@@ -3,62 +3,424 @@ Module contains functions to execute deployment events.
 """
 
 import datetime
+import functools
 import logging
+import random
 import shutil
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from git import Repo
+from git import PushInfo, Repo
+from git.exc import GitCommandError
 
+import homework_deployer.archive as archive
+import homework_deployer.backend as backend
+import homework_deployer.checkpoint as checkpoint
 import homework_deployer.constants as const
-from homework_deployer.event import Event
+import homework_deployer.fingerprint as fingerprint
+import homework_deployer.history as history
+import homework_deployer.hooks as hooks
+import homework_deployer.limiter as limiter
+import homework_deployer.mirror as mirror
+import homework_deployer.settings as settings
+import homework_deployer.transform as transform
+import homework_deployer.workdir as workdir
+from homework_deployer.event import Event, Transform
+from homework_deployer.logger import log_context
 
 logger = logging.getLogger("homework_deployer")
 
+# Reasons of remote rejections caused by concurrent pushes updating the same refs, as reported by git.
+# Other remote rejections (e.g. declined by a hook or a branch protection) are final.
+TRANSIENT_REJECTIONS = (
+    "failed to update ref",
+    "cannot lock ref",
+    "failed to lock",
+    "incorrect old value provided",
+    "atomic push failure",
+)
 
-def execute(event: Event, is_no_push: bool = False, is_no_remove: bool = False) -> None:
+
+def execute(event: Event, is_no_push: bool = False, is_no_remove: bool = False, is_force: bool = False) -> None:
     """
     Execute the deployment event by cloning repositories, copying files according to patterns,
     committing changes, and cleaning up the working directory.
+    The event is skipped if the last deployment had the same content, unless forced.
 
     :param event: The Event object containing deployment details.
     """
+    if not is_no_push and not is_force and fingerprint.is_up_to_date(event):
+        logger.info("Event %s: Nothing changed since the last deployment, skipping", event.id)
+        return
+
     now = datetime.datetime.now()
     run_id = f"run_{event.id}{now.strftime('%y%m%d%H%M%S')}"
-    run_dir = Path(const.WORK_DIR) / run_id
+    workdir.preflight(event)
+    run_dir = workdir.create_run_dir(run_id)
+
+    run_checkpoint = checkpoint.create(run_dir, event)
+    run_phases(event, run_dir, run_checkpoint, is_no_push, is_no_remove)
+
+
+def resume(run_id: str, is_no_push: bool = False, is_no_remove: bool = False) -> Event:
+    """
+    Continue a failed run from its last completed phase, reusing its clones.
+
+    :param run_id: The ID of the run, which is also the name of its directory.
+    :return: The event deployed by the run.
+    """
+    run_dir = workdir.get_root() / run_id
+    run_checkpoint = checkpoint.load(run_dir)
+    event = checkpoint.get_event(run_checkpoint)
+
+    logger.info("Event %s: Resuming run %s after phases: %s", event.id, run_id, run_checkpoint["phases"])
+    run_phases(event, run_dir, run_checkpoint, is_no_push or event.is_dry_run, is_no_remove or event.is_dry_run)
+
+    return event
+
+
+def execute_group(
+    events: list[Event], is_no_push: bool = False, is_no_remove: bool = False, is_force: bool = False
+) -> None:
+    """
+    Execute events deploying to different branches of the same destination, in a single clone of the destination.
+    The commits of all branches are pushed at once - either all of the branches are updated, or none.
+    Grouped runs are not checkpointed, the events of a failed group stay registered and run again as a whole.
+
+    :param events: The events, with the same destination and different destination branches.
+    """
+    if not is_no_push and not is_force:
+        unchanged = {event.id for event in events if fingerprint.is_up_to_date(event)}
+        for event_id in sorted(unchanged):
+            logger.info("Event %s: Nothing changed since the last deployment, skipping", event_id)
+        events = [event for event in events if event.id not in unchanged]
+    if len(events) == 0:
+        return
+
+    now = datetime.datetime.now()
+    run_id = f"run_group_{events[0].id}{now.strftime('%y%m%d%H%M%S')}"
+    for event in events:
+        workdir.preflight(event)
+    run_dir = workdir.create_run_dir(run_id)
+
+    with log_context(",".join(event.id for event in events), run_id):
+        try:
+            run_group(events, run_dir, is_no_push)
+        except Exception:
+            logger.error("Events %s: Grouped run %s failed", ", ".join(event.id for event in events), run_id)
+            raise
+
+        if not is_no_remove:
+            workdir.discard(run_dir)
+
+
+def run_group(events: list[Event], run_dir: Path, is_no_push: bool) -> None:
+    """
+    Commit the changes of every event of a group to its branch, and push all branches with a single atomic push.
+
+    :param events: The events, with the same destination and different destination branches.
+    :param run_dir: The directory of the run.
+    """
+    destination = events[0].destination
+    destination_repo_dir = run_dir / const.DESTINATION_REPO_DIR
+    destination_repo = clone_repo(destination, destination_repo_dir)
+    workdir.record_size(destination, destination_repo_dir)
+    default_branch = destination_repo.active_branch.name
+
+    replays: dict[str, Optional[Callable[[Repo], None]]] = {}
+    verifiers: dict[str, Callable[[Repo], None]] = {}
+    sources: dict[str, tuple[Event, Optional[Repo], dict[str, Any]]] = {}
+    for event in events:
+        assert event.destination_ref is not None
+        checkout_branch(destination_repo, event.destination_ref, default_branch)
+
+        # Only the pinned origin commit is kept, nothing is saved
+        run_checkpoint: dict[str, Any] = {}
+        source_repo = fetch_origin(event, run_dir / f"{const.SOURCE_REPO_DIR}_{event.id}", run_checkpoint)
+        replays[event.destination_ref] = commit_branch(event, source_repo, destination_repo, run_checkpoint)
+        verifiers[event.destination_ref] = functools.partial(hooks.verify, event)
+        sources[event.destination_ref] = (event, source_repo, run_checkpoint)
+
+    if is_no_push:
+        return
+
+    logger.info("Pushing %d branches of %s: %s", len(replays), destination, sorted(replays))
+    push_branches(destination_repo, replays, verifiers)
+
+    for branch, (event, source_repo, run_checkpoint) in sources.items():
+        origin_commit = None
+        if source_repo is not None:
+            origin_commit = run_checkpoint.get("origin_commit") or source_repo.head.commit.hexsha
+        fingerprint.record(event, source_repo, origin_commit, destination_repo.commit(branch).hexsha)
+
+
+def commit_branch(
+    event: Event, source_repo: Optional[Repo], destination_repo: Repo, run_checkpoint: dict[str, Any]
+) -> Callable[[Repo], None]:
+    """
+    Copy the matched files of an event to the checked out branch of the destination, commit them and run the hooks.
+
+    :param event: The Event object containing deployment details.
+    :param source_repo: The source Repo object, None if the origin is archived by its server.
+    :param destination_repo: The destination Repo object.
+    :param run_checkpoint: The state of the run, with the pinned origin commit.
+    :return: Recreates the changes on top of the remote tip of the branch.
+    """
+    paths = []
+    if event.origin_fetch == "clone":
+        assert source_repo is not None
+        paths = expand_patterns(str(source_repo.working_dir), str(destination_repo.working_dir), event.patterns)
+
+    logger.info("Event %s: Copying %d files to branch %s", event.id, len(paths), event.destination_ref)
+    commit_message = f"Automated commit for event {event.id}"
+    commit_changes(
+        destination_repo, commit_message, copy_origin(event, source_repo, paths, destination_repo, run_checkpoint)
+    )
+    hooks.verify(event, destination_repo)
+
+    def replay(repo: Repo) -> None:
+        commit_changes(repo, commit_message, copy_origin(event, source_repo, paths, repo, run_checkpoint))
+
+    return replay
+
+
+def run_phases(
+    event: Event, run_dir: Path, run_checkpoint: dict[str, Any], is_no_push: bool, is_no_remove: bool
+) -> None:
+    """
+    Run the phases of a deployment which are not yet completed according to the checkpoint,
+    and discard the run directory if it succeeded.
+
+    :param event: The Event object containing deployment details.
+    :param run_dir: The directory of the run.
+    :param run_checkpoint: The checkpoint of the run.
+    """
+    with log_context(event.id, run_dir.name):
+        try:
+            run_pending_phases(event, run_dir, run_checkpoint, is_no_push)
+        except Exception:
+            logger.error("Event %s: Run failed, continue it with: resume %s", event.id, run_dir.name)
+            raise
+
+        if not is_no_remove:
+            workdir.discard(run_dir)
+
+
+def run_pending_phases(event: Event, run_dir: Path, run_checkpoint: dict[str, Any], is_no_push: bool) -> None:
+    """
+    Run the phases of a deployment which are not yet completed according to the checkpoint.
+
+    :param event: The Event object containing deployment details.
+    :param run_dir: The directory of the run.
+    :param run_checkpoint: The checkpoint of the run.
+    """
+    pending = [phase for phase in const.Phase if not checkpoint.is_done(run_checkpoint, phase)]
+    durations: dict[const.Phase, float] = {}
+
+    with history.measure(durations, const.Phase.CLONED):
+        source_repo, destination_repo = prepare_repos(event, run_dir, run_checkpoint)
+    with history.measure(durations, const.Phase.EXPANDED):
+        paths = prepare_paths(source_repo, destination_repo, event, run_dir, run_checkpoint)
+
+    commit_message = f"Automated commit for event {event.id}"
+    destination_paths: Optional[list[Path]] = [destination for _, destination in paths]
+    if not checkpoint.is_done(run_checkpoint, const.Phase.COPIED):
+        logger.info("Event %s: Copying %d files", event.id, len(paths))
+        with history.measure(durations, const.Phase.COPIED):
+            destination_paths = copy_origin(event, source_repo, paths, destination_repo, run_checkpoint)
+        checkpoint.mark(run_dir, run_checkpoint, const.Phase.COPIED)
+    elif event.origin_fetch != "clone":
+        # The files extracted by the interrupted run are not known, the whole working tree is checked instead
+        destination_paths = None
+
+    if not checkpoint.is_done(run_checkpoint, const.Phase.COMMITTED):
+        with history.measure(durations, const.Phase.COMMITTED):
+            commit_changes(destination_repo, commit_message, destination_paths)
+        checkpoint.mark(run_dir, run_checkpoint, const.Phase.COMMITTED)
+
+    if not checkpoint.is_done(run_checkpoint, const.Phase.PUSHED):
+        hooks.verify(event, destination_repo)
+
+    def replay(repo: Repo) -> None:
+        commit_changes(repo, commit_message, copy_origin(event, source_repo, paths, repo, run_checkpoint))
+
+    if not is_no_push and not checkpoint.is_done(run_checkpoint, const.Phase.PUSHED):
+        with history.measure(durations, const.Phase.PUSHED):
+            push_changes(destination_repo, replay, functools.partial(hooks.verify, event))
+        origin_commit = None
+        if source_repo is not None:
+            origin_commit = run_checkpoint.get("origin_commit") or source_repo.head.commit.hexsha
+        fingerprint.record(event, source_repo, origin_commit, destination_repo.head.commit.hexsha)
+        checkpoint.mark(run_dir, run_checkpoint, const.Phase.PUSHED)
+
+    # Phases completed by a previous attempt of a resumed run take no time now, so they are not recorded
+    history.record(event, {phase: durations[phase] for phase in pending if checkpoint.is_done(run_checkpoint, phase)})
+
+
+def prepare_repos(event: Event, run_dir: Path, run_checkpoint: dict[str, Any]) -> tuple[Optional[Repo], Repo]:
+    """
+    Clone the source and destination repositories, or open the existing clones of a resumed run.
+    Origins fetched as archives are not cloned - the mirror of the origin is used as the source, if any.
+
+    :param event: The Event object containing deployment details.
+    :param run_dir: The directory of the run.
+    :param run_checkpoint: The checkpoint of the run.
+    :return: The source and destination Repo objects.
+    """
     source_repo_dir = run_dir / const.SOURCE_REPO_DIR
     destination_repo_dir = run_dir / const.DESTINATION_REPO_DIR
 
-    cloned_source_repo = clone_repo(event.origin, source_repo_dir)
+    if checkpoint.is_done(run_checkpoint, const.Phase.CLONED):
+        return open_source(event, source_repo_dir), Repo(destination_repo_dir)
+
+    # Leftovers of an interrupted clone
+    for repo_dir in (source_repo_dir, destination_repo_dir):
+        if repo_dir.exists():
+            shutil.rmtree(repo_dir)
+
+    cloned_source_repo = fetch_origin(event, source_repo_dir, run_checkpoint)
     cloned_destination_repo = clone_repo(event.destination, destination_repo_dir)
+    workdir.record_size(event.destination, destination_repo_dir)
+    if event.destination_ref is not None:
+        checkout_branch(cloned_destination_repo, event.destination_ref, cloned_destination_repo.active_branch.name)
+    checkpoint.mark(run_dir, run_checkpoint, const.Phase.CLONED)
 
-    paths = expand_patterns(
-        str(cloned_source_repo.working_dir),
-        str(cloned_destination_repo.working_dir),
-        event.patterns,
-    )
+    return cloned_source_repo, cloned_destination_repo
+
+
+def fetch_origin(event: Event, source_repo_dir: Path, run_checkpoint: dict[str, Any]) -> Optional[Repo]:
+    """
+    Clone the origin, or update its mirror if it is fetched as an archive.
+
+    :param event: The Event object containing deployment details.
+    :param source_repo_dir: The directory for the clone of the origin.
+    :param run_checkpoint: The checkpoint of the run, which the archived origin commit is pinned in.
+    :return: The source Repo object, or None if the origin is archived by its server.
+    """
+    if event.origin_fetch == "clone":
+        source_repo = clone_repo(event.origin, source_repo_dir, event.origin_ref)
+        workdir.record_size(event.origin, source_repo_dir)
+        return source_repo
+
+    if event.origin_fetch == "mirror":
+        source_repo = mirror.update(event.origin)
+        # Pinned, so a resumed run deploys the same commit
+        run_checkpoint["origin_commit"] = source_repo.commit(mirror.get_ref(event.origin_ref)).hexsha
+        return source_repo
+
+    return None
+
+
+def checkout_branch(repo: Repo, branch: str, default_branch: str) -> None:
+    """
+    Switch a clone of the destination to the branch an event pushes to.
+    A branch which does not exist in the remote yet is created from the remote default branch.
+
+    :param repo: The Repo object of the clone.
+    :param branch: The branch to switch to.
+    :param default_branch: The default branch of the remote.
+    """
+    if repo.active_branch.name == branch:
+        return
 
-    logger.info("Event %s: Copying %d files", event.id, len(paths))
+    remote_branches = {ref.remote_head for ref in repo.remote(name="origin").refs}
+    start = branch if branch in remote_branches else default_branch
+    if start in remote_branches:
+        repo.git.checkout("-B", branch, f"origin/{start}")
+    else:
+        repo.git.checkout("--orphan", branch)
+        # The new branch starts empty, not with the files of the branch committed before it
+        repo.git.rm("-r", "-f", "-q", "--ignore-unmatch", ".")
 
-    copy_files(paths)
-    commit_changes(cloned_destination_repo, f"Automated commit for event {event.id}")
 
-    if not is_no_push:
-        push_changes(cloned_destination_repo)
+def open_source(event: Event, source_repo_dir: Path) -> Optional[Repo]:
+    """
+    Open the source of a resumed run.
 
-    if not is_no_remove:
-        shutil.rmtree(const.WORK_DIR)
+    :param event: The Event object containing deployment details.
+    :param source_repo_dir: The directory of the clone of the origin.
+    :return: The source Repo object, or None if the origin is archived by its server.
+    """
+    if event.origin_fetch == "clone":
+        return Repo(source_repo_dir)
+    if event.origin_fetch == "mirror":
+        return Repo(mirror.get_path(event.origin))
+    return None
+
+
+def prepare_paths(
+    source_repo: Optional[Repo],
+    destination_repo: Repo,
+    event: Event,
+    run_dir: Path,
+    run_checkpoint: dict[str, Any],
+) -> list[tuple[Path, Path]]:
+    """
+    Expand the patterns of the event, or take the already expanded paths of a resumed run.
+    The patterns of origins fetched as archives are resolved while extracting them, so no paths are returned.
 
+    :param source_repo: The source Repo object.
+    :param destination_repo: The destination Repo object.
+    :param event: The Event object containing deployment details.
+    :param run_dir: The directory of the run.
+    :param run_checkpoint: The checkpoint of the run.
+    :return: List of tuples with source and destination file paths.
+    """
+    if checkpoint.is_done(run_checkpoint, const.Phase.EXPANDED):
+        return [(Path(source), Path(destination)) for source, destination in run_checkpoint["paths"]]
+
+    paths = []
+    if event.origin_fetch == "clone":
+        assert source_repo is not None
+        paths = expand_patterns(
+            str(source_repo.working_dir),
+            str(destination_repo.working_dir),
+            event.patterns,
+        )
+    run_checkpoint["paths"] = [(str(source), str(destination)) for source, destination in paths]
+    checkpoint.mark(run_dir, run_checkpoint, const.Phase.EXPANDED)
+
+    return paths
+
+
+def copy_origin(
+    event: Event,
+    source_repo: Optional[Repo],
+    paths: list[tuple[Path, Path]],
+    destination_repo: Repo,
+    run_checkpoint: dict[str, Any],
+) -> list[Path]:
+    """
+    Copy the matched files of the origin to the destination, from the clone of the origin or from an archive.
 
-def clone_repo(url: str, destination: Path) -> Repo:
+    :param event: The Event object containing deployment details.
+    :param source_repo: The source Repo object, None if the origin is archived by its server.
+    :param paths: The expanded paths, for cloned origins.
+    :param destination_repo: The destination Repo object.
+    :param run_checkpoint: The checkpoint of the run.
+    :return: The written destination paths.
+    """
+    if event.origin_fetch == "clone":
+        assert source_repo is not None
+        copy_files(paths, event.transforms, Path(str(source_repo.working_dir)))
+        return [destination for _, destination in paths]
+
+    rev = run_checkpoint.get("origin_commit") or mirror.get_ref(event.origin_ref)
+    return archive.extract(event, Path(str(destination_repo.working_dir)), source_repo, rev)
+
+
+def clone_repo(url: str, destination: Path, branch: Optional[str] = None) -> Repo:
     """
     Clone a git repository to a specified destination.
 
     :param url: The URL of the git repository to clone.
     :param destination: The local path where the repository should be cloned.
+    :param branch: The branch to check out, the default branch if not set.
     :return: The cloned Repo object.
     """
-    return Repo.clone_from(url, str(destination))
+    with limiter.limit(url):
+        return backend.get().clone(url, destination, branch)
 
 
 def expand_patterns(
@@ -115,40 +477,186 @@ def extract_pattern(
     return source_full_path, destination_full_path
 
 
-def copy_files(paths: list[tuple[Path, Path]]) -> None:
+def copy_files(
+    paths: list[tuple[Path, Path]], transforms: Optional[list[Transform]] = None, source_root: Optional[Path] = None
+) -> None:
     """
-    Copy files from source paths to destination paths.
+    Copy files and directories from source paths to destination paths.
 
     :param paths: List of tuples containing source and destination file paths.
+    :param transforms: Content transforms of the copied files, if any.
+    :param source_root: The root of the source repository, which the transform patterns are relative to.
     """
+    if transforms and source_root is not None:
+        transform.copy_files(paths, transforms, source_root)
+        return
+
     for source_path, destination_path in paths:
         destination_path.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(source_path, destination_path)
+        if source_path.is_dir():
+            shutil.copytree(source_path, destination_path, dirs_exist_ok=True)
+        else:
+            shutil.copy2(source_path, destination_path)
 
 
-def commit_changes(repo: Repo, message: str) -> None:
+def commit_changes(repo: Repo, message: str, paths: Optional[list[Path]] = None) -> None:
     """
     Commit changes to the git repository if there are any changes.
 
     :param repo: The Repo object representing the git repository.
     :param message: The commit message to use.
+    :param paths: The changed files or directories, or None to look for changes in the whole working tree.
     """
-    repo.git.add(A=True)
-    if repo.is_dirty():
-        repo.index.commit(message)
+    backend.get().commit(repo, message, paths)
 
 
-def push_changes(repo: Repo) -> None:
+def push_changes(
+    repo: Repo, replay: Optional[Callable[[Repo], None]] = None, verify: Optional[Callable[[Repo], None]] = None
+) -> None:
     """
     Push changes to the remote repository.
+    If the push is rejected because the remote branch moved, the local commits are rebased onto the new
+    remote tip and the push is retried with a jittered exponential backoff.
 
     :param repo: The Repo object representing the git repository.
+    :param replay: Recreates the local changes on top of the remote tip, used if the rebase fails.
+    :param verify: Checks the working tree before it is pushed again, after the rebase.
+    """
+    branch = repo.active_branch.name
+    push_branches(repo, {branch: replay}, {branch: verify} if verify is not None else None)
+
+
+def push_branches(
+    repo: Repo,
+    replays: dict[str, Optional[Callable[[Repo], None]]],
+    verifiers: Optional[dict[str, Callable[[Repo], None]]] = None,
+) -> None:
+    """
+    Push branches to the remote repository. Multiple branches are pushed atomically - all of them are updated,
+    or none. If the push is rejected because a remote branch moved, or the remote could not lock or update a ref
+    pushed to concurrently, the local commits of every branch are rebased onto its new remote tip and the push
+    is retried with a jittered exponential backoff.
+
+    :param repo: The Repo object representing the git repository.
+    :param replays: Mapping of the branches to functions recreating their changes on top of the remote tip,
+    used if the rebase fails.
+    :param verifiers: Mapping of the branches to functions checking their working trees, run after the rebase,
+    since the rebased trees were never checked.
     """
     origin = repo.remote(name="origin")
-    origin.push()
+    retry = settings.get().push_retry
+    refspecs = [f"refs/heads/{branch}:refs/heads/{branch}" for branch in replays]
+
+    for attempt in range(1, retry.max_attempts + 1):
+        with limiter.limit(origin.url):
+            push_infos = backend.get().push(repo, refspecs, is_atomic=len(refspecs) > 1)
+
+        rejected = [info for info in push_infos if is_retryable(info)]
+        errors = [
+            info
+            for info in push_infos
+            if info.flags & (PushInfo.ERROR | PushInfo.REMOTE_REJECTED) and not is_retryable(info)
+        ]
+        if errors:
+            raise PushError(f"Push to {origin.url} failed: {errors[0].summary.strip()}")
+
+        if not rejected:
+            return
+
+        if attempt == retry.max_attempts:
+            break
+
+        delay = min(retry.max_delay, retry.base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1)
+        logger.warning("Push to %s rejected, retrying in %.1fs (attempt %d)", origin.url, delay, attempt)
+        time.sleep(delay)
+
+        with limiter.limit(origin.url):
+            origin.fetch()
+        rebase_branches(repo, replays, verifiers)
+
+    raise PushError(f"Push to {origin.url} rejected after {retry.max_attempts} attempts")
+
+
+def is_retryable(push_info: PushInfo) -> bool:
+    """
+    Check if a ref was rejected because of a concurrent push - the remote branch moved, or the remote could not
+    update it.
+
+    :param push_info: The result of the push of the ref.
+    :return: True if pushing again after a rebase can succeed.
+    """
+    if push_info.flags & PushInfo.REJECTED:
+        return True
+    return bool(push_info.flags & PushInfo.REMOTE_REJECTED) and is_transient_rejection(push_info.summary)
+
+
+def is_transient_rejection(summary: str) -> bool:
+    """
+    Check if a push was rejected by the remote because of a concurrent push, and can be retried.
+
+    :param summary: The summary of the rejected ref, as reported by git.
+    :return: True if pushing again can succeed.
+    """
+    return any(reason in summary for reason in TRANSIENT_REJECTIONS)
+
+
+def rebase_branches(
+    repo: Repo,
+    replays: dict[str, Optional[Callable[[Repo], None]]],
+    verifiers: Optional[dict[str, Callable[[Repo], None]]] = None,
+) -> None:
+    """
+    Move the local commits of branches on top of their remote counterparts, if they have any.
+
+    :param repo: The Repo object representing the git repository.
+    :param replays: Mapping of the branches to functions recreating their changes on top of the remote tip.
+    :param verifiers: Mapping of the branches to functions checking their rebased working trees.
+    """
+    active_branch = repo.active_branch.name
+    remote_branches = {ref.remote_head for ref in repo.remote(name="origin").refs}
+
+    for branch, replay in replays.items():
+        if branch not in remote_branches:
+            continue
+        if repo.active_branch.name != branch:
+            repo.git.checkout(branch)
+        rebase_onto_remote(repo, replay)
+        if verifiers is not None and branch in verifiers:
+            verifiers[branch](repo)
+
+    if repo.active_branch.name != active_branch:
+        repo.git.checkout(active_branch)
+
+
+def rebase_onto_remote(repo: Repo, replay: Optional[Callable[[Repo], None]] = None) -> None:
+    """
+    Move the local commits of the current branch on top of its remote counterpart.
+    If they cannot be rebased cleanly, the branch is reset to the remote one and the changes are replayed.
+
+    :param repo: The Repo object representing the git repository.
+    :param replay: Recreates the local changes on top of the remote tip.
+    """
+    remote_branch = f"origin/{repo.active_branch.name}"
+    try:
+        repo.git.rebase(remote_branch)
+        return
+    except GitCommandError as error:
+        repo.git.rebase(abort=True)
+        if replay is None:
+            raise PushError(f"Cannot rebase onto {remote_branch}") from error
+
+    logger.info("Rebase onto %s failed, replaying the changes", remote_branch)
+    repo.git.reset("--hard", remote_branch)
+    replay(repo)
 
 
 class PatternError(Exception):
     """
     Custom exception for pattern expansion errors.
     """
+
+
+class PushError(Exception):
+    """
+    Custom exception for pushes that could not be completed.
+    """
@@ -0,0 +1,171 @@
+"""
+Fingerprints of successful deployments, used to skip deployments which would not change anything.
+
+A deployment is identified by its origin, destination and patterns. Its fingerprint records the origin commit,
+the destination tip after the push, a digest of the object ids of the matched paths, a digest of the settings
+changing the deployed content (transforms, hooks and the origin fetching) and the time of the push.
+"""
+
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Optional
+
+from git import Repo
+from git.exc import GitCommandError
+
+import homework_deployer.constants as const
+import homework_deployer.mirror as mirror
+import homework_deployer.tree as tree
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+
+def is_up_to_date(event: Event) -> bool:
+    """
+    Check if deploying the event would not change the destination.
+    Only the remote refs are queried if the origin did not move - otherwise, the matched paths are
+    looked up in the mirror of the origin.
+
+    :param event: The event to check.
+    :return: True if the last deployment has the same content and the destination did not move.
+    """
+    recorded = load().get(get_key(event))
+    # Deployments fetched with 'git archive --remote' record no content, and are never skipped
+    if recorded is None or "content" not in recorded or recorded.get("settings") != get_settings_digest(event):
+        return False
+
+    try:
+        if mirror.ls_remote(event.destination, mirror.get_ref(event.destination_ref)) != recorded["destination_tip"]:
+            return False
+
+        origin_commit = mirror.ls_remote(event.origin, mirror.get_ref(event.origin_ref))
+        if origin_commit is None:
+            return False
+        if origin_commit == recorded["origin_commit"]:
+            return True
+
+        origin_mirror = mirror.update(event.origin)
+        return get_content_digest(origin_mirror, origin_commit, event) == recorded["content"]
+    except GitCommandError as error:
+        logger.warning("Event %s: Cannot compute the fingerprint, deploying anyway: %s", event.id, error)
+        return False
+
+
+def record(event: Event, source_repo: Optional[Repo], origin_commit: Optional[str], destination_tip: str) -> None:
+    """
+    Record the fingerprint of a successful deployment.
+    Without a repository containing the origin commit, only the push is recorded.
+
+    :param event: The deployed event.
+    :param source_repo: A repository containing the origin commit, None if the origin was not cloned.
+    :param origin_commit: The deployed origin commit, None if the origin was not cloned.
+    :param destination_tip: The destination commit after the push.
+    """
+    fingerprint: dict[str, Any] = {"destination_tip": destination_tip}
+    if source_repo is not None and origin_commit is not None:
+        fingerprint["origin_commit"] = origin_commit
+        fingerprint["content"] = get_content_digest(source_repo, origin_commit, event)
+    fingerprint["settings"] = get_settings_digest(event)
+    fingerprint["deployed_at"] = datetime.now().astimezone().isoformat()
+
+    # Events running in parallel record their fingerprints at the same time
+    with open(f"{const.FINGERPRINTS_PATH}.lock", "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        fingerprints = load()
+        fingerprints[get_key(event)] = fingerprint
+        save(fingerprints)
+
+
+def get_deployed_at(fingerprints: dict[str, dict[str, Any]], event: Event) -> Optional[datetime]:
+    """
+    Get the time of the last successful deployment of an event.
+
+    :param fingerprints: The loaded fingerprints.
+    :param event: The event.
+    :return: The time of the push, or None if it was never deployed, or before the times were recorded.
+    """
+    deployed_at = fingerprints.get(get_key(event), {}).get("deployed_at")
+    return None if deployed_at is None else datetime.fromisoformat(deployed_at)
+
+
+def get_content_digest(repo: Repo, commit: str, event: Event) -> str:
+    """
+    Calculate a digest of the object ids of the paths matched by the patterns of an event.
+
+    :param repo: A repository containing the commit.
+    :param commit: The origin commit.
+    :param event: The event.
+    :return: The hex digest.
+    """
+    entries = tree.list_tree(repo, commit)
+    matched = tree.resolve(event.patterns, entries)
+
+    content: dict[str, Any] = {
+        "patterns": event.patterns,
+        "matched": {pattern: [(path, entries[path].sha) for path in paths] for pattern, paths in matched.items()},
+    }
+    # Only added when set, so that the digests of events without transforms stay the same
+    if event.transforms:
+        content["transforms"] = [transform.model_dump(mode="json") for transform in event.transforms]
+    return hashlib.sha256(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_settings_digest(event: Event) -> str:
+    """
+    Calculate a digest of the settings of an event which change the deployed content without changing the origin.
+
+    :param event: The event.
+    :return: The hex digest.
+    """
+    settings = {
+        "transforms": [transform.model_dump(mode="json") for transform in event.transforms],
+        "hooks": event.hooks,
+        "origin_fetch": event.origin_fetch,
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def get_key(event: Event) -> str:
+    """
+    Get the key identifying the deployments of an event.
+
+    :param event: The event.
+    :return: The key.
+    """
+    identity_fields: list[Any] = [event.origin, event.destination, event.patterns]
+    # Only added when set, so that the keys of events deploying the default branches stay the same
+    if event.origin_ref is not None or event.destination_ref is not None:
+        identity_fields.append([event.origin_ref, event.destination_ref])
+    identity = json.dumps(identity_fields)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def load() -> dict[str, dict[str, Any]]:
+    """
+    Load the recorded fingerprints.
+
+    :return: Mapping of deployment keys to fingerprints.
+    """
+    try:
+        with open(const.FINGERPRINTS_PATH, "r", encoding="utf-8") as fingerprints_file:
+            return json.load(fingerprints_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save(fingerprints: dict[str, dict[str, Any]]) -> None:
+    """
+    Write the fingerprints.
+
+    :param fingerprints: Mapping of deployment keys to fingerprints.
+    """
+    temp_path = f"{const.FINGERPRINTS_PATH}.{os.getpid()}.{threading.get_ident()}"
+    with open(temp_path, "w", encoding="utf-8") as fingerprints_file:
+        json.dump(fingerprints, fingerprints_file, indent=4)
+    os.replace(temp_path, const.FINGERPRINTS_PATH)
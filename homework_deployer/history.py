@@ -0,0 +1,88 @@
+"""
+History of the durations of the phases of past runs, kept under the work root.
+It is used to estimate how long a deployment will take.
+"""
+
+import json
+import os
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import homework_deployer.constants as const
+import homework_deployer.fingerprint as fingerprint
+import homework_deployer.workdir as workdir
+from homework_deployer.event import Event
+
+
+@contextmanager
+def measure(durations: dict[const.Phase, float], phase: const.Phase) -> Iterator[None]:
+    """
+    Measure the duration of a phase.
+
+    :param durations: Mapping of phases to seconds, updated in place.
+    :param phase: The measured phase.
+    """
+    start = time.perf_counter()
+    yield
+    durations[phase] = time.perf_counter() - start
+
+
+def record(event: Event, durations: dict[const.Phase, float]) -> None:
+    """
+    Remember the durations of the phases of a run, replacing the previous ones of the same deployment.
+
+    :param event: The deployed event.
+    :param durations: Mapping of the phases completed by the run to seconds.
+    """
+    if len(durations) == 0:
+        return
+
+    history = load()
+    recorded = history.setdefault(fingerprint.get_key(event), {})
+    recorded.update({phase.value: duration for phase, duration in durations.items()})
+
+    # Concurrent runs may overwrite each other's records, which only costs the precision of one estimate
+    history_path = workdir.get_root() / const.HISTORY_FILE
+    temp_path = history_path.with_name(f"{history_path.name}.{os.getpid()}.{threading.get_ident()}")
+    with open(temp_path, "w", encoding="utf-8") as history_file:
+        json.dump(history, history_file)
+    os.replace(temp_path, history_path)
+
+
+def estimate(event: Event) -> dict[const.Phase, Optional[float]]:
+    """
+    Estimate the durations of the phases of a deployment, from its previous runs,
+    or from the median of all recorded runs if it never ran.
+
+    :param event: The event.
+    :return: Mapping of phases to seconds, None for phases without any history.
+    """
+    history = load()
+    recorded = history.get(fingerprint.get_key(event), {})
+
+    estimates: dict[const.Phase, Optional[float]] = {}
+    for phase in const.Phase:
+        if phase.value in recorded:
+            estimates[phase] = recorded[phase.value]
+            continue
+
+        others = [durations[phase.value] for durations in history.values() if phase.value in durations]
+        estimates[phase] = statistics.median(others) if others else None
+
+    return estimates
+
+
+def load() -> dict[str, dict[str, float]]:
+    """
+    Load the recorded durations.
+
+    :return: Mapping of deployment keys to mappings of phases to seconds.
+    """
+    try:
+        with open(workdir.get_root() / const.HISTORY_FILE, "r", encoding="utf-8") as history_file:
+            return json.load(history_file)
+    except FileNotFoundError:
+        return {}
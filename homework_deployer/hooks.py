@@ -0,0 +1,148 @@
+"""
+Pre-push verification hooks - commands of an event (e.g. the starter tests), run in the committed destination tree
+before it is pushed.
+
+The hooks which passed are remembered by the hash of the tree and the commands, in a file under the work root,
+so resumed runs and identical deployments do not run them again. Hooks of different events run in parallel,
+up to a limit shared by all processes.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import signal
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+from git import Repo
+
+import homework_deployer.constants as const
+import homework_deployer.limiter as limiter
+import homework_deployer.settings as settings
+import homework_deployer.workdir as workdir
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+HOOKS_SLOT = "hooks"
+OUTPUT_TAIL = 2000  # Characters of the output of a failed hook kept in the error
+
+
+def verify(event: Event, repo: Repo) -> None:
+    """
+    Run the hooks of an event in the working tree of the destination, unless they already passed for its tree.
+
+    :param event: The event.
+    :param repo: The destination repository, with the deployed files committed.
+    :raises HookError: If a hook fails or the time limit is exceeded.
+    """
+    if len(event.hooks) == 0:
+        return
+    if not repo.head.is_valid():
+        logger.info("Event %s: Nothing committed, skipping the hooks", event.id)
+        return
+
+    tree_sha = repo.head.commit.tree.hexsha
+    key = get_key(tree_sha, event.hooks)
+    if key in load():
+        logger.info("Event %s: Hooks already passed for tree %s", event.id, tree_sha)
+        return
+
+    hook_settings = settings.get().hooks
+    timeout = event.hook_timeout or hook_settings.timeout
+    locks_dir = workdir.get_root() / const.LOCKS_DIR
+    locks_dir.mkdir(parents=True, exist_ok=True)
+
+    with limiter.acquire_slot(locks_dir, HOOKS_SLOT, hook_settings.max_parallel):
+        # The time limit is shared by all hooks of the event, and starts when a slot is acquired
+        deadline = time.monotonic() + timeout
+        for command in event.hooks:
+            logger.info("Event %s: Running hook: %s", event.id, command)
+            run_hook(command, Path(str(repo.working_dir)), deadline, timeout)
+
+    # Leftovers of the hooks, e.g. caches, must not end up in later commits of the clone
+    repo.git.reset("--hard")
+    repo.git.clean("-fdx")
+    record(key, tree_sha)
+    logger.info("Event %s: Hooks passed for tree %s", event.id, tree_sha)
+
+
+def run_hook(command: str, working_dir: Path, deadline: float, timeout: float) -> None:
+    """
+    Run a single hook command in a shell. On timeout, the whole process group of the hook is killed.
+
+    :param command: The shell command.
+    :param working_dir: The directory the command runs in.
+    :param deadline: The monotonic time by which the command has to finish.
+    :param timeout: The time limit of all hooks, used in the error message.
+    :raises HookError: If the command fails or does not finish in time.
+    """
+    with subprocess.Popen(
+        command,
+        shell=True,
+        cwd=working_dir,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    ) as process:
+        try:
+            output, _ = process.communicate(timeout=max(deadline - time.monotonic(), 0))
+        except subprocess.TimeoutExpired as error:
+            os.killpg(process.pid, signal.SIGKILL)
+            process.communicate()
+            raise HookError(f"Hook '{command}' did not finish in {timeout:g}s") from error
+
+    if process.returncode != 0:
+        tail = output.decode("utf-8", "replace")[-OUTPUT_TAIL:].strip()
+        raise HookError(f"Hook '{command}' failed with exit code {process.returncode}:\n{tail}")
+
+
+def get_key(tree_sha: str, commands: list[str]) -> str:
+    """
+    Get the cache key of the hooks of a tree.
+
+    :param tree_sha: The object id of the verified tree.
+    :param commands: The hook commands.
+    :return: The key.
+    """
+    return hashlib.sha256(json.dumps([tree_sha, commands]).encode("utf-8")).hexdigest()
+
+
+def record(key: str, tree_sha: str) -> None:
+    """
+    Remember that the hooks passed.
+
+    :param key: The cache key of the hooks and the tree.
+    :param tree_sha: The object id of the verified tree, kept for reference.
+    """
+    passed = load()
+    passed[key] = {"tree": tree_sha, "timestamp": time.time()}
+
+    # Concurrent runs may overwrite each other's records, which only costs running some hooks again
+    hooks_path = workdir.get_root() / const.HOOKS_FILE
+    temp_path = hooks_path.with_name(f"{hooks_path.name}.{os.getpid()}.{threading.get_ident()}")
+    with open(temp_path, "w", encoding="utf-8") as hooks_file:
+        json.dump(passed, hooks_file)
+    os.replace(temp_path, hooks_path)
+
+
+def load() -> dict[str, dict[str, object]]:
+    """
+    Load the hooks which passed.
+
+    :return: Mapping of cache keys to the verified tree and the time of the verification.
+    """
+    try:
+        with open(workdir.get_root() / const.HOOKS_FILE, "r", encoding="utf-8") as hooks_file:
+            return json.load(hooks_file)
+    except FileNotFoundError:
+        return {}
+
+
+class HookError(Exception):
+    """
+    Custom exception for hooks which failed or timed out.
+    """
@@ -0,0 +1,153 @@
+"""
+Cross-process limits for git network operations, based on file locks.
+
+Every remote host has a number of slot lock files - holding a lock on one of them allows a single operation
+against the host. Additionally, a token bucket, stored in a file next to the slots, limits the rate at which
+operations are started.
+"""
+
+import fcntl
+import json
+import logging
+import random
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+from urllib.parse import urlparse
+
+import homework_deployer.constants as const
+import homework_deployer.settings as settings
+import homework_deployer.workdir as workdir
+from homework_deployer.settings import HostLimit
+
+logger = logging.getLogger("homework_deployer")
+
+POLL_INTERVAL = 0.2
+LOCAL_HOST = "local"
+
+
+@contextmanager
+def limit(url: str) -> Iterator[None]:
+    """
+    Wait until an operation against the host of the given URL is allowed, and hold it until the context exits.
+
+    :param url: The URL of the remote repository.
+    """
+    host = get_host(url)
+    host_limit = settings.get().get_host_limit(host)
+    locks_dir = workdir.get_root() / const.LOCKS_DIR
+    locks_dir.mkdir(parents=True, exist_ok=True)
+
+    start = time.monotonic()
+    with acquire_slot(locks_dir, host, host_limit.max_concurrent):
+        take_token(locks_dir, host, host_limit)
+
+        waited = time.monotonic() - start
+        if waited > POLL_INTERVAL:
+            logger.info("Waited %.1fs for a free slot on %s", waited, host)
+        yield
+
+
+def get_host(url: str) -> str:
+    """
+    Extract the host from a git remote URL. Supports the URL and the scp-like syntax.
+
+    :param url: The URL of the remote repository.
+    :return: The host name, or 'local' for local paths.
+    """
+    if "://" in url:
+        host = urlparse(url).hostname or LOCAL_HOST
+    elif re.match(r"^[^/]+:", url):
+        host = url.split(":", 1)[0].split("@")[-1]
+    else:
+        host = LOCAL_HOST
+
+    return host.lower()
+
+
+@contextmanager
+def acquire_slot(locks_dir: Path, host: str, max_concurrent: int) -> Iterator[None]:
+    """
+    Acquire one of the concurrency slots of a host, waiting until one is free.
+
+    :param locks_dir: Directory containing the lock files.
+    :param host: The remote host name.
+    :param max_concurrent: Number of slots for the host.
+    """
+    name = _safe_name(host)
+    while True:
+        for slot in range(max(max_concurrent, 1)):
+            slot_file = open(locks_dir / f"{name}.{slot}.lock", "a+", encoding="utf-8")  # pylint: disable=R1732
+            try:
+                fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                slot_file.close()
+                continue
+
+            try:
+                yield
+            finally:
+                fcntl.flock(slot_file, fcntl.LOCK_UN)
+                slot_file.close()
+            return
+
+        time.sleep(POLL_INTERVAL * random.uniform(0.5, 1.5))
+
+
+def take_token(locks_dir: Path, host: str, host_limit: HostLimit) -> None:
+    """
+    Take a token from the bucket of a host, waiting until one is available.
+
+    :param locks_dir: Directory containing the bucket files.
+    :param host: The remote host name.
+    :param host_limit: The limits of the host.
+    """
+    if host_limit.rate <= 0:
+        return
+
+    bucket_path = locks_dir / f"{_safe_name(host)}.bucket"
+    while True:
+        with open(bucket_path, "a+", encoding="utf-8") as bucket_file:
+            fcntl.flock(bucket_file, fcntl.LOCK_EX)
+            wait = _update_bucket(bucket_file, host_limit)
+
+        if wait <= 0:
+            return
+        time.sleep(wait)
+
+
+def _update_bucket(bucket_file: IO[str], host_limit: HostLimit) -> float:
+    """
+    Refill the bucket according to the elapsed time and take a token if there is one.
+    The caller must hold the lock of the file.
+
+    :param bucket_file: The opened bucket file.
+    :param host_limit: The limits of the host.
+    :return: 0 if a token was taken, otherwise the time to wait for the next one.
+    """
+    now = time.time()
+    bucket_file.seek(0)
+    content = bucket_file.read()
+    state = json.loads(content) if content else {"tokens": host_limit.burst, "timestamp": now}
+
+    elapsed = max(now - state["timestamp"], 0)
+    tokens = min(float(host_limit.burst), state["tokens"] + elapsed * host_limit.rate)
+
+    wait = 0.0
+    if tokens >= 1:
+        tokens -= 1
+    else:
+        wait = (1 - tokens) / host_limit.rate
+
+    bucket_file.seek(0)
+    bucket_file.truncate()
+    json.dump({"tokens": tokens, "timestamp": now}, bucket_file)
+    bucket_file.flush()
+
+    return wait
+
+
+def _safe_name(host: str) -> str:
+    return re.sub(r"[^A-Za-z0-9.-]", "_", host)
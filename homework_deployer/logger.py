@@ -1,21 +1,169 @@
+"""
+Logging setup of the application.
+
+Records are put on a queue by the caller and written to the file by a background listener thread,
+so the deployment never waits for log I/O. The file is rotated under a file lock, so concurrent runs
+share a single rotation instead of each of them rotating the file on its own.
+"""
+
+import atexit
+import contextvars
+import fcntl
+import json
 import logging
+import os
+import queue
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from typing import Iterator, Optional
+
+import homework_deployer.settings as settings
+from homework_deployer.settings import LogSettings
 
-from logging.handlers import RotatingFileHandler
+event_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("event_id", default=None)
+run_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("run_id", default=None)
 
 
 def setup_logger() -> None:
+    """
+    Set up the application logger to write to the log file through a queue.
+    Calling it more than once has no effect.
+    """
     logger = logging.getLogger("homework_deployer")
     logger.setLevel(logging.DEBUG)
 
-    file_format = "%(asctime)s - %(levelname)s - %(message)s"
-    file_handler = RotatingFileHandler(
-        filename="homework_deployer.log",
-        maxBytes=0,  # No size limit
-        backupCount=19,  # -1 because the main file counts as one
-    )
+    if any(isinstance(handler, QueueHandler) for handler in logger.handlers):
+        return
+
+    log_settings = settings.get().log
+    file_handler = build_file_handler(log_settings)
     file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(logging.Formatter(file_format))
-    # Force a rollover on startup to create a new log file each time
-    file_handler.doRollover()
+    if log_settings.format == "json":
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    logger.addHandler(queue_handler)
+
+
+def build_file_handler(log_settings: LogSettings) -> logging.FileHandler:
+    """
+    Create the rotating file handler, as configured in the settings.
+
+    :param log_settings: The log settings.
+    :return: The file handler.
+    """
+    if log_settings.rotation == "time":
+        return LockedTimedRotatingFileHandler(
+            log_settings.path, when=log_settings.when, backupCount=log_settings.backup_count
+        )
+
+    return LockedRotatingFileHandler(
+        log_settings.path, maxBytes=log_settings.max_bytes, backupCount=log_settings.backup_count
+    )
+
+
+@contextmanager
+def log_context(event_id: str, run_id: Optional[str] = None) -> Iterator[None]:
+    """
+    Add the event and run ids to all records logged within the context.
+
+    :param event_id: The ID of the event.
+    :param run_id: The ID of the run.
+    """
+    event_token = event_id_var.set(event_id)
+    run_token = run_id_var.set(run_id)
+    try:
+        yield
+    finally:
+        run_id_var.reset(run_token)
+        event_id_var.reset(event_token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Attach the event and run ids of the current context to the records.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.event_id = event_id_var.get()
+        record.run_id = run_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as JSON lines.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "event_id": getattr(record, "event_id", None),
+            "run_id": getattr(record, "run_id", None),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class LockedRotatingFileHandler(RotatingFileHandler):
+    """
+    Size-based rotating file handler, safe to use from multiple processes.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        with _rotation_lock(self.baseFilename):
+            _reopen_if_rotated(self)
+            super().emit(record)
+
+
+class LockedTimedRotatingFileHandler(TimedRotatingFileHandler):
+    """
+    Time-based rotating file handler, safe to use from multiple processes.
+    """
+
+    def emit(self, record: logging.LogRecord) -> None:
+        with _rotation_lock(self.baseFilename):
+            if _reopen_if_rotated(self):
+                # Another process already rotated for the current interval
+                self.rolloverAt = self.computeRollover(int(record.created))
+            super().emit(record)
+
+
+@contextmanager
+def _rotation_lock(filename: str) -> Iterator[None]:
+    with open(f"{filename}.lock", "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _reopen_if_rotated(handler: logging.FileHandler) -> bool:
+    """
+    Reopen the log file if another process rotated it since it was opened.
+
+    :param handler: The file handler.
+    :return: True if the file was reopened, False otherwise.
+    """
+    if handler.stream is None:
+        return False
+
+    try:
+        is_rotated = os.stat(handler.baseFilename).st_ino != os.fstat(handler.stream.fileno()).st_ino
+    except FileNotFoundError:
+        is_rotated = True
 
-    logger.addHandler(file_handler)
+    if is_rotated:
+        handler.stream.close()
+        handler.stream = handler._open()  # pylint: disable=W0212
+    return is_rotated
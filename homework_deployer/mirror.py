@@ -0,0 +1,83 @@
+"""
+Local bare mirrors of remote repositories, kept under the work root.
+They allow looking up objects of a remote repository without cloning it into a working tree.
+"""
+
+import fcntl
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from git import Git, Repo
+
+import homework_deployer.constants as const
+import homework_deployer.limiter as limiter
+import homework_deployer.workdir as workdir
+
+
+def get_path(url: str) -> Path:
+    """
+    Get the path of the mirror of a repository.
+
+    :param url: The URL of the repository.
+    :return: The path to the mirror.
+    """
+    name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return workdir.get_root() / const.MIRRORS_DIR / f"{name}.git"
+
+
+def update(url: str) -> Repo:
+    """
+    Create the mirror of a repository, or fetch the latest changes into an existing one.
+
+    :param url: The URL of the repository.
+    :return: The Repo object of the mirror.
+    """
+    mirror_path = get_path(url)
+    mirror_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with _mirror_lock(mirror_path), limiter.limit(url):
+        if mirror_path.exists():
+            repo = Repo(mirror_path)
+            repo.git.fetch("--prune", "origin")
+        else:
+            repo = Repo.clone_from(url, str(mirror_path), mirror=True)
+
+    return repo
+
+
+def get_ref(branch: Optional[str]) -> str:
+    """
+    Get the full name of a branch.
+
+    :param branch: The branch name, or None for the default branch.
+    :return: The ref, HEAD for the default branch.
+    """
+    return "HEAD" if branch is None else f"refs/heads/{branch}"
+
+
+def ls_remote(url: str, ref: str = "HEAD") -> Optional[str]:
+    """
+    Get the commit a remote ref points to, without fetching anything.
+
+    :param url: The URL of the repository.
+    :param ref: The ref to look up.
+    :return: The commit SHA, or None if the ref does not exist.
+    """
+    with limiter.limit(url):
+        output = str(Git().ls_remote(url, ref))
+
+    for line in output.splitlines():
+        sha, name = line.split("\t", 1)
+        if name == ref:
+            return sha
+
+    return None
+
+
+@contextmanager
+def _mirror_lock(mirror_path: Path) -> Iterator[None]:
+    with open(f"{mirror_path}.lock", "a", encoding="utf-8") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
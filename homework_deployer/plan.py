@@ -0,0 +1,213 @@
+"""
+Plans of deployments - the changes a deployment would make to its destination, computed from the objects
+in the mirrors of both repositories, without cloning or writing anything.
+
+Symlinks are followed as by the copy of a deployment, which deploys the files they point to.
+"""
+
+import hashlib
+import posixpath
+import stat
+from typing import NamedTuple, Optional
+
+from git import Repo
+from gitdb.exc import BadName
+
+import homework_deployer.backend as backend
+import homework_deployer.constants as const
+import homework_deployer.history as history
+import homework_deployer.mirror as mirror
+import homework_deployer.transform as transform
+import homework_deployer.tree as tree
+from homework_deployer.event import Event
+
+ADDED = "added"
+MODIFIED = "modified"
+UNCHANGED = "unchanged"
+
+MAX_LINK_HOPS = 40  # As SYMLOOP_MAX on Linux
+
+
+class PathChange(NamedTuple):
+    """
+    The change of a single destination path.
+    """
+
+    path: str
+    status: str
+    size: int  # Bytes of the deployed content
+
+
+class Plan(NamedTuple):
+    """
+    The changes a deployment would make to its destination.
+    """
+
+    origin_commit: str
+    destination_commit: Optional[str]
+    changes: list[PathChange]
+    push_size: int  # Bytes of the added and modified files, before compression
+    durations: dict[const.Phase, Optional[float]]  # Estimated seconds per phase
+
+    def count(self, status: str) -> int:
+        """
+        Count the paths with a given status.
+
+        :param status: ADDED, MODIFIED or UNCHANGED.
+        :return: The number of paths.
+        """
+        return sum(1 for change in self.changes if change.status == status)
+
+
+def plan(event: Event) -> Plan:
+    """
+    Compute the changes a deployment would make to its destination.
+
+    :param event: The event.
+    :return: The plan of the deployment.
+    """
+    origin_repo = mirror.update(event.origin)
+    destination_repo = mirror.update(event.destination)
+
+    origin_commit = origin_repo.commit(mirror.get_ref(event.origin_ref)).hexsha
+    origin_entries = tree.list_tree(origin_repo, origin_commit)
+    destination_commit = get_commit(destination_repo, mirror.get_ref(event.destination_ref))
+    destination_entries = tree.list_tree(destination_repo, destination_commit) if destination_commit else {}
+
+    mapping = tree.map_paths(event.patterns, origin_entries)
+    changes = []
+    for path, source in sorted(resolve_sources(origin_repo, origin_commit, mapping, origin_entries).items()):
+        mode, sha, size = get_deployed_blob(origin_repo, origin_commit, source, origin_entries, event)
+        existing = destination_entries.get(path)
+        if existing is None or existing.type != "blob":
+            changes.append(PathChange(path, ADDED, size))
+        elif (existing.mode, existing.sha) != (mode, sha):
+            changes.append(PathChange(path, MODIFIED, size))
+        else:
+            changes.append(PathChange(path, UNCHANGED, size))
+
+    push_size = sum(change.size for change in changes if change.status != UNCHANGED)
+
+    return Plan(origin_commit, destination_commit, changes, push_size, history.estimate(event))
+
+
+def get_commit(repo: Repo, ref: str) -> Optional[str]:
+    """
+    Get the commit a ref points to.
+
+    :param repo: The repository.
+    :param ref: The ref.
+    :return: The commit SHA, or None if the ref does not exist, e.g. a new branch or a repository without commits.
+    """
+    try:
+        return repo.commit(ref).hexsha
+    except (BadName, ValueError):
+        return None
+
+
+def resolve_sources(
+    repo: Repo, commit: str, mapping: dict[str, str], entries: dict[str, tree.TreeEntry]
+) -> dict[str, str]:
+    """
+    Expand the symlinked directories among the mapped source paths to the files they contain, as the copy walks them.
+
+    :param repo: A repository containing the commit.
+    :param commit: The origin commit.
+    :param mapping: Mapping of destination paths to source paths, as returned by tree.map_paths.
+    :param entries: The tree entries of the commit.
+    :return: Mapping of destination paths to source paths, which may lead through symlinked directories.
+    """
+    sources = {}
+    pending = [(path, source, frozenset[str]()) for path, source in mapping.items()]
+    while pending:
+        path, source, walked = pending.pop()
+        target = resolve_link(repo, commit, source, entries)
+        if target is None or target not in entries or entries[target].type != "tree":
+            sources[path] = source
+        elif target not in walked:  # A symlink to one of its parents would be walked forever
+            pending.extend(
+                (f"{path}/{relative}", f"{source}/{relative}", walked | {target})
+                for relative in (posixpath.relpath(blob, target) for blob in tree.expand_blobs([target], entries))
+            )
+
+    return sources
+
+
+def resolve_link(
+    repo: Repo, commit: str, path: str, entries: dict[str, tree.TreeEntry], is_following_last: bool = True
+) -> Optional[str]:
+    """
+    Resolve the symlinks of a path in a commit, as the file system resolves them in a checkout.
+
+    :param repo: A repository containing the commit.
+    :param commit: The commit.
+    :param path: The path, relative to the root of the repository.
+    :param entries: The tree entries of the commit.
+    :param is_following_last: Whether a symlink in the last part of the path is followed too.
+    :return: The resolved path, or None if it leads out of the repository or the symlinks form a loop.
+    """
+    parts = path.split("/")
+    resolved: list[str] = []
+    hops = 0
+    while parts:
+        part = parts.pop(0)
+        if part in ("", "."):
+            continue
+        if part == "..":
+            if not resolved:
+                return None
+            resolved.pop()
+            continue
+
+        current = "/".join([*resolved, part])
+        entry = entries.get(current)
+        if entry is None or not stat.S_ISLNK(int(entry.mode, 8)) or (not parts and not is_following_last):
+            resolved.append(part)
+            continue
+
+        hops += 1
+        link = backend.get().read_blob(repo, commit, current).decode(transform.ENCODING, transform.ERRORS)
+        if hops > MAX_LINK_HOPS or link.startswith("/"):
+            return None
+        parts = link.split("/") + parts
+
+    return "/".join(resolved)
+
+
+def get_deployed_blob(
+    repo: Repo, commit: str, source: str, entries: dict[str, tree.TreeEntry], event: Event
+) -> tuple[str, str, int]:
+    """
+    Get the mode, object id and size a source file would have in the destination.
+    Symlinks are replaced with the files they point to, which are copied as they are.
+    Other files matched by transforms are read and transformed, to compute the object id of their new content.
+
+    :param repo: A repository containing the commit.
+    :param commit: The origin commit.
+    :param source: The path of the file in the commit, which may lead through symlinked directories.
+    :param entries: The tree entries of the commit.
+    :param event: The event.
+    :return: The mode, object id and size of the deployed file.
+    """
+    path = resolve_link(repo, commit, source, entries, False) or source
+    target = resolve_link(repo, commit, source, entries)
+    if target is None or target not in entries:  # Dangling symlinks are planned as they are, the copy fails on them
+        target = path
+    entry = entries[target]
+
+    pipeline = transform.get_pipeline(event.transforms, source)
+    if pipeline is None or stat.S_ISLNK(int(entries[path].mode, 8)):
+        return entry.mode, entry.sha, entry.size
+
+    content = transform.transform_bytes(backend.get().read_blob(repo, commit, target), pipeline)
+    return entry.mode, get_blob_id(content), len(content)
+
+
+def get_blob_id(content: bytes) -> str:
+    """
+    Calculate the git object id of a blob.
+
+    :param content: The content of the blob.
+    :return: The object id.
+    """
+    return hashlib.sha1(b"blob %d\0" % len(content) + content, usedforsecurity=False).hexdigest()
@@ -0,0 +1,139 @@
+"""
+Reconciliation of the registered events with the queue of scheduled 'at' jobs.
+
+The store and the queue drift apart - jobs run, are removed by hand, or fail to be submitted. The queue is
+read once, the store is read once, and the two are compared as sets of job ids. All changes of the store
+are then written at once.
+
+A past event whose job is gone is only removed if its fingerprint shows it was deployed since its date.
+Otherwise its run failed (or never started), and the event stays registered for a retry or a resume.
+Events whose configs do not load anymore are reported and left unchanged, together with their jobs -
+a broken config is fixed, not a reason to cancel a scheduled deployment.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, NamedTuple, Optional
+
+import homework_deployer.at as at
+import homework_deployer.db as db
+import homework_deployer.fingerprint as fingerprint
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+
+class Plan(NamedTuple):
+    """
+    Changes needed to bring the store in line with the queue.
+    """
+
+    resubmitted: dict[str, Event]  # Future events whose jobs are missing
+    past: list[str]  # Past events whose jobs are gone, deployed since their dates
+    pending: list[str]  # Past events whose jobs are gone without a deployment, left registered
+    invalid: list[str]  # Events which cannot be loaded anymore, left unchanged
+    kept: list[str]
+
+
+class Report(NamedTuple):
+    """
+    Result of a reconciliation.
+    """
+
+    resubmitted: list[str]
+    failed: list[str]  # Events whose jobs could not be submitted again, left unchanged
+    past: list[str]
+    pending: list[str]
+    invalid: list[str]
+    kept: list[str]
+
+
+def plan(
+    entries: dict[str, db.Entry],
+    jobs: dict[int, str],
+    get_event: Callable[[str], Event],
+    fingerprints: dict[str, dict[str, Any]],
+    now: datetime,
+) -> Plan:
+    """
+    Compare the store with a snapshot of the queue.
+
+    :param entries: The loaded store.
+    :param jobs: The snapshot of the queue, mapping job ids to execution times.
+    :param get_event: Loads a registered event by its id, raising OSError or ValueError if it is invalid.
+    :param fingerprints: The loaded fingerprints of the successful deployments.
+    :param now: The current time, naive and local.
+    :return: The changes to make.
+    """
+    missing_ids = {at_id for at_id, _, _ in entries.values()} - jobs.keys()
+
+    resubmitted: dict[str, Event] = {}
+    past: list[str] = []
+    pending: list[str] = []
+    invalid: list[str] = []
+    kept: list[str] = []
+    for event_id, (at_id, _, _) in sorted(entries.items()):
+        try:
+            event = get_event(event_id)
+        except (OSError, ValueError) as error:
+            logger.warning("Event %s: Cannot be loaded, keeping it: %s", event_id, error)
+            invalid.append(event_id)
+            continue
+
+        if at_id not in missing_ids:
+            kept.append(event_id)
+        elif event.date > _localize(now, event):
+            resubmitted[event_id] = event
+        elif _is_deployed(fingerprints, event):
+            past.append(event_id)
+        else:
+            logger.warning("Event %s: The job is gone, but the event was not deployed, keeping it", event_id)
+            pending.append(event_id)
+
+    return Plan(resubmitted, past, pending, invalid, kept)
+
+
+def reconcile(db_path: str, get_event: Callable[[str], Event], now: Optional[datetime] = None) -> Optional[Report]:
+    """
+    Bring the store in line with the queue of scheduled jobs.
+    Missing jobs of future events are submitted again, and deployed past events whose jobs are gone are removed.
+    Past events which were not deployed and events which cannot be loaded are kept. Jobs which are not referenced
+    by the store are left alone, since they may not belong to this tool.
+
+    :param db_path: Path to the database file. The caller holds its lock.
+    :param get_event: Loads a registered event by its id, raising OSError or ValueError if it is invalid.
+    :param now: The current time, defaults to now.
+    :return: The report, or None if the queue cannot be read.
+    """
+    jobs = at.list_jobs()
+    if jobs is None:
+        return None
+
+    entries = db.load(db_path)
+    changes = plan(entries, jobs, get_event, fingerprint.load(), now or datetime.now())
+
+    with ThreadPoolExecutor() as pool:
+        at_ids = dict(zip(changes.resubmitted, pool.map(at.register, changes.resubmitted.values())))
+
+    updated: dict[str, db.Entry] = {
+        event_id: (at_id, entries[event_id][1], entries[event_id][2])
+        for event_id, at_id in at_ids.items()
+        if at_id is not None
+    }
+    failed = sorted(event_id for event_id, at_id in at_ids.items() if at_id is None)
+
+    db.apply(db_path, updated, set(changes.past))
+
+    return Report(sorted(updated), failed, changes.past, changes.pending, changes.invalid, changes.kept)
+
+
+def _is_deployed(fingerprints: dict[str, dict[str, Any]], event: Event) -> bool:
+    deployed_at = fingerprint.get_deployed_at(fingerprints, event)
+    return deployed_at is not None and deployed_at.timestamp() >= event.date.timestamp()
+
+
+def _localize(now: datetime, event: Event) -> datetime:
+    if event.date.tzinfo is None:
+        return now
+    return now.astimezone(event.date.tzinfo)
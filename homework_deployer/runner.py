@@ -0,0 +1,217 @@
+"""
+Runner of multiple deployment events, ordered by their dependencies.
+
+The events form a DAG - independent branches run in parallel, an event runs only after all of its
+dependencies succeeded, and the dependents of a failed event are skipped.
+"""
+
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+import homework_deployer.constants as const
+import homework_deployer.limiter as limiter
+import homework_deployer.workdir as workdir
+from homework_deployer.admission import Admission
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+
+def run_graph(
+    events: dict[str, Event],
+    run: Callable[[Event], None],
+    max_workers: int,
+    admission: Optional[Admission] = None,
+) -> dict[str, const.Outcome]:
+    """
+    Run events in the order given by their dependencies.
+    Dependencies on events outside of the given ones are considered satisfied.
+
+    :param events: Mapping of event ids to events.
+    :param run: Runs a single event, raising an exception on failure.
+    :param max_workers: Maximum number of events running at the same time.
+    :param admission: Limits the ready events which start, by their estimated cost. All of them start if not given.
+    :return: Mapping of event ids to their outcomes.
+    """
+    dependencies = {
+        event_id: {dependency for dependency in event.depends_on if dependency in events}
+        for event_id, event in events.items()
+    }
+    outcomes: dict[str, const.Outcome] = {}
+    running: dict[Future[None], str] = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while len(outcomes) < len(events):
+            ready = get_ready(dependencies, outcomes, running.values())
+            if admission is not None:
+                # Only events which get a worker right away are admitted, so queued events hold no budget
+                ready = admission.admit(ready, max_workers - len(running))
+            for event_id in ready:
+                running[pool.submit(run, events[event_id])] = event_id
+
+            if not running:
+                for event_id in sorted(events.keys() - outcomes.keys()):
+                    logger.error("Event %s: Skipped, its dependencies form a cycle", event_id)
+                    outcomes[event_id] = const.Outcome.SKIPPED
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                event_id = running.pop(future)
+                if admission is not None:
+                    admission.release(event_id)
+                error = future.exception()
+                if error is None:
+                    outcomes[event_id] = const.Outcome.SUCCEEDED
+                    continue
+
+                logger.error("Event %s: Failed: %s", event_id, error, exc_info=error)
+                outcomes[event_id] = const.Outcome.FAILED
+                skip_dependents(event_id, dependencies, outcomes)
+
+    return outcomes
+
+
+def get_ready(
+    dependencies: dict[str, set[str]], outcomes: dict[str, const.Outcome], running: Iterable[str]
+) -> list[str]:
+    """
+    Find the events which can start - not started yet, and with all of their dependencies succeeded.
+
+    :param dependencies: Mapping of event ids to the ids of their dependencies.
+    :param outcomes: The outcomes of the finished events.
+    :param running: The ids of the running events.
+    :return: The ids of the events to start.
+    """
+    started = set(outcomes) | set(running)
+    return [
+        event_id
+        for event_id, event_dependencies in sorted(dependencies.items())
+        if event_id not in started
+        and all(outcomes.get(dependency) == const.Outcome.SUCCEEDED for dependency in event_dependencies)
+    ]
+
+
+def skip_dependents(failed_id: str, dependencies: dict[str, set[str]], outcomes: dict[str, const.Outcome]) -> None:
+    """
+    Mark all direct and indirect dependents of a failed event as skipped.
+
+    :param failed_id: The id of the failed event.
+    :param dependencies: Mapping of event ids to the ids of their dependencies.
+    :param outcomes: The outcomes of the finished events, updated in place.
+    """
+    for event_id, event_dependencies in dependencies.items():
+        if failed_id in event_dependencies and event_id not in outcomes:
+            logger.warning("Event %s: Skipped, dependency %s did not succeed", event_id, failed_id)
+            outcomes[event_id] = const.Outcome.SKIPPED
+            skip_dependents(event_id, dependencies, outcomes)
+
+
+def exclude_blocked(events: dict[str, Event], registered_ids: set[str]) -> dict[str, Event]:
+    """
+    Remove the events which depend on registered events outside of the given ones, directly or indirectly.
+    Such dependencies have not run yet, so their dependents have to wait for a later run.
+
+    :param events: Mapping of event ids to events.
+    :param registered_ids: The ids of all registered events.
+    :return: The events which can run now.
+    """
+    runnable = dict(events)
+    is_changed = True
+    while is_changed:
+        blocked = {
+            event_id
+            for event_id, event in runnable.items()
+            if any(dependency in registered_ids and dependency not in runnable for dependency in event.depends_on)
+        }
+        for event_id in blocked:
+            logger.info("Event %s: Waiting for its dependencies to run", event_id)
+            del runnable[event_id]
+        is_changed = len(blocked) > 0
+
+    return runnable
+
+
+def is_due(event: Event, now: Optional[datetime] = None) -> bool:
+    """
+    Check if the date of an event has passed.
+
+    :param event: The event.
+    :param now: The current time, naive and local, defaults to now.
+    :return: True if the event is due.
+    """
+    if now is None:
+        return event.date <= datetime.now(event.date.tzinfo)
+    if event.date.tzinfo is not None:
+        now = now.astimezone(event.date.tzinfo)
+    return event.date <= now
+
+
+@contextmanager
+def lock_events(event_ids: Iterable[str]) -> Iterator[None]:
+    """
+    Hold the locks of events, shared by all processes, so that every event is deployed by one process at a time.
+    The locks are taken in the order of the ids, so processes locking overlapping events do not deadlock.
+
+    :param event_ids: The ids of the events.
+    """
+    locks_dir = workdir.get_root() / const.LOCKS_DIR
+    locks_dir.mkdir(parents=True, exist_ok=True)
+
+    with ExitStack() as stack:
+        for event_id in sorted(set(event_ids)):
+            stack.enter_context(limiter.acquire_slot(locks_dir, f"event_{event_id}", 1))
+        yield
+
+
+def collect_dependencies(
+    event_id: str, get_event: Callable[[str], Event], registered_ids: set[str]
+) -> dict[str, Event]:
+    """
+    Collect an event together with its registered dependencies, direct and indirect.
+
+    :param event_id: The id of the event.
+    :param get_event: Loads a registered event by its id.
+    :param registered_ids: The ids of all registered events.
+    :return: Mapping of event ids to events.
+    """
+    collected: dict[str, Event] = {}
+    pending = [event_id]
+    while pending:
+        current_id = pending.pop()
+        if current_id in collected:
+            continue
+        collected[current_id] = get_event(current_id)
+        pending.extend(dependency for dependency in collected[current_id].depends_on if dependency in registered_ids)
+
+    return collected
+
+
+def find_groups(events: dict[str, Event]) -> list[list[str]]:
+    """
+    Find events which can be deployed together - to different branches of the same destination,
+    from a single clone of it. Dry runs, and events with dependencies or dependents among the given ones,
+    are not grouped, so the groups do not change the order given by the dependencies.
+
+    :param events: Mapping of event ids to events.
+    :return: The groups of event ids, each with at least two events.
+    """
+    linked = {
+        linked_id
+        for event_id, event in events.items()
+        for dependency in event.depends_on
+        if dependency in events
+        for linked_id in (event_id, dependency)
+    }
+
+    branches: dict[str, dict[str, str]] = {}
+    for event_id, event in sorted(events.items()):
+        if event.destination_ref is None or event.is_dry_run or event_id in linked:
+            continue
+        # Only the first event of each branch is grouped, the others run on their own
+        branches.setdefault(event.destination, {}).setdefault(event.destination_ref, event_id)
+
+    return [sorted(by_branch.values()) for _, by_branch in sorted(branches.items()) if len(by_branch) > 1]
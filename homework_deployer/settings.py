@@ -0,0 +1,127 @@
+"""
+Tool-wide settings, loaded from a JSON file.
+"""
+
+from functools import cache
+from typing import Literal
+
+from pydantic import BaseModel
+
+import homework_deployer.constants as const
+
+
+class HostLimit(BaseModel):
+    """
+    Limits for the git network operations against a single remote host.
+    """
+
+    max_concurrent: int = 4
+    rate: float = 0  # Operations per second, 0 means unlimited
+    burst: int = 1
+
+
+class PushRetry(BaseModel):
+    """
+    Retry policy for pushes rejected because the destination moved.
+    """
+
+    max_attempts: int = 5
+    base_delay: float = 1.0  # Seconds, doubled on every attempt
+    max_delay: float = 30.0
+
+
+class DiskSpace(BaseModel):
+    """
+    Policy for runs which may not fit in the free space of the work root.
+    """
+
+    action: Literal["refuse", "queue"] = "refuse"
+    queue_timeout: float = 600  # Seconds to wait for free space before refusing
+    poll_interval: float = 10
+    margin: float = 1.5  # Multiplier of the estimated size
+    default_repo_size: int = 100 * 1024 * 1024  # Bytes, used for repos never cloned before
+
+
+class HookSettings(BaseModel):
+    """
+    Limits for the pre-push hooks of events.
+    """
+
+    timeout: float = 600  # Seconds for all hooks of an event, used by events without their own limit
+    max_parallel: int = 2  # Events running their hooks at the same time, across all processes
+
+
+class AdmissionSettings(BaseModel):
+    """
+    Budget of the deployments of a batch running at the same time.
+    """
+
+    disk_budget: int = 0  # Bytes, 0 means the free space of the work root
+    memory_budget: int = 0  # Bytes, 0 means the available memory
+    memory_per_run: int = 256 * 1024 * 1024  # Bytes used by a deployment besides the files it copies
+
+
+class LogSettings(BaseModel):
+    """
+    Log file output and rotation.
+    """
+
+    path: str = "homework_deployer.log"
+    format: Literal["text", "json"] = "text"
+    rotation: Literal["size", "time"] = "size"
+    max_bytes: int = 10 * 1024 * 1024  # Used by size rotation
+    when: str = "midnight"  # Used by time rotation, as in TimedRotatingFileHandler
+    backup_count: int = 19
+
+
+class Settings(BaseModel):
+    """
+    Settings model.
+    """
+
+    work_root: str = const.WORK_DIR
+    failed_run_retention_days: float = 7
+    disk_space: DiskSpace = DiskSpace()
+    log: LogSettings = LogSettings()
+    sync_interval: float = 300  # Seconds, used by events without their own interval
+    max_parallel_runs: int = 4
+    git_backend: Literal["gitpython", "batch"] = "gitpython"
+    hooks: HookSettings = HookSettings()
+    admission: AdmissionSettings = AdmissionSettings()
+
+    default_host_limit: HostLimit = HostLimit()
+    host_limits: dict[str, HostLimit] = {}
+    push_retry: PushRetry = PushRetry()
+
+    def get_host_limit(self, host: str) -> HostLimit:
+        """
+        Get the limits for a given host, falling back to the default ones.
+
+        :param host: The remote host name.
+        :return: The limits for the host.
+        """
+        return self.host_limits.get(host, self.default_host_limit)
+
+
+def load(settings_path: str) -> Settings:
+    """
+    Load the settings from a JSON file. If the file does not exist, the defaults are used.
+
+    :param settings_path: Path to the settings file.
+    :return: The settings object.
+    """
+    try:
+        with open(settings_path, "r", encoding="utf-8") as settings_file:
+            return Settings.model_validate_json(settings_file.read())
+    except FileNotFoundError:
+        return Settings()
+
+
+@cache
+def get() -> Settings:
+    """
+    Get the settings of the application, loading them on first use.
+
+    :return: The settings object.
+    """
+    return load(const.SETTINGS_PATH)
@@ -0,0 +1,86 @@
+"""
+Validated snapshots of deployment events, stored in the event database at registration time.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Any
+
+from homework_deployer.event import Event, Transform
+
+
+def create(event: Event, config_path: str) -> dict[str, Any]:
+    """
+    Create a snapshot of an already validated event, together with the state of its source config.
+
+    :param event: The validated Event object.
+    :param config_path: Path to the configuration file the event was loaded from.
+    :return: A JSON-serializable snapshot.
+    """
+    return {
+        "event": event.model_dump(mode="json"),
+        "sha256": file_hash(config_path),
+        "mtime": os.stat(config_path).st_mtime_ns,
+    }
+
+
+def restore(snapshot: dict[str, Any], event_id: str) -> Event:
+    """
+    Build an Event from a snapshot, without running the validation again.
+
+    :param snapshot: A snapshot, as returned by create.
+    :param event_id: The id to assign to the event.
+    :return: The restored Event object.
+    """
+    fields = dict(snapshot["event"])
+    fields["date"] = datetime.fromisoformat(fields["date"])
+    fields["patterns"] = [tuple(pattern) for pattern in fields["patterns"]]
+    fields["transforms"] = [restore_transform(transform) for transform in fields.get("transforms", [])]
+
+    return Event.model_construct(id=event_id, **fields)
+
+
+def restore_transform(fields: dict[str, Any]) -> Transform:
+    """
+    Build a Transform from its dumped fields, without running the validation again.
+
+    :param fields: The dumped fields of the transform.
+    :return: The restored Transform object.
+    """
+    fields = dict(fields)
+    if fields.get("strip_markers") is not None:
+        fields["strip_markers"] = tuple(fields["strip_markers"])
+
+    return Transform.model_construct(**fields)
+
+
+def is_stale(snapshot: dict[str, Any], config_path: str) -> bool:
+    """
+    Check if the source config was changed after the snapshot was taken.
+    A missing config is not considered a change - the snapshot is used instead.
+
+    :param snapshot: A snapshot, as returned by create.
+    :param config_path: Path to the configuration file the event was loaded from.
+    :return: True if the config content differs from the snapshot, False otherwise.
+    """
+    try:
+        mtime = os.stat(config_path).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+    if mtime == snapshot["mtime"]:
+        return False
+
+    return file_hash(config_path) != snapshot["sha256"]
+
+
+def file_hash(path: str) -> str:
+    """
+    Calculate the SHA-256 hash of a file.
+
+    :param path: Path to the file.
+    :return: The hex digest of the file content.
+    """
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
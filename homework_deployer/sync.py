@@ -0,0 +1,293 @@
+"""
+Continuous sync of an event - the origin is polled, and only the paths which changed since the last
+deployment are applied to the destination, in a single commit per poll. Nothing is deployed before the date
+of the event.
+"""
+
+import logging
+import os
+import shutil
+import stat
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from git import Repo
+from git.exc import GitCommandError
+
+import homework_deployer.backend as backend
+import homework_deployer.fingerprint as fingerprint
+import homework_deployer.hooks as hooks
+import homework_deployer.limiter as limiter
+import homework_deployer.mirror as mirror
+import homework_deployer.runner as runner
+import homework_deployer.transform as transform
+import homework_deployer.tree as tree
+import homework_deployer.workdir as workdir
+from homework_deployer.archive import ArchiveError
+from homework_deployer.event import Event, Transform
+from homework_deployer.executor import (
+    PatternError,
+    PushError,
+    checkout_branch,
+    clone_repo,
+    commit_changes,
+    execute,
+    push_changes,
+)
+from homework_deployer.logger import log_context
+
+logger = logging.getLogger("homework_deployer")
+
+# Failures of a single poll, which the next poll may not have
+POLL_ERRORS = (
+    GitCommandError,
+    OSError,
+    ArchiveError,
+    PatternError,
+    PushError,
+    hooks.HookError,
+    transform.TransformError,
+    workdir.InsufficientSpaceError,
+)
+
+
+class Delta(NamedTuple):
+    """
+    Changes of the destination, caused by changes of the origin.
+    """
+
+    changed: dict[str, str]  # Destination path to source path, for added and modified files
+    deleted: list[str]
+
+
+def sync(event: Event, interval: float, is_once: bool = False) -> None:
+    """
+    Keep the destination of an event in sync with its origin.
+
+    :param event: The event to sync.
+    :param interval: Seconds between two polls of the origin.
+    :param is_once: Whether to stop after the first poll.
+    """
+    sync_dir = workdir.get_root() / f"sync_{fingerprint.get_key(event)[:16]}"
+
+    with log_context(event.id, sync_dir.name):
+        while True:
+            try:
+                sync_once(event, sync_dir)
+            except POLL_ERRORS as error:
+                if is_once:
+                    raise
+                logger.error("Event %s: Sync failed, retrying on the next poll: %s", event.id, error)
+
+            if is_once:
+                break
+            time.sleep(interval)
+
+
+def sync_once(event: Event, sync_dir: Path) -> bool:
+    """
+    Apply the changes of the origin since the last deployment to the destination.
+    If the event was never deployed, or the last deployed commit is gone, a full deployment is done instead.
+    Events which are not due yet are skipped.
+
+    :param event: The event to sync.
+    :param sync_dir: Directory for the clone of the destination, reused between polls.
+    :return: True if the destination was changed, False otherwise.
+    """
+    if not runner.is_due(event):
+        logger.info("Event %s: Not due until %s, skipping", event.id, event.date)
+        return False
+
+    recorded = fingerprint.load().get(fingerprint.get_key(event))
+    # Origins which are not cloned record no commit
+    if recorded is None or "origin_commit" not in recorded:
+        logger.info("Event %s: No deployed commit recorded, running a full deployment", event.id)
+        execute(event, event.is_dry_run, event.is_dry_run, is_force=True)
+        return True
+
+    origin_commit = mirror.ls_remote(event.origin, mirror.get_ref(event.origin_ref))
+    if origin_commit is None or origin_commit == recorded["origin_commit"]:
+        return False
+
+    origin_mirror = mirror.update(event.origin)
+    try:
+        delta = compute_delta(origin_mirror, recorded["origin_commit"], origin_commit, event)
+    except GitCommandError:
+        logger.warning("Event %s: Last deployed commit is gone, running a full deployment", event.id)
+        execute(event, event.is_dry_run, event.is_dry_run, is_force=True)
+        return True
+
+    destination_repo = prepare_destination(event, sync_dir)
+    if delta.changed or delta.deleted:
+        logger.info(
+            "Event %s: Syncing %d changed and %d deleted files from %s..%s",
+            event.id,
+            len(delta.changed),
+            len(delta.deleted),
+            recorded["origin_commit"][:7],
+            origin_commit[:7],
+        )
+        message = f"Automated sync for event {event.id} ({recorded['origin_commit'][:7]}..{origin_commit[:7]})"
+
+        def replay(repo: Repo) -> None:
+            destination_dir = Path(str(repo.working_dir))
+            apply_delta(origin_mirror, origin_commit, delta, destination_dir, event.transforms)
+            changed_paths = [destination_dir / path for path in [*delta.changed, *delta.deleted]]
+            commit_changes(repo, message, changed_paths)
+
+        def verify(repo: Repo) -> None:
+            hooks.verify(event, repo)
+
+        replay(destination_repo)
+        verify(destination_repo)
+        if event.is_dry_run:
+            logger.info("Event %s: Dry run, not pushing the sync commit", event.id)
+            return True
+        push_changes(destination_repo, replay, verify)
+
+    fingerprint.record(event, origin_mirror, origin_commit, destination_repo.head.commit.hexsha)
+    return bool(delta.changed or delta.deleted)
+
+
+def compute_delta(repo: Repo, old_commit: str, new_commit: str, event: Event) -> Delta:
+    """
+    Compute the changes of the destination paths of an event between two origin commits.
+
+    :param repo: A repository containing both commits.
+    :param old_commit: The last deployed origin commit.
+    :param new_commit: The current origin commit.
+    :param event: The event.
+    :return: The changes of the destination.
+    """
+    old_entries = tree.list_tree(repo, old_commit)
+    new_entries = tree.list_tree(repo, new_commit)
+    old_mapping = tree.map_paths(event.patterns, old_entries)
+    new_mapping = tree.map_paths(event.patterns, new_entries)
+
+    changed = {
+        destination: source
+        for destination, source in new_mapping.items()
+        if destination not in old_mapping
+        or old_entries[old_mapping[destination]][:3] != new_entries[source][:3]
+    }
+    deleted = sorted(set(old_mapping) - set(new_mapping))
+
+    return Delta(changed, deleted)
+
+
+def apply_delta(
+    repo: Repo, commit: str, delta: Delta, destination_dir: Path, transforms: Optional[list[Transform]] = None
+) -> None:
+    """
+    Write the changed files from a commit to the destination, and remove the deleted ones.
+
+    :param repo: A repository containing the commit.
+    :param commit: The origin commit.
+    :param delta: The changes of the destination.
+    :param destination_dir: The working tree of the destination.
+    :param transforms: Content transforms of the written files, if any.
+    """
+    entries = tree.list_tree(repo, commit)
+    git_backend = backend.get()
+    for destination, source in delta.changed.items():
+        content = git_backend.read_blob(repo, commit, source)
+        pipeline = transform.get_pipeline(transforms or [], source)
+        if pipeline is not None and not stat.S_ISLNK(int(entries[source].mode, 8)):
+            content = transform.transform_bytes(content, pipeline)
+        write_blob(content, int(entries[source].mode, 8), destination_dir / destination)
+
+    for destination in delta.deleted:
+        path = destination_dir / destination
+        if path.is_file() or path.is_symlink():
+            path.unlink()
+        remove_empty_parents(path.parent, destination_dir)
+
+
+def write_blob(content: bytes, mode: int, path: Path) -> None:
+    """
+    Write the content of a blob to a file, keeping its type and executable bit.
+
+    :param content: The content of the blob.
+    :param mode: The git file mode of the blob.
+    :param path: The path to write to.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.is_symlink() or path.is_file():
+        path.unlink()
+
+    if stat.S_ISLNK(mode):
+        os.symlink(content.decode("utf-8"), path)
+        return
+
+    path.write_bytes(content)
+    if mode & stat.S_IXUSR:
+        path.chmod(path.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+
+
+def remove_empty_parents(path: Path, root: Path) -> None:
+    """
+    Remove empty directories, from a path up to a root directory.
+
+    :param path: The deepest directory to remove.
+    :param root: The directory to stop at, which is not removed.
+    """
+    while path != root and path.is_dir() and not any(path.iterdir()):
+        path.rmdir()
+        path = path.parent
+
+
+def prepare_destination(event: Event, sync_dir: Path) -> Repo:
+    """
+    Get a clone of the destination, matching its remote tip.
+    The clone from a previous poll is reused, if there is one.
+
+    :param event: The event.
+    :param sync_dir: The directory of the clone.
+    :return: The Repo object of the clone.
+    """
+    if not sync_dir.exists():
+        return clone_destination(event, sync_dir)
+
+    repo = Repo(sync_dir)
+    try:
+        with limiter.limit(event.destination):
+            repo.remote(name="origin").fetch()
+        repo.git.reset("--hard", f"origin/{repo.active_branch.name}")
+        repo.git.clean("-fdx")
+    except GitCommandError:
+        logger.warning("Event %s: Cannot reuse the clone of the destination, cloning again", event.id)
+        shutil.rmtree(sync_dir)
+        return clone_destination(event, sync_dir)
+
+    return repo
+
+
+def clone_destination(event: Event, sync_dir: Path) -> Repo:
+    """
+    Clone the destination, and switch to the branch of the event.
+
+    :param event: The event.
+    :param sync_dir: The directory of the clone.
+    :return: The Repo object of the clone.
+    """
+    repo = clone_repo(event.destination, sync_dir)
+    if event.destination_ref is not None:
+        checkout_branch(repo, event.destination_ref, repo.active_branch.name)
+    return repo
+
+
+def get_interval(event: Event, interval: Optional[float], default_interval: float) -> float:
+    """
+    Get the polling interval of a sync, from the command line, the event or the settings, in this order.
+
+    :param event: The event.
+    :param interval: The interval given on the command line, if any.
+    :param default_interval: The interval from the settings.
+    :return: The interval in seconds.
+    """
+    if interval is not None:
+        return interval
+    if event.sync_interval is not None:
+        return event.sync_interval
+    return default_interval
@@ -0,0 +1,238 @@
+"""
+Content transforms of deployed files - stripping marked regions, substituting placeholders and normalizing
+line endings.
+
+The content is streamed line by line through the transforms whose glob patterns match a file. Binary files
+and files without matching transforms are copied as they are.
+"""
+
+import io
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+import homework_deployer.tree as tree
+from homework_deployer.event import Transform
+
+Pipeline = Callable[[Iterable[str]], Iterator[str]]
+
+BINARY_CHECK_SIZE = 8192
+ENCODING = "utf-8"
+ERRORS = "surrogateescape"  # Keeps bytes which are not valid UTF-8 unchanged
+LINE_ENDINGS = {"lf": "\n", "crlf": "\r\n"}
+
+
+def strip_regions(lines: Iterable[str], begin_marker: str, end_marker: str) -> Iterator[str]:
+    """
+    Remove the lines between a begin and an end marker, including the lines with the markers.
+
+    :param lines: The lines of the content, with their line endings.
+    :param begin_marker: Text marking the first removed line.
+    :param end_marker: Text marking the last removed line.
+    :return: The remaining lines.
+    :raises TransformError: If a region is not closed.
+    """
+    is_stripping = False
+    for line in lines:
+        if not is_stripping and begin_marker in line:
+            is_stripping = True
+        elif is_stripping and end_marker in line:
+            is_stripping = False
+        elif not is_stripping:
+            yield line
+
+    if is_stripping:
+        raise TransformError(f"Region starting with {begin_marker!r} is not closed with {end_marker!r}")
+
+
+def substitute_placeholders(lines: Iterable[str], placeholders: dict[str, str]) -> Iterator[str]:
+    """
+    Replace placeholders in every line.
+
+    :param lines: The lines of the content.
+    :param placeholders: Mapping of the placeholders to their replacements.
+    :return: The lines with the placeholders replaced.
+    """
+    for line in lines:
+        for placeholder, replacement in placeholders.items():
+            line = line.replace(placeholder, replacement)
+        yield line
+
+
+def normalize_line_endings(lines: Iterable[str], line_ending: str) -> Iterator[str]:
+    """
+    Replace the line ending of every line. The last line keeps having no line ending, if it had none.
+
+    :param lines: The lines of the content, with their line endings.
+    :param line_ending: The new line ending.
+    :return: The lines with the new line ending.
+    """
+    for line in lines:
+        stripped = line.rstrip("\r\n")
+        yield stripped + line_ending if stripped != line else line
+
+
+def build_pipeline(transforms: list[Transform]) -> Optional[Pipeline]:
+    """
+    Chain the steps of the given transforms, in order - within a transform, regions are stripped first,
+    then placeholders are substituted, then line endings are normalized.
+
+    :param transforms: The transforms to apply.
+    :return: The pipeline, or None if the transforms do nothing.
+    """
+    steps: list[Pipeline] = []
+    for transform in transforms:
+        if transform.strip_markers is not None:
+            begin_marker, end_marker = transform.strip_markers
+            steps.append(partial(strip_regions, begin_marker=begin_marker, end_marker=end_marker))
+        if transform.placeholders:
+            steps.append(partial(substitute_placeholders, placeholders=transform.placeholders))
+        if transform.line_endings is not None:
+            steps.append(partial(normalize_line_endings, line_ending=LINE_ENDINGS[transform.line_endings]))
+
+    if len(steps) == 0:
+        return None
+
+    def pipeline(lines: Iterable[str]) -> Iterator[str]:
+        stream: Iterable[str] = lines
+        for step in steps:
+            stream = step(stream)
+        return iter(stream)
+
+    return pipeline
+
+
+def get_pipeline(transforms: list[Transform], source: str) -> Optional[Pipeline]:
+    """
+    Build the pipeline of the transforms matching a source file.
+
+    :param transforms: The transforms of an event.
+    :param source: The path of the file, relative to the origin.
+    :return: The pipeline, or None if no transform applies.
+    """
+    return build_pipeline(
+        [transform for transform in transforms if tree.compile_pattern(transform.files).fullmatch(f"{source}/")]
+    )
+
+
+def is_binary(content: bytes) -> bool:
+    """
+    Check if content is binary, by looking for null bytes at its start.
+
+    :param content: The content, or its start.
+    :return: True if the content is binary.
+    """
+    return b"\0" in content[:BINARY_CHECK_SIZE]
+
+
+def transform_bytes(content: bytes, pipeline: Pipeline) -> bytes:
+    """
+    Transform content held in memory.
+
+    :param content: The content.
+    :param pipeline: The pipeline to apply.
+    :return: The transformed content, or the original one if it is binary.
+    """
+    if is_binary(content):
+        return content
+
+    lines = split_lines(content.decode(ENCODING, ERRORS))
+    return "".join(pipeline(lines)).encode(ENCODING, ERRORS)
+
+
+def split_lines(content: str) -> Iterator[str]:
+    """
+    Split content into lines with their line endings, the same way the files are streamed.
+    Only "\\n", "\\r" and "\\r\\n" end lines - unlike str.splitlines, form feeds and other separators do not.
+
+    :param content: The content.
+    :return: The lines.
+    """
+    return iter(io.StringIO(content, newline=""))
+
+
+def transform_file(source_path: Path, destination_path: Path, pipeline: Pipeline) -> None:
+    """
+    Stream a file through a pipeline to its destination, keeping its permissions.
+    Binary files are copied as they are.
+
+    :param source_path: The path of the source file.
+    :param destination_path: The path of the destination file.
+    :param pipeline: The pipeline to apply.
+    """
+    with open(source_path, "rb") as source_file:
+        if is_binary(source_file.read(BINARY_CHECK_SIZE)):
+            shutil.copy2(source_path, destination_path)
+            return
+
+    with (
+        open(source_path, "r", encoding=ENCODING, errors=ERRORS, newline="") as source_file,
+        open(destination_path, "w", encoding=ENCODING, errors=ERRORS, newline="") as destination_file,
+    ):
+        destination_file.writelines(pipeline(source_file))
+
+    shutil.copymode(source_path, destination_path)
+
+
+def copy_files(paths: list[tuple[Path, Path]], transforms: list[Transform], source_root: Path) -> None:
+    """
+    Copy files and directories, transforming the files matched by the transforms.
+    The files are processed in parallel.
+
+    :param paths: List of tuples containing source and destination file paths.
+    :param transforms: The transforms of the event.
+    :param source_root: The root of the source repository, which the transform patterns are relative to.
+    """
+    with ThreadPoolExecutor() as pool:
+        futures = []
+        for source_path, destination_path in expand_files(paths):
+            pipeline = get_pipeline(transforms, source_path.relative_to(source_root).as_posix())
+            futures.append(pool.submit(copy_file, source_path, destination_path, pipeline))
+
+    for future in futures:
+        future.result()
+
+
+def copy_file(source_path: Path, destination_path: Path, pipeline: Optional[Pipeline]) -> None:
+    """
+    Copy a single file, through a pipeline if there is one.
+
+    :param source_path: The path of the source file.
+    :param destination_path: The path of the destination file.
+    :param pipeline: The pipeline to apply, or None for a plain copy.
+    """
+    destination_path.parent.mkdir(parents=True, exist_ok=True)
+    if pipeline is None or source_path.is_symlink():
+        shutil.copy2(source_path, destination_path)
+    else:
+        transform_file(source_path, destination_path, pipeline)
+
+
+def expand_files(paths: list[tuple[Path, Path]]) -> list[tuple[Path, Path]]:
+    """
+    Replace the directories in a list of source and destination paths with the files they contain.
+
+    :param paths: List of tuples containing source and destination paths.
+    :return: List of tuples containing source and destination file paths.
+    """
+    files = []
+    for source_path, destination_path in paths:
+        if not source_path.is_dir():
+            files.append((source_path, destination_path))
+            continue
+
+        # Symlinked directories are followed, as by copytree
+        for root, _, names in os.walk(source_path, followlinks=True):
+            relative_root = Path(root).relative_to(source_path)
+            files.extend((Path(root) / name, destination_path / relative_root / name) for name in names)
+
+    return files
+
+
+class TransformError(Exception):
+    """
+    Custom exception for content which cannot be transformed.
+    """
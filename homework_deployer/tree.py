@@ -0,0 +1,207 @@
+"""
+Resolution of event patterns against git trees, without a working tree checkout.
+The patterns follow the semantics of Path.glob, which is used on working trees by the executor.
+"""
+
+import re
+from functools import cache
+from pathlib import PurePosixPath
+from typing import NamedTuple, Optional
+
+from git import Repo
+
+
+class TreeEntry(NamedTuple):
+    """
+    A single entry of a git tree listing.
+    """
+
+    mode: str
+    type: str
+    sha: str
+    size: int
+
+
+def list_tree(repo: Repo, rev: str) -> dict[str, TreeEntry]:
+    """
+    List all files and directories of a commit, recursively.
+
+    :param repo: The repository containing the commit.
+    :param rev: The commit, or any revision pointing to it.
+    :return: Mapping of paths to tree entries.
+    """
+    output = repo.git.ls_tree("-r", "-t", "-l", "-z", rev, strip_newline_in_stdout=False)
+
+    entries = {}
+    for line in output.split("\0"):
+        if line == "":
+            continue
+        info, path = line.split("\t", 1)
+        mode, entry_type, sha, size = info.split()
+        entries[path] = TreeEntry(mode, entry_type, sha, int(size) if size != "-" else 0)
+
+    return entries
+
+
+def match(pattern: str, entries: dict[str, TreeEntry]) -> list[str]:
+    """
+    Find the paths of a tree matching a pattern.
+
+    :param pattern: A source pattern of an event.
+    :param entries: The tree entries, as returned by list_tree.
+    :return: The matching paths, sorted.
+    """
+    regex = compile_pattern(pattern)
+    is_directory_only = pattern.rstrip("/").endswith("**")
+
+    return sorted(
+        path
+        for path, entry in entries.items()
+        if regex.fullmatch(f"{path}/") and (not is_directory_only or entry.type == "tree")
+    )
+
+
+def resolve(patterns: list[tuple[str, Optional[str]]], entries: dict[str, TreeEntry]) -> dict[str, list[str]]:
+    """
+    Find the paths of a tree matching each of the source patterns.
+
+    :param patterns: The patterns of an event.
+    :param entries: The tree entries, as returned by list_tree.
+    :return: Mapping of source patterns to the matching paths.
+    """
+    return {source_pattern: match(source_pattern, entries) for source_pattern, _ in patterns}
+
+
+def map_paths(patterns: list[tuple[str, Optional[str]]], entries: dict[str, TreeEntry]) -> dict[str, str]:
+    """
+    Map the files matched by the patterns of an event to their paths in the destination.
+    Matched directories are expanded to the files they contain.
+
+    :param patterns: The patterns of an event.
+    :param entries: The tree entries, as returned by list_tree.
+    :return: Mapping of destination paths to source paths, both relative to the repository roots.
+    """
+    mapping = {}
+    for source_pattern, destination_pattern in patterns:
+        for path in match(source_pattern, entries):
+            if entries[path].type == "blob":
+                mapping[get_destination(path, destination_pattern, True)] = path
+                continue
+
+            destination_dir = PurePosixPath(get_destination(path, destination_pattern, False))
+            for blob in expand_blobs([path], entries):
+                mapping[str(destination_dir / PurePosixPath(blob).relative_to(path))] = blob
+
+    return mapping
+
+
+def get_destinations(patterns: list[tuple[str, Optional[str]]], path: str) -> list[str]:
+    """
+    Map a single file to its paths in the destination, without the listing of the whole tree.
+    The file is matched by a pattern if the pattern matches the file itself, or any directory containing it.
+
+    :param patterns: The patterns of an event.
+    :param path: The path of the file, relative to the source repository.
+    :return: The destination paths of the file, relative to the destination repository, without duplicates.
+    """
+    parts = PurePosixPath(path).parts
+    destinations = []
+    for source_pattern, destination_pattern in patterns:
+        regex = compile_pattern(source_pattern)
+        if not source_pattern.rstrip("/").endswith("**") and regex.fullmatch(f"{path}/"):
+            destinations.append(get_destination(path, destination_pattern, True))
+
+        for index in range(1, len(parts)):
+            directory = "/".join(parts[:index])
+            if regex.fullmatch(f"{directory}/"):
+                destination_dir = PurePosixPath(get_destination(directory, destination_pattern, False))
+                destinations.append(str(destination_dir.joinpath(*parts[index:])))
+
+    return list(dict.fromkeys(destinations))
+
+
+def get_destination(source: str, destination_pattern: Optional[str], is_file: bool) -> str:
+    """
+    Get the destination path of a matched source path, following the rules of extract_pattern.
+
+    :param source: The matched path, relative to the source repository.
+    :param destination_pattern: The destination pattern.
+    :param is_file: Whether the matched path is a file.
+    :return: The destination path, relative to the destination repository.
+    """
+    if destination_pattern is None:
+        return source
+
+    destination = PurePosixPath(destination_pattern)
+    if is_file and destination.suffix == "":
+        return str(destination / PurePosixPath(source).name)
+    return str(destination)
+
+
+def expand_blobs(paths: list[str], entries: dict[str, TreeEntry]) -> list[str]:
+    """
+    Replace the directories in a list of paths with all the files they contain.
+
+    :param paths: Paths of files and directories.
+    :param entries: The tree entries, as returned by list_tree.
+    :return: The paths of the files, sorted and without duplicates.
+    """
+    blobs = set()
+    for path in paths:
+        if entries[path].type == "blob":
+            blobs.add(path)
+        else:
+            blobs.update(
+                other for other, entry in entries.items() if entry.type == "blob" and other.startswith(f"{path}/")
+            )
+
+    return sorted(blobs)
+
+
+@cache
+def compile_pattern(pattern: str) -> re.Pattern[str]:
+    """
+    Translate a glob pattern to a regular expression, matching paths followed by a slash.
+
+    :param pattern: The glob pattern.
+    :return: The compiled regular expression.
+    """
+    regex = ""
+    for part in pattern.strip("/").split("/"):
+        if part in ("", "."):
+            continue
+        if part == "**":
+            regex += "(?:[^/]+/)*"
+        else:
+            regex += _translate_part(part) + "/"
+
+    return re.compile(regex)
+
+
+def _translate_part(part: str) -> str:
+    """
+    Translate a single path component of a glob pattern, where wildcards do not match slashes.
+
+    :param part: The path component.
+    :return: The regular expression.
+    """
+    regex = ""
+    index = 0
+    while index < len(part):
+        char = part[index]
+        end = part.find("]", index + 2) if char == "[" else -1
+        if char == "*":
+            regex += "[^/]*"
+        elif char == "?":
+            regex += "[^/]"
+        elif end != -1:
+            content = part[index + 1:end].replace("\\", "\\\\")
+            if content.startswith("!"):
+                content = "^" + content[1:]
+            regex += f"[{content}]"
+            index = end
+        else:
+            regex += re.escape(char)
+        index += 1
+
+    return regex
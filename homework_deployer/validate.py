@@ -0,0 +1,159 @@
+"""
+Validation of the patterns of events against the current tip of their origins.
+
+The patterns are resolved against the tree listing of a local mirror of the origin, so nothing is checked out.
+Every origin is fetched once, no matter how many events or branches of it are used.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+from typing import NamedTuple, Optional
+
+from git import Repo
+from git.exc import GitCommandError
+from gitdb.exc import BadName
+
+import homework_deployer.mirror as mirror
+import homework_deployer.tree as tree
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+
+class PatternReport(NamedTuple):
+    """
+    Result of resolving a single pattern of an event.
+    """
+
+    source: str
+    destination: Optional[str]
+    matches: int  # Matched files and directories
+    files: int  # Matched files, with the directories expanded
+    size: int  # Total bytes of the matched files
+    error: Optional[str]
+
+
+class EventReport(NamedTuple):
+    """
+    Result of validating all patterns of an event.
+    """
+
+    origin_commit: Optional[str]
+    patterns: list[PatternReport]
+    error: Optional[str]  # Set if the origin cannot be read
+
+    @property
+    def is_valid(self) -> bool:
+        """
+        Whether the origin was read, and all patterns are supported and match something.
+        """
+        return self.error is None and all(pattern.error is None for pattern in self.patterns)
+
+
+def validate(events: dict[str, Event], is_fetch: bool = True) -> dict[str, EventReport]:
+    """
+    Validate the patterns of events against the current tips of their origins.
+
+    :param events: Mapping of keys, e.g. config paths, to events.
+    :param is_fetch: Whether to fetch the origins, instead of using their existing mirrors when there are any.
+    :return: Mapping of the same keys to the reports.
+    """
+    origins: dict[str, set[Optional[str]]] = {}
+    for event in events.values():
+        origins.setdefault(event.origin, set()).add(event.origin_ref)
+    with ThreadPoolExecutor() as pool:
+        listings = dict(
+            zip(origins, pool.map(lambda origin: list_origin(origin, origins[origin], is_fetch), origins))
+        )
+
+    reports = {}
+    for key, event in events.items():
+        listing = listings[event.origin][event.origin_ref]
+        if isinstance(listing, str):
+            reports[key] = EventReport(None, [], listing)
+            continue
+
+        origin_commit, entries = listing
+        reports[key] = EventReport(
+            origin_commit,
+            [validate_pattern(source, destination, entries) for source, destination in event.patterns],
+            None,
+        )
+
+    return reports
+
+
+def list_origin(
+    origin: str, branches: set[Optional[str]], is_fetch: bool
+) -> dict[Optional[str], tuple[str, dict[str, tree.TreeEntry]] | str]:
+    """
+    List the trees at the tips of branches of an origin, through its mirror.
+
+    :param origin: The URL of the origin.
+    :param branches: The branches to list, None for the default branch.
+    :param is_fetch: Whether to fetch the origin, instead of using its existing mirror when there is one.
+    :return: Mapping of the branches to the tip commit and the tree entries, or the error if the branch cannot be read.
+    """
+    try:
+        mirror_path = mirror.get_path(origin)
+        repo = Repo(mirror_path) if not is_fetch and mirror_path.exists() else mirror.update(origin)
+    except (GitCommandError, ValueError) as error:
+        logger.error("Cannot read origin %s: %s", origin, error)
+        return {branch: f"Cannot read origin {origin}: {error}" for branch in branches}
+
+    listings: dict[Optional[str], tuple[str, dict[str, tree.TreeEntry]] | str] = {}
+    for branch in branches:
+        ref = mirror.get_ref(branch)
+        try:
+            origin_commit = repo.commit(ref).hexsha
+            listings[branch] = origin_commit, tree.list_tree(repo, origin_commit)
+        except (BadName, GitCommandError, ValueError) as error:
+            logger.error("Cannot read %s of origin %s: %s", ref, origin, error)
+            listings[branch] = f"Cannot read {ref} of origin {origin}: {error}"
+
+    return listings
+
+
+def validate_pattern(source: str, destination: Optional[str], entries: dict[str, tree.TreeEntry]) -> PatternReport:
+    """
+    Resolve a single pattern, and check if it is supported.
+
+    :param source: The source pattern.
+    :param destination: The destination pattern.
+    :param entries: The tree entries of the origin, as returned by tree.list_tree.
+    :return: The report of the pattern.
+    """
+    matched = tree.match(source, entries)
+    blobs = tree.expand_blobs(matched, entries)
+    size = sum(entries[blob].size for blob in blobs)
+    error = get_error(source, destination, matched, entries)
+
+    return PatternReport(source, destination, len(matched), len(blobs), size, error)
+
+
+def get_error(
+    source: str, destination: Optional[str], matched: list[str], entries: dict[str, tree.TreeEntry]
+) -> Optional[str]:
+    """
+    Find what is wrong with a resolved pattern.
+
+    :param source: The source pattern.
+    :param destination: The destination pattern.
+    :param matched: The matched paths.
+    :param entries: The tree entries of the origin.
+    :return: The error, or None if the pattern is fine.
+    """
+    if len(matched) == 0:
+        return "Matches nothing"
+
+    is_file_destination = destination is not None and PurePosixPath(destination).suffix != ""
+    if not is_file_destination:
+        return None
+
+    if any(character in source for character in "*?["):
+        return "Not supported: glob to file"
+    if entries[matched[0]].type == "tree":
+        return "Not supported: directory to file"
+
+    return None
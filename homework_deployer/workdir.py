@@ -0,0 +1,228 @@
+"""
+Management of the work root, where every run gets its own directory.
+
+Finished runs are moved to a trash directory, which is emptied by a detached 'gc' process,
+so runs never wait for large trees to be deleted and never delete the directories of other runs.
+At most one 'gc' process runs at a time.
+"""
+
+import fcntl
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import homework_deployer.constants as const
+import homework_deployer.settings as settings
+from homework_deployer.event import Event
+
+logger = logging.getLogger("homework_deployer")
+
+
+def get_root() -> Path:
+    """
+    Get the work root, as configured in the settings.
+
+    :return: The path to the work root.
+    """
+    return Path(settings.get().work_root)
+
+
+def create_run_dir(run_id: str) -> Path:
+    """
+    Create the directory of a run.
+
+    :param run_id: The ID of the run.
+    :return: The path to the run directory.
+    """
+    run_dir = get_root() / run_id
+    run_dir.mkdir(parents=True, exist_ok=True)
+    return run_dir
+
+
+def discard(run_dir: Path) -> None:
+    """
+    Move a run directory to the trash and start a background process that deletes it,
+    unless one is already running - it checks the trash again before it exits.
+
+    :param run_dir: The directory of the run.
+    """
+    work_root = run_dir.parent
+    trash_dir = work_root / const.TRASH_DIR
+    trash_dir.mkdir(exist_ok=True)
+    os.replace(run_dir, trash_dir / run_dir.name)
+
+    with gc_lock(work_root) as is_locked:
+        if not is_locked:
+            return
+
+    command = [sys.executable, "-m", "homework_deployer", "gc", "--work-root", str(work_root)]
+    subprocess.Popen(  # pylint: disable=R1732
+        command, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+
+
+def collect_garbage(work_root: Path) -> None:
+    """
+    Delete the discarded runs, and the runs which failed longer ago than the retention period.
+    Returns right away if another process is collecting the garbage of the work root.
+
+    :param work_root: The work root to clean.
+    """
+    trash_dir = work_root / const.TRASH_DIR
+    retention = settings.get().failed_run_retention_days * 24 * 60 * 60
+
+    while True:
+        with gc_lock(work_root) as is_locked:
+            if not is_locked:
+                return
+
+            if trash_dir.exists():
+                for run_dir in trash_dir.iterdir():
+                    shutil.rmtree(run_dir, ignore_errors=True)
+
+            for run_dir in work_root.glob("run_*"):
+                try:
+                    last_activity = get_last_activity(run_dir)
+                except FileNotFoundError:  # Discarded in the meantime
+                    continue
+
+                if time.time() - last_activity > retention:
+                    logger.info("Removing failed run %s", run_dir.name)
+                    shutil.rmtree(run_dir, ignore_errors=True)
+
+        # Runs discarded while the lock was held did not start a process of their own
+        if not trash_dir.exists() or not any(trash_dir.iterdir()):
+            return
+
+
+@contextmanager
+def gc_lock(work_root: Path) -> Iterator[bool]:
+    """
+    Try to take the lock of the garbage collection of a work root, without waiting for it.
+
+    :param work_root: The work root.
+    :return: True if the lock was taken, False if another process holds it.
+    """
+    locks_dir = work_root / const.LOCKS_DIR
+    locks_dir.mkdir(parents=True, exist_ok=True)
+
+    with open(locks_dir / const.GC_LOCK_FILE, "a", encoding="utf-8") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def get_last_activity(run_dir: Path) -> float:
+    """
+    Get the time a run last made progress. Writes deep in the tree do not update the mtime of the run directory,
+    but every completed phase rewrites the checkpoint.
+
+    :param run_dir: The directory of the run.
+    :return: The time as a Unix timestamp.
+    """
+    checkpoint_path = run_dir / const.CHECKPOINT_FILE
+    if checkpoint_path.exists():
+        return max(run_dir.stat().st_mtime, checkpoint_path.stat().st_mtime)
+
+    return run_dir.stat().st_mtime
+
+
+def preflight(event: Event) -> None:
+    """
+    Check that the work root has enough free space for the run of an event.
+    Depending on the settings, the run is either refused right away, or waits for space to be freed.
+
+    :param event: The event to run.
+    :raises InsufficientSpaceError: If there is not enough space.
+    """
+    disk_space = settings.get().disk_space
+    work_root = get_root()
+    work_root.mkdir(parents=True, exist_ok=True)
+
+    required = int(disk_space.margin * (estimate_size(event.origin) + estimate_size(event.destination)))
+    deadline = time.monotonic() + disk_space.queue_timeout
+
+    while (free := shutil.disk_usage(work_root).free) < required:
+        message = f"Event {event.id}: {required} bytes required in {work_root}, only {free} free"
+        if disk_space.action == "refuse" or time.monotonic() > deadline:
+            raise InsufficientSpaceError(message)
+
+        logger.warning("%s, waiting", message)
+        collect_garbage(work_root)
+        time.sleep(disk_space.poll_interval)
+
+
+def estimate_size(url: str) -> int:
+    """
+    Estimate the size of a clone of a repository.
+    Local repositories are measured directly, remote ones by their last clone.
+
+    :param url: The URL of the repository.
+    :return: The estimated size in bytes.
+    """
+    if os.path.isdir(url):
+        return get_size(Path(url))
+
+    return load_sizes().get(url, settings.get().disk_space.default_repo_size)
+
+
+def record_size(url: str, repo_dir: Path) -> None:
+    """
+    Remember the size of a clone, to estimate the space needed by future runs.
+
+    :param url: The URL of the repository.
+    :param repo_dir: The directory of the clone.
+    """
+    sizes = load_sizes()
+    sizes[url] = get_size(repo_dir)
+
+    # Concurrent runs may overwrite each other's records, which only costs the precision of one estimate
+    sizes_path = get_root() / const.SIZES_FILE
+    temp_path = sizes_path.with_name(f"{sizes_path.name}.{os.getpid()}.{threading.get_ident()}")
+    with open(temp_path, "w", encoding="utf-8") as sizes_file:
+        json.dump(sizes, sizes_file)
+    os.replace(temp_path, sizes_path)
+
+
+def load_sizes() -> dict[str, int]:
+    """
+    Load the recorded clone sizes.
+
+    :return: Mapping of repository URLs to sizes in bytes.
+    """
+    try:
+        with open(get_root() / const.SIZES_FILE, "r", encoding="utf-8") as sizes_file:
+            return json.load(sizes_file)
+    except FileNotFoundError:
+        return {}
+
+
+def get_size(path: Path) -> int:
+    """
+    Calculate the total size of the files in a directory tree.
+
+    :param path: The root of the tree.
+    :return: The size in bytes.
+    """
+    return sum(os.lstat(os.path.join(root, name)).st_size for root, _, files in os.walk(path) for name in files)
+
+
+class InsufficientSpaceError(Exception):
+    """
+    Custom exception for runs which do not fit in the free space of the work root.
+    """
@@ -0,0 +1,151 @@
+"""
+Tests for the admission module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from git import Repo
+
+import homework_deployer.mirror as mirror
+import homework_deployer.workdir as workdir
+from homework_deployer.admission import Admission, Cost, estimate
+from homework_deployer.event import Event
+from homework_deployer.executor import commit_changes
+from homework_deployer.settings import AdmissionSettings, DiskSpace, Settings
+
+
+def _event(event_id: str, origin: str, date: datetime) -> Event:
+    return Event(
+        id=event_id,
+        name=f"event_{event_id}",
+        description="Test event",
+        origin=origin,
+        destination="https://example.com/destination",
+        date=date,
+        patterns=[("hw", "public")],
+    )
+
+
+class TestEstimate(unittest.TestCase):
+    """
+    Test suite for the estimate function.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_admission")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestEstimate.temp_dir):
+            shutil.rmtree(TestEstimate.temp_dir)
+
+        self.origin_path = os.path.join(TestEstimate.temp_dir, "origin")
+        origin = Repo.init(self.origin_path, initial_branch="main")
+        os.makedirs(os.path.join(self.origin_path, "hw"))
+        for name, size in [("hw/a.txt", 100), ("hw/b.txt", 20), ("other.txt", 50)]:
+            with open(os.path.join(self.origin_path, name), "w", encoding="utf-8") as file:
+                file.write("x" * size)
+        commit_changes(origin, "Initial commit")
+
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=Path(TestEstimate.temp_dir) / "work")
+        self.patch.start()
+        self.settings = Settings(
+            disk_space=DiskSpace(margin=2, default_repo_size=1000),
+            admission=AdmissionSettings(memory_per_run=10),
+        )
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestEstimate.temp_dir)
+        return super().tearDown()
+
+    def test_01_without_mirror(self) -> None:
+        """
+        Verify that without a mirror of the origin, only the sizes of the repositories are counted.
+        """
+        # Arrange
+        event = _event("1", self.origin_path, datetime(2024, 1, 1, 12, 0))
+        origin_size = workdir.get_size(Path(self.origin_path))
+
+        # Act
+        with patch("homework_deployer.admission.settings.get", return_value=self.settings):
+            cost = estimate(event)
+
+        # Assert
+        self.assertEqual(cost, Cost(2 * (origin_size + 1000), 10))
+
+    def test_02_matched_bytes_from_mirror(self) -> None:
+        """
+        Verify that the bytes matched by the patterns are read from the mirror of the origin,
+        and an origin which is not cloned takes no space.
+        """
+        # Arrange
+        event = _event("1", self.origin_path, datetime(2024, 1, 1, 12, 0))
+        event.origin_fetch = "mirror"
+        mirror.update(self.origin_path)
+
+        # Act
+        with patch("homework_deployer.admission.settings.get", return_value=self.settings):
+            cost = estimate(event)
+
+        # Assert
+        self.assertEqual(cost, Cost(2 * (1000 + 120), 10 + 120))
+
+
+class TestAdmission(unittest.TestCase):
+    """
+    Test suite for the Admission class.
+    """
+
+    def setUp(self) -> None:
+        self.events = {
+            event_id: _event(event_id, "/origin", datetime(2024, 1, day, 12, 0))
+            for event_id, day in [("1", 3), ("2", 1), ("3", 2)]
+        }
+        return super().setUp()
+
+    def test_01_earliest_date_first(self) -> None:
+        """
+        Verify that events are admitted by their dates while they fit the budget, and later events wait
+        for the earliest one.
+        """
+        # Arrange
+        costs = {"1": Cost(10, 1), "2": Cost(60, 1), "3": Cost(50, 1)}
+        admission = Admission(self.events, costs, Cost(100, 10))
+
+        # Act
+        first = admission.admit(["1", "2", "3"], 4)
+        admission.release("2")
+        second = admission.admit(["1", "3"], 4)
+
+        # Assert
+        self.assertEqual(first, ["2"])
+        self.assertEqual(second, ["3", "1"])
+        self.assertEqual(set(admission.waits), {"1", "2", "3"})
+
+    def test_02_over_budget_runs_alone(self) -> None:
+        """
+        Verify that an event exceeding the whole budget is admitted once nothing else runs.
+        """
+        # Arrange
+        costs = {"1": Cost(10, 1), "2": Cost(10, 1), "3": Cost(500, 1)}
+        admission = Admission(self.events, costs, Cost(100, 10))
+
+        # Act
+        first = admission.admit(["1", "2", "3"], 1)
+        second = admission.admit(["1", "3"], 1)
+        admission.release("2")
+        third = admission.admit(["1", "3"], 2)
+
+        # Assert
+        self.assertEqual(first, ["2"])
+        self.assertEqual(second, [])
+        self.assertEqual(third, ["3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
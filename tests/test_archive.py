@@ -0,0 +1,153 @@
+"""
+Tests for the archive module.
+"""
+
+import io
+import os
+import shutil
+import subprocess
+import tarfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from git import Repo
+
+import homework_deployer.mirror as mirror
+from homework_deployer.archive import build_command
+from homework_deployer.event import Event, Transform
+from homework_deployer.executor import commit_changes, execute
+
+
+class TestArchive(unittest.TestCase):
+    """
+    Test suite for deploying origins fetched as archives.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_archive")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestArchive.temp_dir):
+            shutil.rmtree(TestArchive.temp_dir)
+
+        self.origin_path = os.path.join(TestArchive.temp_dir, "origin")
+        origin = Repo.init(self.origin_path, initial_branch="main")
+        self._write("hw/a.py", "a = 1\n# BEGIN\nsecret = 2\n# END\n")
+        self._write("hw/nested/b.txt", "b")
+        self._write("notes.txt", "notes")
+        self._write("private.txt", "private")
+        (Path(self.origin_path) / "hw" / "run.sh").write_text("#!/bin/sh\n", encoding="utf-8")
+        (Path(self.origin_path) / "hw" / "run.sh").chmod(0o755)
+        commit_changes(origin, "Initial commit")
+
+        self.destination_path = os.path.join(TestArchive.temp_dir, "destination.git")
+        Repo.init(self.destination_path, bare=True, initial_branch="main")
+        seed = Repo.clone_from(self.destination_path, os.path.join(TestArchive.temp_dir, "seed"))
+        with open(os.path.join(TestArchive.temp_dir, "seed", "README.md"), "w", encoding="utf-8") as file:
+            file.write("readme")
+        commit_changes(seed, "Initial commit")
+        seed.remote("origin").push("main")
+
+        self.event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin=self.origin_path,
+            destination=self.destination_path,
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("hw", "public"), ("*.txt", "docs")],
+            transforms=[Transform(files="**/*.py", strip_markers=("# BEGIN", "# END"))],
+        )
+
+        self.patches = [
+            patch("homework_deployer.workdir.get_root", return_value=Path(TestArchive.temp_dir) / "work"),
+            patch("homework_deployer.workdir.discard"),
+            patch("homework_deployer.workdir.preflight"),
+            patch(
+                "homework_deployer.fingerprint.const.FINGERPRINTS_PATH",
+                os.path.join(TestArchive.temp_dir, "fingerprints.json"),
+            ),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for active_patch in self.patches:
+            active_patch.stop()
+        shutil.rmtree(TestArchive.temp_dir)
+        return super().tearDown()
+
+    def _write(self, name: str, content: str) -> None:
+        path = Path(self.origin_path) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def _destination_files(self) -> dict[str, tuple[int, str]]:
+        repo = Repo(self.destination_path)
+        return {
+            blob.path: (blob.mode, repo.git.show(f"main:{blob.path}"))
+            for blob in repo.commit("main").tree.traverse()
+            if blob.type == "blob"
+        }
+
+    def _assert_deployed(self, origin_fetch: str) -> None:
+        # Arrange
+        self.event.origin_fetch = origin_fetch  # type: ignore[assignment]
+
+        # Act
+        with patch("homework_deployer.executor.clone_repo", wraps=Repo.clone_from) as mock_clone:
+            execute(self.event, is_force=True)
+
+        # Assert
+        self.assertEqual([call.args[0] for call in mock_clone.call_args_list], [self.destination_path])
+        self.assertEqual(
+            self._destination_files(),
+            {
+                "README.md": (0o100644, "readme"),
+                "public/a.py": (0o100644, "a = 1"),
+                "public/nested/b.txt": (0o100644, "b"),
+                "public/run.sh": (0o100755, "#!/bin/sh"),
+                "docs/notes.txt": (0o100644, "notes"),
+                "docs/private.txt": (0o100644, "private"),
+            },
+        )
+
+    def test_01_archive_from_mirror(self) -> None:
+        """
+        Verify that an archive of the mirror is extracted into the destination layout, without cloning the origin.
+        """
+        self._assert_deployed("mirror")
+
+    def test_02_archive_from_server(self) -> None:
+        """
+        Verify that an archive created by the origin server is extracted into the destination layout,
+        without cloning the origin.
+        """
+        self._assert_deployed("remote")
+
+    def test_03_literal_paths(self) -> None:
+        """
+        Verify that matched paths containing glob characters do not request other paths from the mirror.
+        """
+        # Arrange
+        self._write("secret?x.txt", "matched")
+        self._write("secret/x.txt", "secret")
+        commit_changes(Repo(self.origin_path), "Add files")
+        self.event.patterns = [("*.txt", "docs")]
+        origin_mirror = mirror.update(self.origin_path)
+
+        # Act
+        command = build_command(self.event, origin_mirror, "HEAD")
+        assert command is not None
+        output = subprocess.run(command, capture_output=True, check=True).stdout
+
+        # Assert
+        with tarfile.open(fileobj=io.BytesIO(output)) as archive:
+            self.assertEqual(sorted(archive.getnames()), ["notes.txt", "private.txt", "secret?x.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
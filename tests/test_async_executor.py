@@ -0,0 +1,161 @@
+"""
+Tests for the async_executor module.
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import AsyncMock, patch
+
+from git import Repo
+
+import homework_deployer.constants as const
+from homework_deployer.async_executor import (
+    PhaseTimeoutError,
+    commit_async,
+    execute_async,
+    execute_many_async,
+    push_async,
+)
+from homework_deployer.event import Event
+from homework_deployer.executor import commit_changes
+
+
+class TestExecuteAsync(unittest.TestCase):
+    """
+    Test suite for executing events with asyncio.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_async_executor")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestExecuteAsync.temp_dir):
+            shutil.rmtree(TestExecuteAsync.temp_dir)
+
+        self.origin_path = os.path.join(TestExecuteAsync.temp_dir, "origin")
+        origin = Repo.init(self.origin_path, initial_branch="main")
+        os.makedirs(os.path.join(self.origin_path, "hw"))
+        for name in ["a.txt", "b.txt"]:
+            with open(os.path.join(self.origin_path, "hw", name), "w", encoding="utf-8") as file:
+                file.write(name)
+        commit_changes(origin, "Initial commit")
+
+        self.destination_paths = []
+        for index in range(3):
+            destination_path = os.path.join(TestExecuteAsync.temp_dir, f"destination_{index}.git")
+            Repo.init(destination_path, bare=True, initial_branch="main")
+            self.destination_paths.append(destination_path)
+
+        self.work_root = Path(TestExecuteAsync.temp_dir) / "work"
+        self.logger = logging.getLogger("test_async_executor")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestExecuteAsync.temp_dir)
+        return super().tearDown()
+
+    def _event(self, event_id: str, destination: str) -> Event:
+        return Event(
+            id=event_id,
+            name="test_event",
+            description="Test event",
+            origin=self.origin_path,
+            destination=destination,
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("hw", "public")],
+        )
+
+    def test_01_many_events(self) -> None:
+        """
+        Verify that events are deployed concurrently in one event loop, and their run directories are removed.
+        """
+        # Arrange
+        events = [self._event(str(index), path) for index, path in enumerate(self.destination_paths)]
+
+        # Act
+        errors = asyncio.run(execute_many_async(events, self.work_root, self.logger))
+
+        # Assert
+        self.assertEqual(errors, {"0": None, "1": None, "2": None})
+        for destination_path in self.destination_paths:
+            self.assertEqual(Repo(destination_path).git.show("main:public/b.txt"), "b.txt")
+        self.assertEqual(os.listdir(self.work_root), [])
+
+    def test_02_phase_timeout(self) -> None:
+        """
+        Verify that a phase exceeding its time limit fails the deployment, without affecting the other events.
+        """
+        # Arrange
+        events = [self._event("1", self.destination_paths[0]), self._event("2", self.destination_paths[1])]
+        events[0].hooks = ["sleep 10"]
+        events[0].hook_timeout = 0.1
+
+        # Act
+        errors = asyncio.run(execute_many_async(events, self.work_root, self.logger))
+
+        # Assert
+        self.assertIn("did not finish in 0.1s", str(errors["1"]))
+        self.assertIsNone(errors["2"])
+        self.assertFalse(Repo(self.destination_paths[0]).head.is_valid())
+        with self.assertRaises(PhaseTimeoutError):
+            asyncio.run(execute_async(events[1], self.work_root, self.logger, timeouts={const.Phase.CLONED: 0}))
+        self.assertEqual(os.listdir(self.work_root), [])
+
+    def test_03_cancel(self) -> None:
+        """
+        Verify that a cancelled deployment stops its running process, pushes nothing and removes its run directory.
+        """
+        # Arrange
+        event = self._event("1", self.destination_paths[0])
+        event.hooks = ["sleep 10"]
+
+        async def cancel_after_start() -> None:
+            task = asyncio.create_task(execute_async(event, self.work_root, self.logger))
+            await asyncio.sleep(1)
+            task.cancel()
+            await task
+
+        # Act
+        start = time.monotonic()
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(cancel_after_start())
+
+        # Assert
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertFalse(Repo(self.destination_paths[0]).head.is_valid())
+        self.assertEqual(os.listdir(self.work_root), [])
+
+    @patch("homework_deployer.async_executor.asyncio.sleep")
+    def test_04_push_rebase_after_rejection(self, mock_sleep: AsyncMock) -> None:
+        """
+        Verify that a push rejected because of a concurrent push is rebased, verified again and retried.
+        """
+        # Arrange
+        first = Repo.clone_from(self.destination_paths[0], os.path.join(TestExecuteAsync.temp_dir, "first"))
+        second = Repo.clone_from(self.destination_paths[0], os.path.join(TestExecuteAsync.temp_dir, "second"))
+        for repo, name in [(first, "a.txt"), (second, "b.txt")]:
+            with open(os.path.join(str(repo.working_dir), name), "w", encoding="utf-8") as file:
+                file.write(name)
+        commit_changes(first, "First change")
+        first.remote("origin").push("main")
+
+        verify = AsyncMock()
+
+        # Act
+        asyncio.run(commit_async(Path(str(second.working_dir)), "Second change"))
+        asyncio.run(push_async(Path(str(second.working_dir)), self.logger, verify=verify))
+
+        # Assert
+        mock_sleep.assert_called_once()
+        verify.assert_awaited_once_with(Path(str(second.working_dir)))
+        remote_files = Repo(self.destination_paths[0]).git.ls_tree("--name-only", "main").split()
+        self.assertEqual(remote_files, ["a.txt", "b.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
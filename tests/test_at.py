@@ -7,7 +7,7 @@ from unittest.mock import patch, MagicMock
 from datetime import datetime
 
 
-from homework_deployer.at import is_at_available, register, deregister, build_command
+from homework_deployer.at import is_at_available, register, deregister, deregister_many, list_jobs, build_command
 from homework_deployer.event import Event
 
 
@@ -177,3 +177,64 @@ class TestDeregister(unittest.TestCase):
 
         # Assert
         mock_run.assert_called_once_with(expected_command, check=False, text=True, capture_output=True)
+
+
+class TestListJobs(unittest.TestCase):
+    """
+    Test suite for the list_jobs function.
+    """
+
+    @patch("homework_deployer.at.run")
+    def test_01_parse_queue(self, mock_run: MagicMock) -> None:
+        """
+        Verify that every job of the queue is listed with its execution time, including the running ones.
+        """
+        # Arrange
+        mock_run.return_value = MagicMock(
+            returncode=0,
+            stdout="12\tMon Jan  1 12:00:00 2024 a user\n13\tTue Jan  2 08:30:00 2024 = user\n\n",
+        )
+
+        # Act
+        actual_result = list_jobs()
+
+        # Assert
+        self.assertEqual(actual_result, {12: "Mon Jan 1 12:00:00 2024", 13: "Tue Jan 2 08:30:00 2024"})
+        mock_run.assert_called_once_with(["at", "-l"], check=False, text=True, capture_output=True)
+
+    @patch("homework_deployer.at.run")
+    def test_02_failed_listing(self, mock_run: MagicMock) -> None:
+        """
+        Verify that list_jobs returns None when the queue cannot be read.
+        """
+        # Arrange
+        mock_run.return_value = MagicMock(returncode=1, stdout="", stderr="Cannot open lockfile")
+
+        # Act
+        actual_result = list_jobs()
+
+        # Assert
+        self.assertIsNone(actual_result)
+
+
+class TestDeregisterMany(unittest.TestCase):
+    """
+    Test suite for the deregister_many function.
+    """
+
+    @patch("homework_deployer.at.run")
+    def test_01_single_call(self, mock_run: MagicMock) -> None:
+        """
+        Verify that all jobs are removed with a single 'at' call, and that nothing is called without jobs.
+        """
+        # Arrange
+        mock_run.return_value = MagicMock(returncode=0)
+
+        # Act
+        actual_result = deregister_many([1, 2, 3])
+        actual_empty_result = deregister_many([])
+
+        # Assert
+        self.assertTrue(actual_result)
+        self.assertTrue(actual_empty_result)
+        mock_run.assert_called_once_with(["at", "-r", "1", "2", "3"], check=False, text=True, capture_output=True)
@@ -0,0 +1,94 @@
+"""
+Tests for the backend module.
+"""
+
+import os
+import shutil
+import unittest
+from pathlib import Path
+
+from git import Repo
+
+from homework_deployer.backend import BatchBackend, GitBackend, GitPythonBackend
+
+
+class TestBackends(unittest.TestCase):
+    """
+    Test suite running the same operations against all backends.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_backend")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestBackends.temp_dir):
+            shutil.rmtree(TestBackends.temp_dir)
+
+        self.repo_path = Path(TestBackends.temp_dir) / "repo"
+        self.repo = Repo.init(self.repo_path, initial_branch="main")
+        self.backends: list[GitBackend] = [GitPythonBackend(), BatchBackend()]
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for backend in self.backends:
+            backend.close(self.repo)
+        shutil.rmtree(TestBackends.temp_dir)
+        return super().tearDown()
+
+    def _write(self, name: str, content: str) -> Path:
+        path = self.repo_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def test_01_commit_given_paths(self) -> None:
+        """
+        Verify that added, modified and deleted paths are committed, and that nothing is committed without changes.
+        """
+        for backend in self.backends:
+            with self.subTest(backend=type(backend).__name__):
+                # Arrange
+                directory = self._write(f"{type(backend).__name__}/hw/a.txt", "a").parent
+                self._write(f"{type(backend).__name__}/hw/nested/b.txt", "b")
+                removed = self._write(f"{type(backend).__name__}/removed.txt", "removed")
+                backend.commit(self.repo, "Add", [directory, removed])
+                removed.unlink()
+
+                # Act
+                is_committed = backend.commit(self.repo, "Remove", [removed])
+                is_committed_again = backend.commit(self.repo, "Nothing", [directory])
+
+                # Assert
+                self.assertTrue(is_committed)
+                self.assertFalse(is_committed_again)
+                self.assertEqual(self.repo.head.commit.message.strip(), "Remove")
+                files = {blob.path for blob in self.repo.head.commit.tree.traverse() if blob.type == "blob"}
+                self.assertIn(f"{type(backend).__name__}/hw/nested/b.txt", files)
+                self.assertNotIn(f"{type(backend).__name__}/removed.txt", files)
+
+    def test_02_read_blob(self) -> None:
+        """
+        Verify that files of a commit are read, and that a missing file raises an error.
+        """
+        # Arrange
+        self._write("a.txt", "first")
+        GitPythonBackend().commit(self.repo, "First")
+        first = self.repo.head.commit.hexsha
+        self._write("a.txt", "second\n")
+        GitPythonBackend().commit(self.repo, "Second")
+
+        for backend in self.backends:
+            with self.subTest(backend=type(backend).__name__):
+                # Act
+                actual_first = backend.read_blob(self.repo, first, "a.txt")
+                actual_second = backend.read_blob(self.repo, "HEAD", "a.txt")
+
+                # Assert
+                self.assertEqual(actual_first, b"first")
+                self.assertEqual(actual_second, b"second\n")
+                with self.assertRaises(KeyError):
+                    backend.read_blob(self.repo, "HEAD", "missing.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,12 +2,14 @@
 Tests for the db module.
 """
 
+import os
+import tempfile
 import unittest
 from unittest.mock import patch, mock_open, MagicMock
 import json
 from datetime import datetime
 
-from homework_deployer.db import load, add, remove
+from homework_deployer.db import load, add, remove, save, get_next_free_ids
 from homework_deployer.event import Event
 
 
@@ -22,7 +24,7 @@ class TestLoad(unittest.TestCase):
         Verify that load returns correct data when file exists.
         """
         # Arrange
-        test_data = {"test1": (42, "/path/to/config")}
+        test_data = {"test1": (42, "/path/to/config", {"sha256": "abc"})}
         mock_file.return_value.__enter__.return_value.read.return_value = json.dumps(test_data)
 
         # Act
@@ -31,12 +33,28 @@ class TestLoad(unittest.TestCase):
         # Assert
         self.assertEqual(actual_result, test_data)
 
+    @patch("builtins.open")
+    def test_03_load_entry_without_snapshot(self, mock_file: MagicMock) -> None:
+        """
+        Verify that entries without a snapshot are loaded with an empty one.
+        """
+        # Arrange
+        test_data = {"test1": [42, "/path/to/config"]}
+        mock_file.return_value.__enter__.return_value.read.return_value = json.dumps(test_data)
+
+        # Act
+        actual_result = load("test.json")
+
+        # Assert
+        self.assertEqual(actual_result, {"test1": (42, "/path/to/config", {})})
+
     def test_02_file_not_found(self) -> None:
         """
         Verify that load returns empty dict when file doesn't exist.
         """
         # Act
-        actual_result = load("test.json")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            actual_result = load(os.path.join(temp_dir, "db.json"))
 
         # Assert
         self.assertEqual(actual_result, {})
@@ -47,10 +65,13 @@ class TestAdd(unittest.TestCase):
     Test suite for the add function.
     """
 
+    @patch("homework_deployer.db.os.replace")
     @patch("builtins.open", new_callable=mock_open)
     @patch("json.dump")
     @patch("homework_deployer.db.load")
-    def test_01_add_new_event(self, mock_load: MagicMock, mock_json_dump: MagicMock, mock_file: MagicMock) -> None:
+    def test_01_add_new_event(
+        self, mock_load: MagicMock, mock_json_dump: MagicMock, mock_file: MagicMock, _: MagicMock
+    ) -> None:
         """
         Verify that add correctly stores a new event.
         """
@@ -69,10 +90,11 @@ class TestAdd(unittest.TestCase):
 
         expected_path = "/config/path"
         expected_at_id = 42
+        expected_snapshot = {"sha256": "abc"}
 
-        expected_entry = {expected_id: (expected_at_id, expected_path)}
+        expected_entry = {expected_id: (expected_at_id, expected_path, expected_snapshot)}
         # Act
-        add("test.json", event, expected_path, expected_at_id)
+        add("test.json", event, expected_path, expected_at_id, expected_snapshot)
 
         # Assert
         mock_json_dump.assert_called_once_with(expected_entry, mock_file(), indent=4)
@@ -83,9 +105,10 @@ class TestRemove(unittest.TestCase):
     Test suite for the remove function.
     """
 
+    @patch("homework_deployer.db.os.replace")
     @patch("builtins.open", new_callable=mock_open)
     @patch("homework_deployer.db.load")
-    def test_01_remove_existing_event(self, mock_load: MagicMock, mock_file: MagicMock) -> None:
+    def test_01_remove_existing_event(self, mock_load: MagicMock, mock_file: MagicMock, _: MagicMock) -> None:
         """
         Verify that remove correctly deletes an existing event.
         """
@@ -114,3 +137,74 @@ class TestRemove(unittest.TestCase):
 
         # Assert
         mock_file().write.assert_not_called()
+
+
+class TestSave(unittest.TestCase):
+    """
+    Test suite for the save function.
+    """
+
+    def test_01_replaced_at_once(self) -> None:
+        """
+        Verify that the database is written to a temporary file, which then replaces it.
+        """
+        # Arrange
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "db.json")
+            save(db_path, {"1": (11, "hw1.json", {})})
+
+            # Act
+            with patch("homework_deployer.db.os.replace", side_effect=OSError("No space left on device")):
+                with self.assertRaises(OSError):
+                    save(db_path, {})
+
+            # Assert
+            self.assertEqual(load(db_path), {"1": (11, "hw1.json", {})})
+
+
+class TestGetNextFreeIds(unittest.TestCase):
+    """
+    Test suite for the get_next_free_ids function.
+    """
+
+    @patch("homework_deployer.db.load")
+    def test_01_fill_holes_first(self, mock_load: MagicMock) -> None:
+        """
+        Verify that holes in the existing ids are used before new ids.
+        """
+        # Arrange
+        mock_load.return_value = {"1": (1, "", {}), "3": (3, "", {}), "4": (4, "", {})}
+
+        # Act
+        actual_result = get_next_free_ids("test.json", 3)
+
+        # Assert
+        self.assertEqual(actual_result, ["2", "5", "6"])
+
+    @patch("homework_deployer.db.load")
+    def test_02_empty_db(self, mock_load: MagicMock) -> None:
+        """
+        Verify that ids start from 1 in an empty DB.
+        """
+        # Arrange
+        mock_load.return_value = {}
+
+        # Act
+        actual_result = get_next_free_ids("test.json", 2)
+
+        # Assert
+        self.assertEqual(actual_result, ["1", "2"])
+
+    @patch("homework_deployer.db.load")
+    def test_03_dependencies_are_not_free(self, mock_load: MagicMock) -> None:
+        """
+        Verify that ids registered events depend on are not reused, even if they are not registered anymore.
+        """
+        # Arrange
+        mock_load.return_value = {"3": (3, "", {"event": {"depends_on": ["1"]}})}
+
+        # Act
+        actual_result = get_next_free_ids("test.json", 2)
+
+        # Assert
+        self.assertEqual(actual_result, ["2", "4"])
@@ -9,16 +9,22 @@ from datetime import datetime
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
-from git import Repo
+from git import PushInfo, Repo
 from git.exc import GitCommandError
 
+import homework_deployer.backend as backend
 import homework_deployer.constants as const
 from homework_deployer.executor import (
+    checkout_branch,
     execute,
+    execute_group,
     clone_repo,
     copy_files,
     commit_changes,
     expand_patterns,
+    push_changes,
+    resume,
+    PushError,
 )
 from homework_deployer.event import Event
 
@@ -28,8 +34,29 @@ class TestExecute(unittest.TestCase):
     Test suite for the execute function.
     """
 
+    temp_dir = os.path.join("/tmp", "test_execute")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestExecute.temp_dir):
+            shutil.rmtree(TestExecute.temp_dir)
+
+        self.work_root = Path(TestExecute.temp_dir) / "work"
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=self.work_root)
+        self.patch.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestExecute.temp_dir, ignore_errors=True)
+        return super().tearDown()
+
+    @patch("homework_deployer.executor.history.record")
     @patch("datetime.datetime")
-    @patch("homework_deployer.executor.shutil.rmtree")
+    @patch("homework_deployer.executor.fingerprint")
+    @patch("homework_deployer.executor.workdir.preflight")
+    @patch("homework_deployer.executor.workdir.record_size")
+    @patch("homework_deployer.executor.workdir.discard")
+    @patch("homework_deployer.executor.push_changes")
     @patch("homework_deployer.executor.commit_changes")
     @patch("homework_deployer.executor.copy_files")
     @patch("homework_deployer.executor.expand_patterns")
@@ -40,8 +67,13 @@ class TestExecute(unittest.TestCase):
         mock_expand: MagicMock,
         mock_copy: MagicMock,
         mock_commit: MagicMock,
-        mock_rmtree: MagicMock,
+        mock_push: MagicMock,
+        mock_discard: MagicMock,
+        mock_record_size: MagicMock,
+        mock_preflight: MagicMock,
+        mock_fingerprint: MagicMock,
         mock_time: MagicMock,
+        mock_record_history: MagicMock,
     ) -> None:
         """
         Verify that execute successfully processes an event.
@@ -57,6 +89,7 @@ class TestExecute(unittest.TestCase):
             date=test_date,
             patterns=[(str("*.txt"), None)],  # Cast to ensure correct type
         )
+        mock_fingerprint.is_up_to_date.return_value = False
         mock_source_repo = MagicMock()
         mock_dest_repo = MagicMock()
         mock_clone.side_effect = [mock_source_repo, mock_dest_repo]
@@ -66,19 +99,241 @@ class TestExecute(unittest.TestCase):
         mock_time.now.return_value.strftime.return_value = mocked_time
 
         mocked_run_id = f"run_{event.id}{mocked_time}"
-        expected_source_dir = Path(const.WORK_DIR) / mocked_run_id / const.SOURCE_REPO_DIR
-        expected_destination_dir = Path(const.WORK_DIR) / mocked_run_id / const.DESTINATION_REPO_DIR
+        expected_source_dir = self.work_root / mocked_run_id / const.SOURCE_REPO_DIR
+        expected_destination_dir = self.work_root / mocked_run_id / const.DESTINATION_REPO_DIR
 
         # Act
         execute(event)
 
         # Assert
-        mock_clone.assert_any_call(event.origin, expected_source_dir)
+        mock_clone.assert_any_call(event.origin, expected_source_dir, None)
         mock_clone.assert_any_call(event.destination, expected_destination_dir)
         mock_expand.assert_called_once()
         mock_copy.assert_called_once()
         mock_commit.assert_called_once()
-        mock_rmtree.assert_called_once()
+        self.assertEqual(mock_push.call_args[0][0], mock_dest_repo)
+        mock_preflight.assert_called_once_with(event)
+        mock_discard.assert_called_once_with(self.work_root / mocked_run_id)
+        mock_fingerprint.record.assert_called_once()
+        self.assertEqual(set(mock_record_history.call_args[0][1]), set(const.Phase))
+
+    @patch("homework_deployer.executor.fingerprint.is_up_to_date")
+    @patch("homework_deployer.executor.clone_repo")
+    def test_02_skip_unchanged(self, mock_clone: MagicMock, mock_is_up_to_date: MagicMock) -> None:
+        """
+        Verify that execute does nothing if the last deployment had the same content.
+        """
+        # Arrange
+        mock_is_up_to_date.return_value = True
+        event = Event(
+            id="test1",
+            name="test_event",
+            description="Test event",
+            origin="git@github.com:source/repo.git",
+            destination="git@github.com:dest/repo.git",
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("*.txt", None)],
+        )
+
+        # Act
+        execute(event)
+
+        # Assert
+        mock_clone.assert_not_called()
+
+
+class TestResume(unittest.TestCase):
+    """
+    Test suite for resuming failed runs.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_resume")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestResume.temp_dir):
+            shutil.rmtree(TestResume.temp_dir)
+
+        self.origin_path = os.path.join(TestResume.temp_dir, "origin.git")
+        self.destination_path = os.path.join(TestResume.temp_dir, "destination.git")
+        Repo.init(self.destination_path, bare=True, initial_branch="main")
+
+        origin = Repo.init(self.origin_path, initial_branch="main")
+        with open(os.path.join(self.origin_path, "a.txt"), "w", encoding="utf-8") as file:
+            file.write("a")
+        commit_changes(origin, "Initial commit")
+
+        self.work_dir = os.path.join(TestResume.temp_dir, "work")
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestResume.temp_dir)
+        return super().tearDown()
+
+    def test_01_resume_after_failed_push(self) -> None:
+        """
+        Verify that a run failed at push continues from the push, without cloning again.
+        """
+        # Arrange
+        event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin=self.origin_path,
+            destination=self.destination_path,
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("a.txt", None)],
+        )
+
+        fingerprints_path = os.path.join(TestResume.temp_dir, "fingerprints.json")
+        with patch("homework_deployer.workdir.get_root", return_value=Path(self.work_dir)), patch(
+            "homework_deployer.workdir.subprocess.Popen"
+        ) as mock_popen, patch("homework_deployer.fingerprint.const.FINGERPRINTS_PATH", fingerprints_path):
+            with patch("homework_deployer.executor.push_changes", side_effect=PushError):
+                with self.assertRaises(PushError):
+                    execute(event)
+
+            run_id = next(Path(self.work_dir).glob("run_*")).name
+
+            # Act
+            with patch("homework_deployer.executor.clone_repo") as mock_clone:
+                with patch("homework_deployer.executor.commit_changes") as mock_commit:
+                    resumed_event = resume(run_id)
+
+        # Assert
+        mock_clone.assert_not_called()
+        mock_commit.assert_not_called()
+        self.assertEqual(resumed_event, event)
+        self.assertEqual(os.listdir(os.path.join(self.work_dir, const.TRASH_DIR)), [run_id])
+        mock_popen.assert_called_once()
+        self.assertEqual(Repo(self.destination_path).git.show("main:a.txt"), "a")
+
+
+class TestExecuteGroup(unittest.TestCase):
+    """
+    Test suite for deploying events to multiple branches of the same destination.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_execute_group")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestExecuteGroup.temp_dir):
+            shutil.rmtree(TestExecuteGroup.temp_dir)
+
+        self.origin_path = os.path.join(TestExecuteGroup.temp_dir, "origin")
+        origin = Repo.init(self.origin_path, initial_branch="main")
+        self._write(self.origin_path, "hw.txt", "starter")
+        commit_changes(origin, "Initial commit")
+        origin.git.checkout("-b", "solutions")
+        self._write(self.origin_path, "hw.txt", "solution")
+        commit_changes(origin, "Solutions")
+        origin.git.checkout("main")
+
+        self.destination_path = os.path.join(TestExecuteGroup.temp_dir, "destination.git")
+        Repo.init(self.destination_path, bare=True, initial_branch="main")
+        self.seed_path = os.path.join(TestExecuteGroup.temp_dir, "seed")
+        self.seed = Repo.clone_from(self.destination_path, self.seed_path)
+        self._write(self.seed_path, "README.md", "readme")
+        commit_changes(self.seed, "Initial commit")
+        self.seed.git.checkout("-b", "students")
+        self._write(self.seed_path, "old.txt", "old")
+        commit_changes(self.seed, "Students")
+        self.seed.remote("origin").push(["main", "students"])
+
+        self.events = [
+            Event(
+                id=event_id,
+                name="test_event",
+                description="Test event",
+                origin=self.origin_path,
+                destination=self.destination_path,
+                date=datetime(2024, 1, 1, 12, 0),
+                patterns=[("hw.txt", None)],
+                origin_ref=origin_ref,
+                destination_ref=destination_ref,
+            )
+            for event_id, origin_ref, destination_ref in [("1", None, "students"), ("2", "solutions", "teachers")]
+        ]
+
+        self.patches = [
+            patch("homework_deployer.workdir.get_root", return_value=Path(TestExecuteGroup.temp_dir) / "work"),
+            patch("homework_deployer.workdir.discard"),
+            patch("homework_deployer.workdir.preflight"),
+            patch(
+                "homework_deployer.fingerprint.const.FINGERPRINTS_PATH",
+                os.path.join(TestExecuteGroup.temp_dir, "fingerprints.json"),
+            ),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for active_patch in self.patches:
+            active_patch.stop()
+        shutil.rmtree(TestExecuteGroup.temp_dir)
+        return super().tearDown()
+
+    def _write(self, repo_path: str, name: str, content: str) -> None:
+        with open(os.path.join(repo_path, name), "w", encoding="utf-8") as file:
+            file.write(content)
+
+    def _files(self, branch: str) -> dict[str, str]:
+        repo = Repo(self.destination_path)
+        return {name: repo.git.show(f"{branch}:{name}") for name in repo.git.ls_tree("--name-only", branch).split()}
+
+    def test_01_single_atomic_push(self) -> None:
+        """
+        Verify that the branches of all events are committed in one clone, and pushed together.
+        """
+        # Arrange
+        git_backend = backend.get()
+
+        # Act
+        with patch.object(git_backend, "push", wraps=git_backend.push) as mock_push, patch.object(
+            git_backend, "clone", wraps=git_backend.clone
+        ) as mock_clone:
+            execute_group(self.events)
+
+        # Assert
+        cloned = [call.args[0] for call in mock_clone.call_args_list]
+        self.assertEqual(cloned, [self.destination_path, self.origin_path, self.origin_path])
+        mock_push.assert_called_once()
+        self.assertTrue(mock_push.call_args.kwargs["is_atomic"])
+        self.assertEqual(self._files("main"), {"README.md": "readme"})
+        self.assertEqual(self._files("students"), {"README.md": "readme", "old.txt": "old", "hw.txt": "starter"})
+        self.assertEqual(self._files("teachers"), {"README.md": "readme", "hw.txt": "solution"})
+
+    @patch("homework_deployer.executor.time.sleep")
+    def test_02_rebase_after_rejection(self, mock_sleep: MagicMock) -> None:
+        """
+        Verify that if one of the branches moved, none of them is updated, and all are pushed again after a rebase.
+        """
+        # Arrange
+        git_backend = backend.get()
+        push = git_backend.push
+        pushed_branches: list[list[str]] = []
+
+        def push_after_moving(repo: Repo, refspecs: list[str], is_atomic: bool) -> list[PushInfo]:
+            if not pushed_branches:
+                self._write(self.seed_path, "new.txt", "new")
+                commit_changes(self.seed, "Concurrent change")
+                self.seed.remote("origin").push("students")
+            push_infos = push(repo, refspecs, is_atomic)
+            pushed_branches.append(refspecs)
+            return push_infos
+
+        # Act
+        with patch.object(git_backend, "push", side_effect=push_after_moving):
+            execute_group(self.events)
+
+        # Assert
+        mock_sleep.assert_called_once()
+        self.assertEqual(len(pushed_branches), 2)
+        self.assertEqual(
+            self._files("students"), {"README.md": "readme", "old.txt": "old", "new.txt": "new", "hw.txt": "starter"}
+        )
+        self.assertEqual(self._files("teachers"), {"README.md": "readme", "hw.txt": "solution"})
 
 
 class TestCloneRepo(unittest.TestCase):
@@ -86,6 +341,18 @@ class TestCloneRepo(unittest.TestCase):
     Test suite for the clone_repo function.
     """
 
+    temp_dir = os.path.join("/tmp", "test_clone_repo")
+
+    def setUp(self) -> None:
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=Path(TestCloneRepo.temp_dir) / "work")
+        self.patch.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestCloneRepo.temp_dir, ignore_errors=True)
+        return super().tearDown()
+
     @patch("git.Repo.clone_from")
     def test_01_successful_clone(self, mock_clone_from: MagicMock) -> None:
         """
@@ -199,6 +466,170 @@ class TestCommitChanges(unittest.TestCase):
         mock_repo.remote.assert_not_called()
 
 
+class TestPushChanges(unittest.TestCase):
+    """
+    Test suite for the push_changes function.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_push_changes")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestPushChanges.temp_dir):
+            shutil.rmtree(TestPushChanges.temp_dir)
+
+        remote_path = os.path.join(TestPushChanges.temp_dir, "remote.git")
+        Repo.init(remote_path, bare=True, initial_branch="main")
+
+        self.first = self._clone(remote_path, "first")
+        self._write(self.first, "a.txt", "a")
+        commit_changes(self.first, "Initial commit")
+        self.first.remote("origin").push("main")
+
+        self.second = self._clone(remote_path, "second")
+
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=Path(TestPushChanges.temp_dir) / "work")
+        self.patch.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestPushChanges.temp_dir)
+        return super().tearDown()
+
+    def _clone(self, remote_path: str, name: str) -> Repo:
+        repo = Repo.clone_from(remote_path, os.path.join(TestPushChanges.temp_dir, name))
+        with repo.config_writer() as config:
+            config.set_value("user", "name", "test")
+            config.set_value("user", "email", "test@example.com")
+        return repo
+
+    def _write(self, repo: Repo, name: str, content: str) -> None:
+        with open(os.path.join(str(repo.working_dir), name), "w", encoding="utf-8") as file:
+            file.write(content)
+
+    @patch("homework_deployer.executor.time.sleep")
+    def test_01_rebase_after_rejection(self, mock_sleep: MagicMock) -> None:
+        """
+        Verify that a push rejected because of a concurrent push is rebased and retried.
+        """
+        # Arrange
+        self._write(self.first, "b.txt", "b")
+        commit_changes(self.first, "First change")
+        self.first.remote("origin").push()
+
+        self._write(self.second, "c.txt", "c")
+        commit_changes(self.second, "Second change")
+
+        # Act
+        push_changes(self.second)
+
+        # Assert
+        mock_sleep.assert_called_once()
+        remote_files = {blob.path for blob in self.second.commit("origin/main").tree.traverse()}
+        self.assertEqual(remote_files, {"a.txt", "b.txt", "c.txt"})
+
+    @patch("homework_deployer.executor.time.sleep")
+    def test_02_replay_after_conflict(self, mock_sleep: MagicMock) -> None:
+        """
+        Verify that the changes are replayed on top of the remote if the rebase conflicts.
+        """
+        # Arrange
+        self._write(self.first, "a.txt", "first")
+        commit_changes(self.first, "First change")
+        self.first.remote("origin").push()
+
+        self._write(self.second, "a.txt", "second")
+        commit_changes(self.second, "Second change")
+
+        def replay(repo: Repo) -> None:
+            self._write(repo, "a.txt", "second")
+            commit_changes(repo, "Second change")
+
+        # Act
+        push_changes(self.second, replay)
+
+        # Assert
+        remote_content = self.second.git.show("origin/main:a.txt")
+        self.assertEqual(remote_content, "second")
+
+    @patch("homework_deployer.executor.limiter.limit")
+    def test_03_remote_error(self, mock_limit: MagicMock) -> None:
+        """
+        Verify that errors other than a moved remote branch are not retried.
+        """
+        # Arrange
+        mock_repo = MagicMock(spec=Repo)
+        summary = "[remote rejected] (pre-receive hook declined)"
+        mock_repo.remote.return_value.push.return_value = [MagicMock(flags=PushInfo.REMOTE_REJECTED, summary=summary)]
+
+        # Act & Assert
+        with self.assertRaises(PushError):
+            push_changes(mock_repo)
+        mock_repo.remote.return_value.push.assert_called_once()
+
+    @patch("homework_deployer.executor.time.sleep")
+    @patch("homework_deployer.executor.limiter.limit")
+    def test_04_ref_lock_contention(self, mock_limit: MagicMock, mock_sleep: MagicMock) -> None:
+        """
+        Verify that a ref the remote failed to update because of a concurrent push is fetched and retried.
+        """
+        # Arrange
+        mock_repo = MagicMock(spec=Repo)
+        summary = "[remote rejected] (failed to update ref)"
+        mock_repo.remote.return_value.push.side_effect = [
+            [MagicMock(flags=PushInfo.REMOTE_REJECTED, summary=summary)],
+            [MagicMock(flags=PushInfo.FAST_FORWARD, summary="")],
+        ]
+
+        # Act
+        push_changes(mock_repo)
+
+        # Assert
+        self.assertEqual(mock_repo.remote.return_value.push.call_count, 2)
+        mock_repo.remote.return_value.fetch.assert_called_once()
+        mock_sleep.assert_called_once()
+
+
+class TestCheckoutBranch(unittest.TestCase):
+    """
+    Test suite for the checkout_branch function.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_checkout_branch")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestCheckoutBranch.temp_dir):
+            shutil.rmtree(TestCheckoutBranch.temp_dir)
+
+        remote_path = os.path.join(TestCheckoutBranch.temp_dir, "remote.git")
+        Repo.init(remote_path, bare=True, initial_branch="main")
+        self.repo = Repo.clone_from(remote_path, os.path.join(TestCheckoutBranch.temp_dir, "clone"))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestCheckoutBranch.temp_dir)
+        return super().tearDown()
+
+    def test_01_new_branches_start_empty(self) -> None:
+        """
+        Verify that branches created in a destination without commits do not contain the files of
+        the branch committed before them.
+        """
+        # Arrange
+        checkout_branch(self.repo, "first", "main")
+        with open(os.path.join(str(self.repo.working_dir), "first.txt"), "w", encoding="utf-8") as file:
+            file.write("first")
+        commit_changes(self.repo, "First branch")
+
+        # Act
+        checkout_branch(self.repo, "second", "main")
+
+        # Assert
+        self.assertEqual(self.repo.active_branch.name, "second")
+        self.assertEqual(list(self.repo.index.entries), [])
+        self.assertEqual(os.listdir(str(self.repo.working_dir)), [".git"])
+
+
 class TestPatterns(unittest.TestCase):
     temp_dir = os.path.join("/tmp", "test_patterns")
 
@@ -0,0 +1,147 @@
+"""
+Tests for the fingerprint module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from git import Repo
+
+from homework_deployer.event import Event, Transform
+from homework_deployer.executor import commit_changes
+from homework_deployer.fingerprint import get_deployed_at, is_up_to_date, load, record
+
+
+class TestFingerprint(unittest.TestCase):
+    """
+    Test suite for recording and checking deployment fingerprints.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_fingerprint")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestFingerprint.temp_dir):
+            shutil.rmtree(TestFingerprint.temp_dir)
+
+        self.origin_path = os.path.join(TestFingerprint.temp_dir, "origin")
+        self.origin = Repo.init(self.origin_path, initial_branch="main")
+        self._write("a.txt", "a")
+        self._write("b.txt", "b")
+        commit_changes(self.origin, "Initial commit")
+
+        self.destination_path = os.path.join(TestFingerprint.temp_dir, "destination")
+        self.destination = Repo.init(self.destination_path, initial_branch="main")
+        self.destination.index.commit("Initial commit")
+
+        self.event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin=self.origin_path,
+            destination=self.destination_path,
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("a.txt", None)],
+        )
+
+        self.patches = [
+            patch("homework_deployer.workdir.get_root", return_value=Path(TestFingerprint.temp_dir) / "work"),
+            patch(
+                "homework_deployer.fingerprint.const.FINGERPRINTS_PATH",
+                os.path.join(TestFingerprint.temp_dir, "fingerprints.json"),
+            ),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for active_patch in self.patches:
+            active_patch.stop()
+        shutil.rmtree(TestFingerprint.temp_dir)
+        return super().tearDown()
+
+    def _write(self, name: str, content: str) -> None:
+        with open(os.path.join(self.origin_path, name), "w", encoding="utf-8") as file:
+            file.write(content)
+
+    def test_01_never_deployed(self) -> None:
+        """
+        Verify that an event never deployed is not up to date.
+        """
+        self.assertFalse(is_up_to_date(self.event))
+
+    def test_02_nothing_changed(self) -> None:
+        """
+        Verify that an event is up to date if nothing changed since it was recorded.
+        """
+        # Arrange
+        record(self.event, self.origin, self.origin.head.commit.hexsha, self.destination.head.commit.hexsha)
+
+        # Act & Assert
+        self.assertTrue(is_up_to_date(self.event))
+
+    def test_03_unmatched_file_changed(self) -> None:
+        """
+        Verify that changes of files not matched by the patterns do not cause a deployment.
+        """
+        # Arrange
+        record(self.event, self.origin, self.origin.head.commit.hexsha, self.destination.head.commit.hexsha)
+        self._write("b.txt", "changed")
+        commit_changes(self.origin, "Change b")
+
+        # Act & Assert
+        self.assertTrue(is_up_to_date(self.event))
+
+    def test_04_matched_file_changed(self) -> None:
+        """
+        Verify that changes of matched files cause a deployment.
+        """
+        # Arrange
+        record(self.event, self.origin, self.origin.head.commit.hexsha, self.destination.head.commit.hexsha)
+        self._write("a.txt", "changed")
+        commit_changes(self.origin, "Change a")
+
+        # Act & Assert
+        self.assertFalse(is_up_to_date(self.event))
+
+    def test_05_destination_moved(self) -> None:
+        """
+        Verify that a destination changed by someone else causes a deployment.
+        """
+        # Arrange
+        record(self.event, self.origin, self.origin.head.commit.hexsha, self.destination.head.commit.hexsha)
+        self.destination.index.commit("Other change")
+
+        # Act & Assert
+        self.assertFalse(is_up_to_date(self.event))
+
+    def test_06_transforms_changed(self) -> None:
+        """
+        Verify that adding a transform to an event which was already deployed causes a deployment,
+        even if the origin did not move.
+        """
+        # Arrange
+        record(self.event, self.origin, self.origin.head.commit.hexsha, self.destination.head.commit.hexsha)
+        self.event.transforms = [Transform(files="*.txt", strip_markers=("# BEGIN", "# END"))]
+
+        # Act & Assert
+        self.assertFalse(is_up_to_date(self.event))
+
+    def test_07_not_cloned(self) -> None:
+        """
+        Verify that the push of an origin which was not cloned is recorded, but never skipped.
+        """
+        # Arrange
+        self.event.origin_fetch = "remote"
+
+        # Act
+        record(self.event, None, None, self.destination.head.commit.hexsha)
+
+        # Assert
+        self.assertIsNotNone(get_deployed_at(load(), self.event))
+        self.assertFalse(is_up_to_date(self.event))
@@ -0,0 +1,71 @@
+"""
+Tests for the history module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import homework_deployer.constants as const
+from homework_deployer.event import Event
+from homework_deployer.history import estimate, record
+
+
+class TestHistory(unittest.TestCase):
+    """
+    Test suite for recording and estimating phase durations.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_history")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestHistory.temp_dir):
+            shutil.rmtree(TestHistory.temp_dir)
+        os.makedirs(TestHistory.temp_dir)
+
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=Path(TestHistory.temp_dir))
+        self.patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestHistory.temp_dir)
+        return super().tearDown()
+
+    def _event(self, origin: str) -> Event:
+        return Event(
+            name="test_event",
+            description="Test event",
+            origin=origin,
+            destination="destination",
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("hw", None)],
+        )
+
+    def test_01_estimate(self) -> None:
+        """
+        Verify that the durations of a deployment are preferred, with the median of all runs as a fallback.
+        """
+        # Arrange
+        record(self._event("a"), {const.Phase.CLONED: 1.0, const.Phase.PUSHED: 4.0})
+        record(self._event("b"), {const.Phase.CLONED: 2.0})
+        record(self._event("c"), {const.Phase.CLONED: 6.0})
+        record(self._event("a"), {const.Phase.CLONED: 3.0})
+
+        # Act
+        actual_known = estimate(self._event("a"))
+        actual_unknown = estimate(self._event("d"))
+
+        # Assert
+        self.assertEqual(actual_known[const.Phase.CLONED], 3.0)
+        self.assertEqual(actual_known[const.Phase.PUSHED], 4.0)
+        self.assertIsNone(actual_known[const.Phase.COPIED])
+        self.assertEqual(actual_unknown[const.Phase.CLONED], 3.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,283 @@
+"""
+Tests for the commands of the homework_deployer package.
+"""
+
+import io
+import logging
+import os
+import shutil
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import homework_deployer.db as db
+import homework_deployer.snapshot as snapshot
+from homework_deployer import expand_config_paths, plan_event, register, run
+from homework_deployer.event import Event
+from homework_deployer.plan import Plan
+
+
+class TestRun(unittest.TestCase):
+    """
+    Test suite for running registered events with their dependencies.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_homework_deployer")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestRun.temp_dir):
+            shutil.rmtree(TestRun.temp_dir)
+        os.makedirs(TestRun.temp_dir)
+
+        self.db_path = os.path.join(TestRun.temp_dir, "db.json")
+        self.logger = logging.getLogger("test_homework_deployer")
+        self.deployed: list[str] = []
+        self.patches = [
+            patch("homework_deployer.constants.DB_PATH", self.db_path),
+            patch("homework_deployer.workdir.get_root", return_value=Path(TestRun.temp_dir) / "work"),
+            patch("homework_deployer.execute", side_effect=self._execute),
+        ]
+        for current_patch in self.patches:
+            current_patch.start()
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for current_patch in self.patches:
+            current_patch.stop()
+        shutil.rmtree(TestRun.temp_dir)
+        return super().tearDown()
+
+    def _execute(self, event: Event, *_: Any) -> None:
+        time.sleep(0.2)
+        self.deployed.append(event.id)
+
+    def _register(self, event_id: str, at_id: int, date: datetime, depends_on: list[str]) -> None:
+        event = Event(
+            id=event_id,
+            name=f"event_{event_id}",
+            description="Test event",
+            origin="/source",
+            destination="/dest",
+            date=date,
+            patterns=[("*.txt", None)],
+            depends_on=depends_on,
+        )
+        config_path = os.path.join(TestRun.temp_dir, f"event_{event_id}.json")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            config_file.write(event.model_dump_json())
+        db.add(self.db_path, event, config_path, at_id, snapshot.create(event, config_path))
+
+    @patch("homework_deployer.at")
+    def test_01_dependency_fired_at_the_same_time(self, mock_at: MagicMock) -> None:
+        """
+        Verify that when the jobs of an event and its dependency fire at the same time,
+        the dependency is deployed once, before the event.
+        """
+        # Arrange
+        past = datetime.now() - timedelta(minutes=1)
+        self._register("1", 11, past, [])
+        self._register("2", 12, past, ["1"])
+        threads = [
+            threading.Thread(target=run, args=(self.logger, event_id, False, False, False, False))
+            for event_id in ["2", "1"]
+        ]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Assert
+        self.assertEqual(self.deployed, ["1", "2"])
+        self.assertEqual(db.load(self.db_path), {})
+        mock_at.register.assert_not_called()
+
+    @patch("homework_deployer.at")
+    def test_02_dependency_not_due(self, mock_at: MagicMock) -> None:
+        """
+        Verify that a dependency is not deployed before its date, and the event waiting for it is scheduled again
+        at that date.
+        """
+        # Arrange
+        future = datetime.now() + timedelta(days=1)
+        self._register("1", 11, future, [])
+        self._register("2", 12, datetime.now() - timedelta(minutes=1), ["1"])
+        mock_at.register.return_value = 13
+
+        # Act
+        run(self.logger, "2", False, False, False, False)
+
+        # Assert
+        self.assertEqual(self.deployed, [])
+        self.assertEqual(mock_at.register.call_args.args[0].date, future)
+        mock_at.deregister.assert_called_once_with(12)
+        self.assertEqual({event_id: entry[0] for event_id, entry in db.load(self.db_path).items()}, {"1": 11, "2": 13})
+
+    @patch("homework_deployer.at")
+    def test_03_unregistered_dependency(self, mock_at: MagicMock) -> None:
+        """
+        Verify that events depending on ids which are not registered are rejected, since the ids may be reused.
+        """
+        # Arrange
+        config_path = os.path.join(TestRun.temp_dir, "new.json")
+        with open(config_path, "w", encoding="utf-8") as config_file:
+            config_file.write(
+                '{"name": "new", "description": "New event", "origin": "/source", "destination": "/dest", '
+                '"date": "2024-01-01T12:00:00", "patterns": [["*.txt", null]], "depends_on": ["7"]}'
+            )
+
+        # Act
+        register(self.logger, [config_path])
+
+        # Assert
+        mock_at.register.assert_not_called()
+        self.assertEqual(db.load(self.db_path), {})
+
+
+class TestRegister(unittest.TestCase):
+    """
+    Test suite for registering batches of configs, as a whole or not at all.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_homework_deployer_register")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestRegister.temp_dir):
+            shutil.rmtree(TestRegister.temp_dir)
+        os.makedirs(os.path.join(TestRegister.temp_dir, "configs", "nested"))
+
+        self.config_paths = [self._write(f"configs/hw{index}.json", f"hw{index}") for index in range(1, 4)]
+        self.logger = logging.getLogger("test_homework_deployer")
+
+        self.db_patch = patch("homework_deployer.db")
+        self.mock_db = self.db_patch.start()
+        self.mock_db.load.return_value = {}
+        self.mock_db.get_next_free_ids.return_value = ["1", "2", "3"]
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.db_patch.stop()
+        shutil.rmtree(TestRegister.temp_dir)
+        return super().tearDown()
+
+    def _write(self, name: str, event_name: str) -> str:
+        path = os.path.join(TestRegister.temp_dir, name)
+        with open(path, "w", encoding="utf-8") as config_file:
+            config_file.write(
+                f'{{"name": "{event_name}", "description": "Test event", "origin": "/source", "destination": "/dest", '
+                '"date": "2024-01-01T12:00:00", "patterns": [["*.txt", null]]}'
+            )
+        return path
+
+    @patch("homework_deployer.at")
+    def test_01_registered(self, mock_at: MagicMock) -> None:
+        """
+        Verify that all events of a batch are stored with a single write.
+        """
+        # Arrange
+        mock_at.register.side_effect = lambda event: 10 + int(event.id)
+
+        # Act
+        register(self.logger, self.config_paths)
+
+        # Assert
+        entries = self.mock_db.add_many.call_args.args[1]
+        expected_entries = {str(index): (10 + index, path) for index, path in enumerate(self.config_paths, 1)}
+        self.assertEqual({event_id: entry[:2] for event_id, entry in entries.items()}, expected_entries)
+        mock_at.deregister_many.assert_not_called()
+
+    @patch("homework_deployer.at")
+    def test_02_invalid_config(self, mock_at: MagicMock) -> None:
+        """
+        Verify that one invalid config aborts the whole batch, before anything is scheduled.
+        """
+        # Arrange
+        with open(self.config_paths[1], "w", encoding="utf-8") as config_file:
+            config_file.write('{"name": "broken"}')
+
+        # Act
+        register(self.logger, self.config_paths)
+
+        # Assert
+        mock_at.register.assert_not_called()
+        self.mock_db.add_many.assert_not_called()
+
+    @patch("homework_deployer.at")
+    def test_03_scheduling_failed(self, mock_at: MagicMock) -> None:
+        """
+        Verify that the jobs already scheduled are removed if scheduling a later event fails.
+        """
+        # Arrange
+        mock_at.register.side_effect = lambda event: None if event.id == "2" else 10 + int(event.id)
+
+        # Act
+        register(self.logger, self.config_paths)
+
+        # Assert
+        self.assertEqual(sorted(mock_at.deregister_many.call_args.args[0]), [11, 13])
+        self.mock_db.add_many.assert_not_called()
+
+    @patch("homework_deployer.at")
+    def test_04_storing_failed(self, mock_at: MagicMock) -> None:
+        """
+        Verify that all scheduled jobs are removed if the events cannot be stored.
+        """
+        # Arrange
+        mock_at.register.side_effect = lambda event: 10 + int(event.id)
+        self.mock_db.add_many.side_effect = OSError("No space left on device")
+
+        # Act & Assert
+        with self.assertRaises(OSError):
+            register(self.logger, self.config_paths)
+        self.assertEqual(sorted(mock_at.deregister_many.call_args.args[0]), [11, 12, 13])
+
+    def test_05_expand_config_paths(self) -> None:
+        """
+        Verify that directories and glob patterns are expanded to config files, without duplicates.
+        """
+        # Arrange
+        nested_path = self._write("configs/nested/hw4.json", "hw4")
+        configs_dir = os.path.join(TestRegister.temp_dir, "configs")
+
+        # Act
+        actual_result = expand_config_paths(
+            [configs_dir, os.path.join(configs_dir, "**", "hw*.json"), self.config_paths[0]]
+        )
+
+        # Assert
+        self.assertEqual(actual_result, [*self.config_paths, nested_path])
+
+
+class TestPlanEvent(unittest.TestCase):
+    """
+    Test suite for printing the plan of a registered event.
+    """
+
+    @patch("homework_deployer.plan.plan")
+    @patch("homework_deployer.get_registered_event")
+    @patch("homework_deployer.db")
+    def test_01_abbreviated_commits(self, mock_db: MagicMock, _: MagicMock, mock_plan: MagicMock) -> None:
+        """
+        Verify that both commits are abbreviated, and a destination branch without commits is shown as new.
+        """
+        # Arrange
+        mock_db.load.return_value = {"1": (11, "hw1.json", {})}
+        mock_plan.side_effect = [Plan("a" * 40, "b" * 40, [], 0, {}), Plan("a" * 40, None, [], 0, {})]
+
+        # Act
+        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+            plan_event(logging.getLogger("test_homework_deployer"), "1")
+            plan_event(logging.getLogger("test_homework_deployer"), "1")
+
+        # Assert
+        self.assertIn("Event 1: origin at aaaaaaa, destination at bbbbbbb\n", mock_stdout.getvalue())
+        self.assertIn("Event 1: origin at aaaaaaa, destination at (new)\n", mock_stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests for the hooks module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from git import Repo
+
+from homework_deployer.event import Event
+from homework_deployer.executor import commit_changes, push_changes
+from homework_deployer.hooks import HookError, verify
+
+
+class TestVerify(unittest.TestCase):
+    """
+    Test suite for running the pre-push hooks.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_hooks")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestVerify.temp_dir):
+            shutil.rmtree(TestVerify.temp_dir)
+
+        self.repo_path = Path(TestVerify.temp_dir) / "destination"
+        self.repo = Repo.init(self.repo_path, initial_branch="main")
+        (self.repo_path / "starter.py").write_text("a = 1\n", encoding="utf-8")
+        commit_changes(self.repo, "Initial commit")
+
+        self.runs_path = Path(TestVerify.temp_dir) / "runs.txt"
+        self.event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin="origin",
+            destination="destination",
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("hw", None)],
+            hooks=[f"echo run >> {self.runs_path}", "test -f starter.py"],
+        )
+
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=Path(TestVerify.temp_dir) / "work")
+        self.patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestVerify.temp_dir)
+        return super().tearDown()
+
+    def _count_runs(self) -> int:
+        return len(self.runs_path.read_text(encoding="utf-8").splitlines()) if self.runs_path.exists() else 0
+
+    def test_01_cached_by_tree(self) -> None:
+        """
+        Verify that the hooks run once per tree - a new commit with the same tree does not run them again.
+        """
+        # Act
+        verify(self.event, self.repo)
+        self.repo.index.commit("Same tree")
+        verify(self.event, self.repo)
+        (self.repo_path / "starter.py").write_text("a = 2\n", encoding="utf-8")
+        commit_changes(self.repo, "New tree")
+        verify(self.event, self.repo)
+
+        # Assert
+        self.assertEqual(self._count_runs(), 2)
+
+    def test_02_failure_not_cached(self) -> None:
+        """
+        Verify that a failed hook raises an error with its output, and runs again on the next attempt.
+        """
+        # Arrange
+        self.event.hooks.append("echo broken starter && exit 3")
+
+        # Act & Assert
+        for _ in range(2):
+            with self.assertRaisesRegex(HookError, "exit code 3:\nbroken starter"):
+                verify(self.event, self.repo)
+        self.assertEqual(self._count_runs(), 2)
+
+    def test_03_timeout(self) -> None:
+        """
+        Verify that hooks exceeding the time limit of the event are killed.
+        """
+        # Arrange
+        self.event.hooks = ["sleep 10"]
+        self.event.hook_timeout = 0.2
+
+        # Act & Assert
+        with self.assertRaisesRegex(HookError, "did not finish in 0.2s"):
+            verify(self.event, self.repo)
+
+    @patch("homework_deployer.executor.time.sleep")
+    def test_04_rebased_tree_verified(self, _: MagicMock) -> None:
+        """
+        Verify that a tree rebased onto a concurrent remote commit is verified again before it is pushed.
+        """
+        # Arrange
+        remote_path = Path(TestVerify.temp_dir) / "remote.git"
+        Repo.init(remote_path, bare=True, initial_branch="main")
+        self.repo.create_remote("origin", str(remote_path)).push(["main"])
+        with self.repo.config_writer() as config:
+            config.set_value("user", "name", "test")
+            config.set_value("user", "email", "test@example.com")
+        other = Repo.clone_from(str(remote_path), str(Path(TestVerify.temp_dir) / "other"))
+        (Path(str(other.working_dir)) / "broken.txt").write_text("broken", encoding="utf-8")
+        commit_changes(other, "Concurrent commit")
+        other.remote("origin").push(["main"])
+
+        self.event.hooks = ["test ! -e broken.txt"]
+        (self.repo_path / "hw.txt").write_text("hw", encoding="utf-8")
+        commit_changes(self.repo, "Deployed")
+        verify(self.event, self.repo)
+
+        # Act & Assert
+        with self.assertRaisesRegex(HookError, "test ! -e broken.txt"):
+            push_changes(self.repo, None, lambda repo: verify(self.event, repo))
+        self.assertEqual(Repo(remote_path).head.commit.hexsha, other.head.commit.hexsha)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Tests for the limiter module.
+"""
+
+import os
+import shutil
+import unittest
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+from homework_deployer.limiter import get_host, acquire_slot, take_token
+from homework_deployer.settings import HostLimit
+
+
+class TestGetHost(unittest.TestCase):
+    """
+    Test suite for the get_host function.
+    """
+
+    def test_01_https_url(self) -> None:
+        """
+        Verify that the host is extracted from an HTTPS URL.
+        """
+        self.assertEqual(get_host("https://GitHub.com/user/repo"), "github.com")
+
+    def test_02_scp_like_url(self) -> None:
+        """
+        Verify that the host is extracted from an scp-like URL.
+        """
+        self.assertEqual(get_host("git@github.com:user/repo.git"), "github.com")
+
+    def test_03_ssh_url(self) -> None:
+        """
+        Verify that the host is extracted from an SSH URL with a port.
+        """
+        self.assertEqual(get_host("ssh://git@example.com:2222/user/repo.git"), "example.com")
+
+    def test_04_local_path(self) -> None:
+        """
+        Verify that local paths are grouped under a single host.
+        """
+        self.assertEqual(get_host("/srv/git/repo.git"), "local")
+
+
+class TestLimits(unittest.TestCase):
+    """
+    Test suite for the slot and token bucket limits.
+    """
+
+    locks_dir = Path("/tmp") / "test_limiter"
+
+    def setUp(self) -> None:
+        os.makedirs(TestLimits.locks_dir, exist_ok=True)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestLimits.locks_dir)
+        return super().tearDown()
+
+    @patch("homework_deployer.limiter.time.sleep")
+    def test_01_slots_are_exclusive(self, mock_sleep: MagicMock) -> None:
+        """
+        Verify that two holders of a single-slot host never run together.
+        """
+        # Arrange
+        mock_sleep.side_effect = InterruptedError
+
+        # Act & Assert
+        with acquire_slot(TestLimits.locks_dir, "host", 1):
+            with self.assertRaises(InterruptedError):
+                with acquire_slot(TestLimits.locks_dir, "host", 1):
+                    pass
+
+    @patch("homework_deployer.limiter.time.sleep")
+    def test_02_burst_then_wait(self, mock_sleep: MagicMock) -> None:
+        """
+        Verify that the bucket allows a burst of operations and then waits for a refill.
+        """
+        # Arrange
+        host_limit = HostLimit(rate=0.001, burst=2)
+        mock_sleep.side_effect = InterruptedError
+
+        # Act
+        take_token(TestLimits.locks_dir, "host", host_limit)
+        take_token(TestLimits.locks_dir, "host", host_limit)
+
+        # Assert
+        with self.assertRaises(InterruptedError):
+            take_token(TestLimits.locks_dir, "host", host_limit)
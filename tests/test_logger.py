@@ -0,0 +1,77 @@
+"""
+Tests for the logger module.
+"""
+
+import json
+import logging
+import os
+import shutil
+import unittest
+
+from homework_deployer.logger import ContextFilter, JsonFormatter, LockedRotatingFileHandler, log_context
+
+
+class TestJsonFormatter(unittest.TestCase):
+    """
+    Test suite for the JSON lines output.
+    """
+
+    def test_01_context_fields(self) -> None:
+        """
+        Verify that the event and run ids of the context are included in the output.
+        """
+        # Arrange
+        record = logging.LogRecord("homework_deployer", logging.INFO, "", 0, "Copying %d files", (2,), None)
+
+        # Act
+        with log_context("1", "run_1"):
+            ContextFilter().filter(record)
+        actual_entry = json.loads(JsonFormatter().format(record))
+
+        # Assert
+        self.assertEqual(actual_entry["message"], "Copying 2 files")
+        self.assertEqual(actual_entry["event_id"], "1")
+        self.assertEqual(actual_entry["run_id"], "run_1")
+
+
+class TestLockedRotatingFileHandler(unittest.TestCase):
+    """
+    Test suite for rotating a log file shared by multiple processes.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_logger")
+    log_path = os.path.join(temp_dir, "test.log")
+
+    def setUp(self) -> None:
+        os.makedirs(TestLockedRotatingFileHandler.temp_dir, exist_ok=True)
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestLockedRotatingFileHandler.temp_dir)
+        return super().tearDown()
+
+    def _record(self, message: str) -> logging.LogRecord:
+        return logging.LogRecord("homework_deployer", logging.INFO, "", 0, message, None, None)
+
+    def test_01_follow_rotation_of_other_handler(self) -> None:
+        """
+        Verify that a handler writes to the new file after another handler rotated it.
+        """
+        # Arrange
+        first = LockedRotatingFileHandler(TestLockedRotatingFileHandler.log_path, maxBytes=10, backupCount=2)
+        second = LockedRotatingFileHandler(TestLockedRotatingFileHandler.log_path, maxBytes=10, backupCount=2)
+
+        # Act
+        second.emit(self._record("first line"))
+        first.emit(self._record("second line"))
+        second.emit(self._record("third line"))
+        first.close()
+        second.close()
+
+        # Assert
+        with open(TestLockedRotatingFileHandler.log_path, "r", encoding="utf-8") as log_file:
+            self.assertEqual(log_file.read(), "third line\n")
+        with open(f"{TestLockedRotatingFileHandler.log_path}.1", "r", encoding="utf-8") as log_file:
+            self.assertEqual(log_file.read(), "second line\n")
+        with open(f"{TestLockedRotatingFileHandler.log_path}.2", "r", encoding="utf-8") as log_file:
+            self.assertEqual(log_file.read(), "first line\n")
@@ -0,0 +1,134 @@
+"""
+Tests for the plan module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+from git import Repo
+
+import homework_deployer.constants as const
+from homework_deployer.event import Event, Transform
+from homework_deployer.executor import commit_changes
+from homework_deployer.plan import ADDED, MODIFIED, UNCHANGED, PathChange, plan
+
+
+class TestPlan(unittest.TestCase):
+    """
+    Test suite for the plan function.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_plan")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestPlan.temp_dir):
+            shutil.rmtree(TestPlan.temp_dir)
+
+        self.origin_path = os.path.join(TestPlan.temp_dir, "origin")
+        origin = Repo.init(self.origin_path, initial_branch="main")
+        self._write(self.origin_path, "hw/same.txt", "same")
+        self._write(self.origin_path, "hw/changed.txt", "new content")
+        self._write(self.origin_path, "hw/added.txt", "added")
+        self._write(self.origin_path, "hw/task.py", "a = 1\n# BEGIN\nsecret = 2\n# END\n")
+        commit_changes(origin, "Initial commit")
+
+        self.destination_path = os.path.join(TestPlan.temp_dir, "destination.git")
+        Repo.init(self.destination_path, bare=True, initial_branch="main")
+        seed_path = os.path.join(TestPlan.temp_dir, "seed")
+        seed = Repo.clone_from(self.destination_path, seed_path)
+        self._write(seed_path, "public/same.txt", "same")
+        self._write(seed_path, "public/changed.txt", "old")
+        self._write(seed_path, "public/task.py", "a = 1\n")
+        commit_changes(seed, "Initial commit")
+        seed.remote("origin").push("main")
+
+        self.event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin=self.origin_path,
+            destination=self.destination_path,
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("hw", "public")],
+            transforms=[Transform(files="**/*.py", strip_markers=("# BEGIN", "# END"))],
+        )
+
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=Path(TestPlan.temp_dir) / "work")
+        self.patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestPlan.temp_dir)
+        return super().tearDown()
+
+    def _write(self, repo_path: str, name: str, content: str) -> None:
+        path = Path(repo_path) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def test_01_changes(self) -> None:
+        """
+        Verify that destination paths are compared by object ids, with the transforms applied.
+        """
+        # Act
+        actual_result = plan(self.event)
+
+        # Assert
+        self.assertEqual(
+            actual_result.changes,
+            [
+                PathChange("public/added.txt", ADDED, 5),
+                PathChange("public/changed.txt", MODIFIED, 11),
+                PathChange("public/same.txt", UNCHANGED, 4),
+                PathChange("public/task.py", UNCHANGED, 6),
+            ],
+        )
+        self.assertEqual(actual_result.push_size, 16)
+        self.assertEqual(actual_result.durations, {phase: None for phase in const.Phase})
+
+    def test_02_empty_destination(self) -> None:
+        """
+        Verify that all paths are added to a destination without commits.
+        """
+        # Arrange
+        empty_path = os.path.join(TestPlan.temp_dir, "empty.git")
+        Repo.init(empty_path, bare=True, initial_branch="main")
+        self.event.destination = empty_path
+
+        # Act
+        actual_result = plan(self.event)
+
+        # Assert
+        self.assertIsNone(actual_result.destination_commit)
+        self.assertEqual(actual_result.count(ADDED), 4)
+
+    def test_03_symlinks(self) -> None:
+        """
+        Verify that symlinks are compared by the files they point to, and symlinked directories by their files,
+        as the copy dereferences them.
+        """
+        # Arrange
+        origin = Repo(self.origin_path)
+        self._write(self.origin_path, "shared/data.txt", "same")
+        os.remove(os.path.join(self.origin_path, "hw", "same.txt"))
+        os.symlink("../shared/data.txt", os.path.join(self.origin_path, "hw", "same.txt"))
+        os.symlink("../shared", os.path.join(self.origin_path, "hw", "shared"))
+        commit_changes(origin, "Add symlinks")
+
+        # Act
+        actual_result = plan(self.event)
+
+        # Assert
+        self.assertIn(PathChange("public/same.txt", UNCHANGED, 4), actual_result.changes)
+        self.assertIn(PathChange("public/shared/data.txt", ADDED, 4), actual_result.changes)
+        self.assertNotIn("public/shared", [change.path for change in actual_result.changes])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+"""
+Tests for the reconcile module.
+"""
+
+import json
+import os
+import shutil
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import homework_deployer.db as db
+import homework_deployer.fingerprint as fingerprint
+from homework_deployer.event import Event
+from homework_deployer.reconcile import plan, reconcile
+
+NOW = datetime(2024, 6, 1, 12, 0)
+
+
+def make_event(event_id: str, date: datetime) -> Event:
+    """
+    Create an event with the given id and date.
+    """
+    return Event(
+        id=event_id,
+        name=f"event_{event_id}",
+        description="Test event",
+        origin=f"origin_{event_id}",
+        destination="destination",
+        date=date,
+        patterns=[("hw", None)],
+    )
+
+
+class TestReconcile(unittest.TestCase):
+    """
+    Test suite for the plan and reconcile functions.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_reconcile")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestReconcile.temp_dir):
+            shutil.rmtree(TestReconcile.temp_dir)
+        os.makedirs(TestReconcile.temp_dir)
+
+        self.db_path = os.path.join(TestReconcile.temp_dir, "db.json")
+        self.events = {
+            "1": make_event("1", datetime(2024, 7, 1)),  # Future, job queued
+            "2": make_event("2", datetime(2024, 7, 1)),  # Future, job missing
+            "3": make_event("3", datetime(2024, 5, 1)),  # Past, job gone, deployed
+            "4": make_event("4", datetime(2024, 5, 1)),  # Past, job still queued
+            "6": make_event("6", datetime(2024, 5, 1)),  # Past, job gone, failed
+        }
+        entries: dict[str, db.Entry] = {
+            "1": (11, "1.json", {"event": "1"}),
+            "2": (12, "2.json", {"event": "2"}),
+            "3": (13, "3.json", {"event": "3"}),
+            "4": (14, "4.json", {"event": "4"}),
+            "5": (15, "5.json", {}),  # Cannot be loaded, job still queued
+            "6": (16, "6.json", {"event": "6"}),
+        }
+        db.save(self.db_path, entries)
+        self.jobs = {11: "", 14: "", 15: "", 99: ""}
+        self.fingerprints = {
+            fingerprint.get_key(self.events["3"]): {"deployed_at": datetime(2024, 5, 1, 0, 1).astimezone().isoformat()},
+            fingerprint.get_key(self.events["6"]): {"deployed_at": datetime(2024, 4, 1).astimezone().isoformat()},
+        }
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestReconcile.temp_dir)
+        return super().tearDown()
+
+    def _get_event(self, event_id: str) -> Event:
+        if event_id not in self.events:
+            raise FileNotFoundError(f"{event_id}.json")
+        return self.events[event_id]
+
+    def test_01_plan(self) -> None:
+        """
+        Verify that the store is compared with the queue as sets of job ids.
+        """
+        # Act
+        actual_result = plan(db.load(self.db_path), self.jobs, self._get_event, self.fingerprints, NOW)
+
+        # Assert
+        self.assertEqual(list(actual_result.resubmitted), ["2"])
+        self.assertEqual(actual_result.past, ["3"])
+        self.assertEqual(actual_result.pending, ["6"])
+        self.assertEqual(actual_result.invalid, ["5"])
+        self.assertEqual(actual_result.kept, ["1", "4"])
+
+    @patch("homework_deployer.reconcile.fingerprint.load")
+    @patch("homework_deployer.reconcile.at")
+    def test_02_reconcile_in_one_write(self, mock_at: MagicMock, mock_load: MagicMock) -> None:
+        """
+        Verify that missing jobs are submitted again, deployed past events are removed with a single write,
+        past events which failed and events with invalid configs are kept, together with their jobs,
+        and that jobs not referenced by the store are left alone.
+        """
+        # Arrange
+        mock_load.return_value = self.fingerprints
+        mock_at.list_jobs.return_value = self.jobs
+        mock_at.register.return_value = 21
+
+        # Act
+        with patch("homework_deployer.reconcile.db.save", wraps=db.save) as mock_save:
+            actual_result = reconcile(self.db_path, self._get_event, NOW)
+
+        # Assert
+        assert actual_result is not None
+        self.assertEqual(actual_result.resubmitted, ["2"])
+        self.assertEqual(actual_result.failed, [])
+        self.assertEqual(actual_result.pending, ["6"])
+        self.assertEqual(actual_result.invalid, ["5"])
+        mock_save.assert_called_once()
+        mock_at.register.assert_called_once_with(self.events["2"])
+        mock_at.deregister.assert_not_called()
+        mock_at.deregister_many.assert_not_called()
+        with open(self.db_path, "r", encoding="utf-8") as db_file:
+            content = json.load(db_file)
+        self.assertEqual(sorted(content), ["1", "2", "4", "5", "6"])
+        self.assertEqual(content["2"][0], 21)
+
+    @patch("homework_deployer.reconcile.at")
+    def test_03_unreadable_queue(self, mock_at: MagicMock) -> None:
+        """
+        Verify that nothing is changed if the queue cannot be read.
+        """
+        # Arrange
+        mock_at.list_jobs.return_value = None
+
+        # Act
+        actual_result = reconcile(self.db_path, self._get_event, NOW)
+
+        # Assert
+        self.assertIsNone(actual_result)
+        self.assertEqual(sorted(db.load(self.db_path)), ["1", "2", "3", "4", "5", "6"])
+        mock_at.register.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
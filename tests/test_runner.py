@@ -0,0 +1,158 @@
+"""
+Tests for the runner module.
+"""
+
+import threading
+import unittest
+from datetime import datetime
+from typing import Callable
+
+import homework_deployer.constants as const
+from homework_deployer.admission import Admission, Cost
+from homework_deployer.event import Event
+from homework_deployer.runner import run_graph, exclude_blocked, find_groups
+
+
+def _event(event_id: str, depends_on: list[str]) -> Event:
+    return Event(
+        id=event_id,
+        name=f"event_{event_id}",
+        description="Test event",
+        origin="/source",
+        destination="/dest",
+        date=datetime(2024, 1, 1, 12, 0),
+        patterns=[("*.txt", None)],
+        depends_on=depends_on,
+    )
+
+
+class TestRunGraph(unittest.TestCase):
+    """
+    Test suite for the run_graph function.
+    """
+
+    def setUp(self) -> None:
+        self.order: list[str] = []
+        self.lock = threading.Lock()
+        return super().setUp()
+
+    def _run(self, failing: set[str]) -> Callable[[Event], None]:
+        def run(event: Event) -> None:
+            with self.lock:
+                self.order.append(event.id)
+            if event.id in failing:
+                raise RuntimeError("failed")
+
+        return run
+
+    def test_01_dependencies_run_first(self) -> None:
+        """
+        Verify that every event runs after its dependencies.
+        """
+        # Arrange
+        events = {"1": _event("1", []), "2": _event("2", ["1"]), "3": _event("3", ["1", "2"]), "4": _event("4", [])}
+
+        # Act
+        outcomes = run_graph(events, self._run(set()), 4)
+
+        # Assert
+        self.assertEqual(set(outcomes.values()), {const.Outcome.SUCCEEDED})
+        self.assertLess(self.order.index("1"), self.order.index("2"))
+        self.assertLess(self.order.index("2"), self.order.index("3"))
+
+    def test_02_dependents_of_failed_are_skipped(self) -> None:
+        """
+        Verify that direct and indirect dependents of a failed event are skipped, and other events run.
+        """
+        # Arrange
+        events = {"1": _event("1", []), "2": _event("2", ["1"]), "3": _event("3", ["2"]), "4": _event("4", [])}
+
+        # Act
+        outcomes = run_graph(events, self._run({"1"}), 2)
+
+        # Assert
+        self.assertEqual(
+            outcomes,
+            {
+                "1": const.Outcome.FAILED,
+                "2": const.Outcome.SKIPPED,
+                "3": const.Outcome.SKIPPED,
+                "4": const.Outcome.SUCCEEDED,
+            },
+        )
+        self.assertEqual(sorted(self.order), ["1", "4"])
+
+    def test_03_cycle_is_skipped(self) -> None:
+        """
+        Verify that events depending on each other are skipped.
+        """
+        # Arrange
+        events = {"1": _event("1", ["2"]), "2": _event("2", ["1"]), "3": _event("3", [])}
+
+        # Act
+        outcomes = run_graph(events, self._run(set()), 2)
+
+        # Assert
+        self.assertEqual(outcomes["1"], const.Outcome.SKIPPED)
+        self.assertEqual(outcomes["2"], const.Outcome.SKIPPED)
+        self.assertEqual(outcomes["3"], const.Outcome.SUCCEEDED)
+
+    def test_04_admission(self) -> None:
+        """
+        Verify that events start by their dates, only while their costs fit the budget.
+        """
+        # Arrange
+        events = {event_id: _event(event_id, []) for event_id in ["1", "2", "3"]}
+        for day, event in zip([3, 1, 2], events.values()):
+            event.date = datetime(2024, 1, day, 12, 0)
+        admission = Admission(events, {event_id: Cost(60, 0) for event_id in events}, Cost(100, 0))
+
+        # Act
+        outcomes = run_graph(events, self._run(set()), 4, admission)
+
+        # Assert
+        self.assertEqual(set(outcomes.values()), {const.Outcome.SUCCEEDED})
+        self.assertEqual(self.order, ["2", "3", "1"])
+        self.assertEqual(set(admission.waits), {"1", "2", "3"})
+
+
+class TestExcludeBlocked(unittest.TestCase):
+    """
+    Test suite for the exclude_blocked function.
+    """
+
+    def test_01_registered_dependency_not_due(self) -> None:
+        """
+        Verify that events waiting for a registered event, directly or indirectly, are excluded.
+        """
+        # Arrange
+        events = {"2": _event("2", ["1"]), "3": _event("3", ["2"]), "4": _event("4", ["5"])}
+
+        # Act
+        runnable = exclude_blocked(events, {"1", "2", "3", "4"})
+
+        # Assert
+        self.assertEqual(set(runnable), {"4"})
+
+
+class TestFindGroups(unittest.TestCase):
+    """
+    Test suite for the find_groups function.
+    """
+
+    def test_01_branches_of_same_destination(self) -> None:
+        """
+        Verify that only independent events pushing to different branches of the same destination are grouped.
+        """
+        # Arrange
+        events = {event_id: _event(event_id, []) for event_id in ["1", "2", "3", "4", "5", "6", "7"]}
+        for event_id, branch in [("1", "a"), ("2", "b"), ("3", "b"), ("4", "c"), ("5", "d"), ("6", "e")]:
+            events[event_id].destination_ref = branch
+        events["5"].depends_on = ["4"]
+        events["6"].destination = "/other"
+
+        # Act
+        groups = find_groups(events)
+
+        # Assert
+        self.assertEqual(groups, [["1", "2"]])
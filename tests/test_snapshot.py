@@ -0,0 +1,100 @@
+"""
+Tests for the snapshot module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+
+from homework_deployer.event import Event, Transform
+from homework_deployer.snapshot import create, restore, is_stale
+
+
+class TestSnapshot(unittest.TestCase):
+    """
+    Test suite for creating, restoring and checking event snapshots.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_snapshot")
+    config_path = os.path.join(temp_dir, "event.json")
+
+    def setUp(self) -> None:
+        os.makedirs(TestSnapshot.temp_dir, exist_ok=True)
+
+        self.event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin="/source",
+            destination="/dest",
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("*.txt", None), ("a.txt", "b/c.txt")],
+            transforms=[Transform(files="**/*.py", strip_markers=("# BEGIN", "# END"), placeholders={"a": "b"})],
+        )
+
+        with open(TestSnapshot.config_path, "w", encoding="utf-8") as config:
+            config.write(self.event.model_dump_json())
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestSnapshot.temp_dir)
+        return super().tearDown()
+
+    def test_01_restore_matches_original(self) -> None:
+        """
+        Verify that a restored event is equal to the original one.
+        """
+        # Arrange
+        event_snapshot = create(self.event, TestSnapshot.config_path)
+
+        # Act
+        actual_event = restore(event_snapshot, "1")
+
+        # Assert
+        self.assertEqual(actual_event, self.event)
+
+    def test_02_unchanged_config_is_not_stale(self) -> None:
+        """
+        Verify that a snapshot is not stale if the config was only touched.
+        """
+        # Arrange
+        event_snapshot = create(self.event, TestSnapshot.config_path)
+        os.utime(TestSnapshot.config_path, ns=(0, 0))
+
+        # Act
+        actual_result = is_stale(event_snapshot, TestSnapshot.config_path)
+
+        # Assert
+        self.assertFalse(actual_result)
+
+    def test_03_changed_config_is_stale(self) -> None:
+        """
+        Verify that a snapshot is stale if the config content was changed.
+        """
+        # Arrange
+        event_snapshot = create(self.event, TestSnapshot.config_path)
+        with open(TestSnapshot.config_path, "a", encoding="utf-8") as config:
+            config.write("\n")
+        os.utime(TestSnapshot.config_path, ns=(0, 0))
+
+        # Act
+        actual_result = is_stale(event_snapshot, TestSnapshot.config_path)
+
+        # Assert
+        self.assertTrue(actual_result)
+
+    def test_04_missing_config_is_not_stale(self) -> None:
+        """
+        Verify that the snapshot is used if the config file was removed.
+        """
+        # Arrange
+        event_snapshot = create(self.event, TestSnapshot.config_path)
+        os.remove(TestSnapshot.config_path)
+
+        # Act
+        actual_result = is_stale(event_snapshot, TestSnapshot.config_path)
+
+        # Assert
+        self.assertFalse(actual_result)
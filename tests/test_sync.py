@@ -0,0 +1,170 @@
+"""
+Tests for the sync module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from git import Repo
+
+from homework_deployer.event import Event
+from homework_deployer.executor import PushError, commit_changes
+from homework_deployer.sync import sync, sync_once
+
+
+class TestSyncOnce(unittest.TestCase):
+    """
+    Test suite for the sync_once function.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_sync")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestSyncOnce.temp_dir):
+            shutil.rmtree(TestSyncOnce.temp_dir)
+
+        self.origin_path = os.path.join(TestSyncOnce.temp_dir, "origin")
+        self.origin = Repo.init(self.origin_path, initial_branch="main")
+        self._write("hw/a.txt", "a")
+        self._write("hw/b.txt", "b")
+        self._write("private.txt", "private")
+        commit_changes(self.origin, "Initial commit")
+
+        self.destination_path = os.path.join(TestSyncOnce.temp_dir, "destination.git")
+        Repo.init(self.destination_path, bare=True, initial_branch="main")
+        seed = Repo.clone_from(self.destination_path, os.path.join(TestSyncOnce.temp_dir, "seed"))
+        with open(os.path.join(TestSyncOnce.temp_dir, "seed", "README.md"), "w", encoding="utf-8") as file:
+            file.write("readme")
+        commit_changes(seed, "Initial commit")
+        seed.remote("origin").push("main")
+
+        self.event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin=self.origin_path,
+            destination=self.destination_path,
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("hw", "public")],
+        )
+        self.sync_dir = Path(TestSyncOnce.temp_dir) / "work" / "sync"
+
+        self.patches = [
+            patch("homework_deployer.workdir.get_root", return_value=Path(TestSyncOnce.temp_dir) / "work"),
+            patch("homework_deployer.workdir.subprocess.Popen"),
+            patch("homework_deployer.workdir.preflight"),
+            patch(
+                "homework_deployer.fingerprint.const.FINGERPRINTS_PATH",
+                os.path.join(TestSyncOnce.temp_dir, "fingerprints.json"),
+            ),
+        ]
+        for active_patch in self.patches:
+            active_patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        for active_patch in self.patches:
+            active_patch.stop()
+        shutil.rmtree(TestSyncOnce.temp_dir)
+        return super().tearDown()
+
+    def _write(self, name: str, content: str) -> None:
+        path = Path(self.origin_path) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def _destination_files(self) -> dict[str, str]:
+        repo = Repo(self.destination_path)
+        return {
+            blob.path: repo.git.show(f"main:{blob.path}")
+            for blob in repo.commit("main").tree.traverse()
+            if blob.type == "blob"
+        }
+
+    def test_01_first_sync_deploys_everything(self) -> None:
+        """
+        Verify that the first sync of an event is a full deployment.
+        """
+        # Act
+        actual_result = sync_once(self.event, self.sync_dir)
+
+        # Assert
+        self.assertTrue(actual_result)
+        self.assertEqual(
+            self._destination_files(), {"README.md": "readme", "public/a.txt": "a", "public/b.txt": "b"}
+        )
+
+    def test_02_only_changes_are_applied(self) -> None:
+        """
+        Verify that added, modified and deleted files are applied in a single commit.
+        """
+        # Arrange
+        sync_once(self.event, self.sync_dir)
+        commits_before = len(list(Repo(self.destination_path).iter_commits("main")))
+
+        self._write("hw/a.txt", "changed")
+        commit_changes(self.origin, "Change a")
+        os.remove(os.path.join(self.origin_path, "hw", "b.txt"))
+        self._write("hw/sub/c.txt", "c")
+        self._write("private.txt", "changed")
+        commit_changes(self.origin, "Delete b, add c")
+
+        # Act
+        actual_result = sync_once(self.event, self.sync_dir)
+
+        # Assert
+        self.assertTrue(actual_result)
+        self.assertEqual(
+            self._destination_files(),
+            {"README.md": "readme", "public/a.txt": "changed", "public/sub/c.txt": "c"},
+        )
+        self.assertEqual(len(list(Repo(self.destination_path).iter_commits("main"))), commits_before + 1)
+
+    def test_03_unmatched_changes_are_ignored(self) -> None:
+        """
+        Verify that changes outside of the patterns do not create a commit.
+        """
+        # Arrange
+        sync_once(self.event, self.sync_dir)
+        self._write("private.txt", "changed")
+        commit_changes(self.origin, "Change private")
+
+        # Act
+        actual_result = sync_once(self.event, self.sync_dir)
+
+        # Assert
+        self.assertFalse(actual_result)
+
+    def test_04_not_due(self) -> None:
+        """
+        Verify that nothing is deployed before the date of the event.
+        """
+        # Arrange
+        self.event.date = datetime.now() + timedelta(days=1)
+
+        # Act
+        actual_result = sync_once(self.event, self.sync_dir)
+
+        # Assert
+        self.assertFalse(actual_result)
+        self.assertEqual(self._destination_files(), {"README.md": "readme"})
+
+    @patch("homework_deployer.sync.time.sleep")
+    @patch("homework_deployer.sync.sync_once")
+    def test_05_failed_poll(self, mock_sync_once: MagicMock, mock_sleep: MagicMock) -> None:
+        """
+        Verify that a failed deployment does not end the sync, and is retried on the next poll.
+        """
+        # Arrange
+        mock_sync_once.side_effect = [PushError("Push failed"), KeyboardInterrupt()]
+
+        # Act & Assert
+        with self.assertRaises(KeyboardInterrupt):
+            sync(self.event, 10)
+        self.assertEqual(mock_sync_once.call_count, 2)
+        mock_sleep.assert_called_once_with(10)
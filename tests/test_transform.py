@@ -0,0 +1,186 @@
+"""
+Tests for the transform module.
+"""
+
+import os
+import shutil
+import stat
+import unittest
+from pathlib import Path
+
+from homework_deployer.event import Transform
+from homework_deployer.transform import (
+    TransformError,
+    build_pipeline,
+    copy_files,
+    get_pipeline,
+    normalize_line_endings,
+    strip_regions,
+    substitute_placeholders,
+    transform_bytes,
+    transform_file,
+)
+
+
+class TestSteps(unittest.TestCase):
+    """
+    Test suite for the single transform steps.
+    """
+
+    def test_01_strip_regions(self) -> None:
+        """
+        Verify that marked regions are removed together with their markers.
+        """
+        # Arrange
+        lines = ["def solve():\n", "    # BEGIN SOLUTION\n", "    return 42\n", "    # END SOLUTION\n", "    pass\n"]
+
+        # Act
+        actual_result = list(strip_regions(lines, "BEGIN SOLUTION", "END SOLUTION"))
+
+        # Assert
+        self.assertEqual(actual_result, ["def solve():\n", "    pass\n"])
+
+    def test_02_unclosed_region(self) -> None:
+        """
+        Verify that a region without an end marker is an error.
+        """
+        # Arrange
+        lines = ["a\n", "# BEGIN SOLUTION\n", "b\n"]
+
+        # Act & Assert
+        with self.assertRaises(TransformError):
+            list(strip_regions(lines, "BEGIN SOLUTION", "END SOLUTION"))
+
+    def test_03_substitute_placeholders(self) -> None:
+        """
+        Verify that all placeholders are replaced.
+        """
+        # Act
+        actual_result = list(substitute_placeholders(["{{year}} {{name}}\n"], {"{{year}}": "2024", "{{name}}": "hw1"}))
+
+        # Assert
+        self.assertEqual(actual_result, ["2024 hw1\n"])
+
+    def test_04_normalize_line_endings(self) -> None:
+        """
+        Verify that line endings are replaced, and a missing final line ending is not added.
+        """
+        # Act
+        actual_result = list(normalize_line_endings(["a\r\n", "b\n", "c"], "\n"))
+
+        # Assert
+        self.assertEqual(actual_result, ["a\n", "b\n", "c"])
+
+    def test_05_pipeline(self) -> None:
+        """
+        Verify that the steps of all transforms are chained, and that transforms doing nothing give no pipeline.
+        """
+        # Arrange
+        transforms = [
+            Transform(files="**/*.py", strip_markers=("BEGIN", "END")),
+            Transform(files="**/*.py", placeholders={"X": "Y"}, line_endings="crlf"),
+        ]
+
+        # Act
+        pipeline = build_pipeline(transforms)
+        empty_pipeline = build_pipeline([Transform(files="**/*.py")])
+
+        # Assert
+        assert pipeline is not None
+        self.assertEqual(list(pipeline(["X\n", "BEGIN\n", "X\n", "END\n", "X"])), ["Y\r\n", "Y"])
+        self.assertIsNone(empty_pipeline)
+
+    def test_06_transform_bytes(self) -> None:
+        """
+        Verify that text content is transformed and binary content is kept.
+        """
+        # Arrange
+        pipeline = build_pipeline([Transform(files="*", placeholders={"a": "b"})])
+        assert pipeline is not None
+
+        # Act
+        actual_text = transform_bytes(b"abc\n", pipeline)
+        actual_binary = transform_bytes(b"a\0a", pipeline)
+
+        # Assert
+        self.assertEqual(actual_text, b"bbc\n")
+        self.assertEqual(actual_binary, b"a\0a")
+
+
+class TestCopyFiles(unittest.TestCase):
+    """
+    Test suite for the copy_files function.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_transform")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestCopyFiles.temp_dir):
+            shutil.rmtree(TestCopyFiles.temp_dir)
+
+        self.source = Path(TestCopyFiles.temp_dir) / "source"
+        self.destination = Path(TestCopyFiles.temp_dir) / "destination"
+        (self.source / "hw" / "data").mkdir(parents=True)
+        (self.source / "hw" / "task.py").write_text("a = 1\n# BEGIN\nsecret = 2\n# END\n", encoding="utf-8")
+        (self.source / "hw" / "README.md").write_text("# BEGIN\nkept\n", encoding="utf-8")
+        (self.source / "hw" / "data" / "image.py").write_bytes(b"# BEGIN\0\n")
+        (self.source / "hw" / "task.py").chmod(0o755)
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestCopyFiles.temp_dir)
+        return super().tearDown()
+
+    def test_01_transform_matching_files(self) -> None:
+        """
+        Verify that matching text files are transformed, and binary and unmatched files are copied as they are.
+        """
+        # Arrange
+        transforms = [Transform(files="hw/**/*.py", strip_markers=("# BEGIN", "# END"))]
+
+        # Act
+        copy_files([(self.source / "hw", self.destination / "public")], transforms, self.source)
+
+        # Assert
+        self.assertEqual((self.destination / "public" / "task.py").read_text(encoding="utf-8"), "a = 1\n")
+        self.assertEqual((self.destination / "public" / "README.md").read_text(encoding="utf-8"), "# BEGIN\nkept\n")
+        self.assertEqual((self.destination / "public" / "data" / "image.py").read_bytes(), b"# BEGIN\0\n")
+        self.assertTrue((self.destination / "public" / "task.py").stat().st_mode & stat.S_IXUSR)
+
+    def test_02_get_pipeline(self) -> None:
+        """
+        Verify that only the transforms matching a file are used.
+        """
+        # Arrange
+        transforms = [Transform(files="hw/*.py", placeholders={"a": "b"})]
+
+        # Act & Assert
+        self.assertIsNotNone(get_pipeline(transforms, "hw/task.py"))
+        self.assertIsNone(get_pipeline(transforms, "hw/README.md"))
+        self.assertIsNone(get_pipeline(transforms, "other/task.py"))
+
+    def test_03_same_lines_in_memory(self) -> None:
+        """
+        Verify that content held in memory is split into the same lines as a streamed file,
+        where form feeds and other separators do not end lines.
+        """
+        # Arrange
+        content = "a = 1\f# BEGIN\nsecret = 2\n# END\x0bx\x85\u2028\nkept\r\n"
+        source_path = self.source / "hw" / "form_feed.py"
+        source_path.write_bytes(content.encode("utf-8"))
+        self.destination.mkdir()
+        pipeline = build_pipeline([Transform(files="**/*.py", strip_markers=("# BEGIN", "# END"))])
+        assert pipeline is not None
+
+        # Act
+        transform_file(source_path, self.destination / "form_feed.py", pipeline)
+        actual_bytes = transform_bytes(content.encode("utf-8"), pipeline)
+
+        # Assert
+        self.assertEqual((self.destination / "form_feed.py").read_bytes(), b"kept\r\n")
+        self.assertEqual(actual_bytes, b"kept\r\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Tests for the tree module.
+"""
+
+import unittest
+from typing import Optional
+
+from homework_deployer.tree import TreeEntry, match, expand_blobs, get_destinations, map_paths
+
+
+def _entries(blobs: list[str], trees: list[str]) -> dict[str, TreeEntry]:
+    entries = {path: TreeEntry("100644", "blob", path, 1) for path in blobs}
+    entries.update({path: TreeEntry("040000", "tree", path, 0) for path in trees})
+    return entries
+
+
+class TestMatch(unittest.TestCase):
+    """
+    Test suite for matching patterns against tree entries.
+    """
+
+    entries = _entries(["a.py", "c/e.txt", "c/j.txt", "c/d/f.txt", "c/d/g.py"], ["c", "c/d"])
+
+    def test_01_file(self) -> None:
+        """
+        Verify that a file pattern matches only that file.
+        """
+        self.assertEqual(match("c/e.txt", TestMatch.entries), ["c/e.txt"])
+
+    def test_02_directory(self) -> None:
+        """
+        Verify that a directory pattern matches the directory itself.
+        """
+        self.assertEqual(match("c", TestMatch.entries), ["c"])
+
+    def test_03_glob_does_not_cross_directories(self) -> None:
+        """
+        Verify that a wildcard does not match slashes.
+        """
+        self.assertEqual(match("c/*.txt", TestMatch.entries), ["c/e.txt", "c/j.txt"])
+        self.assertEqual(match("*.py", TestMatch.entries), ["a.py"])
+
+    def test_04_recursive_glob(self) -> None:
+        """
+        Verify that a double star matches any number of directories.
+        """
+        self.assertEqual(match("**/*.py", TestMatch.entries), ["a.py", "c/d/g.py"])
+        self.assertEqual(match("c/**", TestMatch.entries), ["c", "c/d"])
+
+    def test_05_character_class(self) -> None:
+        """
+        Verify that character classes are supported.
+        """
+        self.assertEqual(match("c/[!e].txt", TestMatch.entries), ["c/j.txt"])
+
+    def test_06_expand_blobs(self) -> None:
+        """
+        Verify that directories are expanded to the files they contain.
+        """
+        self.assertEqual(expand_blobs(["c/d", "a.py"], TestMatch.entries), ["a.py", "c/d/f.txt", "c/d/g.py"])
+
+    def test_07_get_destinations_matches_map_paths(self) -> None:
+        """
+        Verify that mapping single files gives the same destinations as mapping the whole tree.
+        """
+        # Arrange
+        patterns: list[tuple[str, Optional[str]]] = [("c/d", "out"), ("*.py", "src"), ("c/**", None), ("b.txt", None)]
+        expected = map_paths(patterns, TestMatch.entries)
+
+        # Act
+        actual_result = {
+            destination: path
+            for path, entry in TestMatch.entries.items()
+            if entry.type == "blob"
+            for destination in get_destinations(patterns, path)
+        }
+
+        # Assert
+        self.assertEqual(actual_result, expected)
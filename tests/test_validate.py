@@ -0,0 +1,110 @@
+"""
+Tests for the validate module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from unittest.mock import patch
+
+from git import Repo
+
+from homework_deployer.event import Event
+from homework_deployer.executor import commit_changes
+from homework_deployer.validate import validate
+
+
+class TestValidate(unittest.TestCase):
+    """
+    Test suite for the validate function.
+    """
+
+    temp_dir = os.path.join("/tmp", "test_validate")
+
+    def setUp(self) -> None:
+        if os.path.exists(TestValidate.temp_dir):
+            shutil.rmtree(TestValidate.temp_dir)
+
+        self.origin_path = os.path.join(TestValidate.temp_dir, "origin")
+        self.origin = Repo.init(self.origin_path, initial_branch="main")
+        self._write("hw/a.py", "aaaa")
+        self._write("hw/b.py", "bb")
+        self._write("hw/nested/c.txt", "c")
+        self._write("README.md", "readme")
+        commit_changes(self.origin, "Initial commit")
+
+        self.patch = patch("homework_deployer.workdir.get_root", return_value=Path(TestValidate.temp_dir) / "work")
+        self.patch.start()
+
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        self.patch.stop()
+        shutil.rmtree(TestValidate.temp_dir)
+        return super().tearDown()
+
+    def _write(self, name: str, content: str) -> None:
+        path = Path(self.origin_path) / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+
+    def _event(self, origin: str, patterns: list[tuple[str, Optional[str]]]) -> Event:
+        return Event(
+            name="test_event",
+            description="Test event",
+            origin=origin,
+            destination="destination",
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=patterns,
+        )
+
+    def test_01_pattern_reports(self) -> None:
+        """
+        Verify that matches, files and bytes are counted, and that unsupported and empty patterns are reported.
+        """
+        # Arrange
+        valid = self._event(self.origin_path, [("hw/*.py", "public"), ("hw", None), ("README.md", "docs/index.md")])
+        invalid = self._event(
+            self.origin_path, [("hw/*.py", "public/a.py"), ("hw", "public/hw.py"), ("missing", None)]
+        )
+
+        # Act
+        actual_result = validate({"valid.json": valid, "invalid.json": invalid})
+
+        # Assert
+        valid_report = actual_result["valid.json"]
+        self.assertTrue(valid_report.is_valid)
+        self.assertEqual(valid_report.origin_commit, self.origin.head.commit.hexsha)
+        self.assertEqual([pattern[2:5] for pattern in valid_report.patterns], [(2, 2, 6), (1, 3, 7), (1, 1, 6)])
+
+        invalid_report = actual_result["invalid.json"]
+        self.assertFalse(invalid_report.is_valid)
+        self.assertEqual(
+            [pattern.error for pattern in invalid_report.patterns],
+            ["Not supported: glob to file", "Not supported: directory to file", "Matches nothing"],
+        )
+
+    def test_02_unreadable_origin(self) -> None:
+        """
+        Verify that an origin which cannot be read invalidates its events only.
+        """
+        # Arrange
+        events = {
+            "valid.json": self._event(self.origin_path, [("hw", None)]),
+            "missing.json": self._event(os.path.join(TestValidate.temp_dir, "missing"), [("hw", None)]),
+        }
+
+        # Act
+        actual_result = validate(events)
+
+        # Assert
+        self.assertTrue(actual_result["valid.json"].is_valid)
+        self.assertFalse(actual_result["missing.json"].is_valid)
+        self.assertIsNotNone(actual_result["missing.json"].error)
+
+
+if __name__ == "__main__":
+    unittest.main()
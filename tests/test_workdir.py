@@ -0,0 +1,143 @@
+"""
+Tests for the workdir module.
+"""
+
+import os
+import shutil
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch, MagicMock
+
+import homework_deployer.constants as const
+from homework_deployer.event import Event
+from homework_deployer.settings import DiskSpace, Settings
+from homework_deployer.workdir import collect_garbage, discard, gc_lock, preflight, InsufficientSpaceError
+
+
+class TestPreflight(unittest.TestCase):
+    """
+    Test suite for the preflight function.
+    """
+
+    def setUp(self) -> None:
+        self.event = Event(
+            id="1",
+            name="test_event",
+            description="Test event",
+            origin="https://example.com/origin",
+            destination="https://example.com/destination",
+            date=datetime(2024, 1, 1, 12, 0),
+            patterns=[("*.txt", None)],
+        )
+        return super().setUp()
+
+    @patch("homework_deployer.workdir.shutil.disk_usage")
+    @patch("homework_deployer.workdir.settings.get")
+    def test_01_enough_space(self, mock_settings: MagicMock, mock_disk_usage: MagicMock) -> None:
+        """
+        Verify that a run fitting in the free space passes.
+        """
+        # Arrange
+        mock_settings.return_value = Settings(work_root="/tmp/test_preflight", disk_space=DiskSpace(margin=1))
+        mock_disk_usage.return_value = MagicMock(free=300 * 1024 * 1024)
+
+        # Act & Assert
+        preflight(self.event)
+
+    @patch("homework_deployer.workdir.shutil.disk_usage")
+    @patch("homework_deployer.workdir.settings.get")
+    def test_02_refuse(self, mock_settings: MagicMock, mock_disk_usage: MagicMock) -> None:
+        """
+        Verify that a run not fitting in the free space is refused.
+        """
+        # Arrange
+        mock_settings.return_value = Settings(work_root="/tmp/test_preflight", disk_space=DiskSpace(margin=1))
+        mock_disk_usage.return_value = MagicMock(free=100 * 1024 * 1024)
+
+        # Act & Assert
+        with self.assertRaises(InsufficientSpaceError):
+            preflight(self.event)
+
+    @patch("homework_deployer.workdir.time.sleep")
+    @patch("homework_deployer.workdir.shutil.disk_usage")
+    @patch("homework_deployer.workdir.settings.get")
+    def test_03_queue(self, mock_settings: MagicMock, mock_disk_usage: MagicMock, mock_sleep: MagicMock) -> None:
+        """
+        Verify that a queued run waits until space is freed.
+        """
+        # Arrange
+        disk_space = DiskSpace(action="queue", margin=1)
+        mock_settings.return_value = Settings(work_root="/tmp/test_preflight", disk_space=disk_space)
+        mock_disk_usage.side_effect = [MagicMock(free=0), MagicMock(free=300 * 1024 * 1024)]
+
+        # Act
+        preflight(self.event)
+
+        # Assert
+        mock_sleep.assert_called_once_with(disk_space.poll_interval)
+
+
+class TestCollectGarbage(unittest.TestCase):
+    """
+    Test suite for the collect_garbage function.
+    """
+
+    work_root = Path("/tmp") / "test_collect_garbage"
+
+    def setUp(self) -> None:
+        os.makedirs(TestCollectGarbage.work_root / const.TRASH_DIR / "run_1", exist_ok=True)
+        os.makedirs(TestCollectGarbage.work_root / "run_2", exist_ok=True)
+        os.makedirs(TestCollectGarbage.work_root / "run_3", exist_ok=True)
+        os.utime(TestCollectGarbage.work_root / "run_2", (0, 0))
+        return super().setUp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(TestCollectGarbage.work_root)
+        return super().tearDown()
+
+    def test_01_remove_discarded_and_expired(self) -> None:
+        """
+        Verify that discarded runs and expired failed runs are removed, and recent failed runs are kept.
+        """
+        # Act
+        collect_garbage(TestCollectGarbage.work_root)
+
+        # Assert
+        self.assertEqual(os.listdir(TestCollectGarbage.work_root / const.TRASH_DIR), [])
+        self.assertFalse((TestCollectGarbage.work_root / "run_2").exists())
+        self.assertTrue((TestCollectGarbage.work_root / "run_3").exists())
+
+    def test_02_checkpoint_activity(self) -> None:
+        """
+        Verify that a failed run is kept while its checkpoint is recent, even if its directory was not modified.
+        """
+        # Arrange
+        run_dir = TestCollectGarbage.work_root / "run_2"
+        (run_dir / const.CHECKPOINT_FILE).write_text('{"phases": []}', encoding="utf-8")
+        os.utime(run_dir, (0, 0))
+
+        # Act
+        collect_garbage(TestCollectGarbage.work_root)
+
+        # Assert
+        self.assertTrue(run_dir.exists())
+
+    def test_03_single_collector(self) -> None:
+        """
+        Verify that nothing is collected while another process collects, and no process is started for
+        discarded runs then.
+        """
+        # Arrange
+        run_dir = TestCollectGarbage.work_root / "run_3"
+
+        # Act
+        with gc_lock(TestCollectGarbage.work_root) as is_locked, patch("subprocess.Popen") as mock_popen:
+            collect_garbage(TestCollectGarbage.work_root)
+            discard(run_dir)
+
+        # Assert
+        self.assertTrue(is_locked)
+        self.assertTrue((TestCollectGarbage.work_root / const.TRASH_DIR / "run_1").exists())
+        self.assertTrue((TestCollectGarbage.work_root / const.TRASH_DIR / "run_3").exists())
+        mock_popen.assert_not_called()